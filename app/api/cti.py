@@ -1,32 +1,237 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import AsyncIterator, Iterable, Optional, Set
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from app.core import security
+from app.core.circuit_breaker import breaker_stats, OPEN
+from app.core.config import conf
+from app.core.json_codec import FastJSONResponse, dump_models, dumps, select_fields
+from app.core.rate_limit import provider_scheduler, request_priority, PRIORITY_BATCH
+from app.core.refresh_scheduler import refresh_scheduler
 from app.database import db
-from app.schemas.cti import CTI
-from app.crud.cti import upsert_cti_results
+from app.schemas.cti import CTI, CTIRisk
+from app.crud.cti import cti_cache, get_cti_history, get_latest_cti, upsert_cti_results
+from app.crud.scoring import get_indicator_risk
 
 
 router = APIRouter()
 
+# 배치 분석 시 동시에 처리할 도메인 수와 한 번에 받을 수 있는 최대 도메인 수
+BATCH_CONCURRENCY = int(conf.get("cti_batch_concurrency", 8))
+BATCH_MAX_ITEMS = int(conf.get("cti_batch_max_items", 10000))
+
 
 class DomainRequest(BaseModel):
     domain: str = Field(..., description="분석할 도메인", example="example.com")
+    force_refresh: bool = Field(False, description="캐시된 결과를 무시하고 프로바이더를 다시 조회")
+
+
+class BatchDomainRequest(BaseModel):
+    domains: list[str] = Field(..., description="분석할 도메인 목록", example=["example.com", "example.org"])
+    force_refresh: bool = Field(False, description="캐시된 결과를 무시하고 프로바이더를 다시 조회")
+
+
+FIELDS_DESCRIPTION = "응답에 포함할 필드 (쉼표로 구분, 예: search_item,tag,malicious_score,detect_count)"
+INCLUDE_RAW_DESCRIPTION = "false면 프로바이더 원본 응답(raw_data)을 제외"
+
+
+def _response_fields(fields: Optional[str], include_raw: bool) -> Optional[Set[str]]:
+    try:
+        return select_fields(CTI, fields, include_raw)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/analyze/domain", response_model=list[CTI])
 def analyze_domain(
     request: DomainRequest,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_raw: bool = Query(True, description=INCLUDE_RAW_DESCRIPTION),
     db_session: Session = Depends(db.get_session),
     api_key: str = Depends(security.get_api_key),
 ):
+    include = _response_fields(fields, include_raw)
     try:
-        results = upsert_cti_results(db_session, domain=request.domain)
-        return results
+        results = upsert_cti_results(
+            db_session, domain=request.domain, force_refresh=request.force_refresh
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"CTI 분석 중 오류: {e}")
+    # 결과는 이미 스키마 객체이므로 응답 모델 재검증 없이 선택한 필드만 바로 직렬화
+    return FastJSONResponse(dump_models(results, include))
+
+
+@router.get("/health")
+async def cti_health():
+    """CTI 서비스 헬스체크 (프로바이더별 서킷 브레이커/호출 대기열 상태 포함)"""
+    breakers = breaker_stats()
+    degraded = any(b["state"] == OPEN for b in breakers.values())
+    return {
+        "status": "degraded" if degraded else "healthy",
+        "service": "cti",
+        "circuit_breakers": breakers,
+        "rate_limits": provider_scheduler.stats(),
+        "refresh_scheduler": refresh_scheduler.stats(),
+        "cache": cti_cache.stats(),
+        "db_pool": db.pool_stats(),
+    }
+
+
+HISTORY_MAX_LIMIT = int(conf.get("cti_history_max_limit", 500))
 
 
- 
+@router.get("/latest")
+def latest_cti(
+    tag: Optional[str] = Query(None, description="프로바이더 (virustotal|hybrid|urlscan), 없으면 전체"),
+    limit: int = Query(50, ge=1, le=HISTORY_MAX_LIMIT, description="한 페이지의 지표 수"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_raw: bool = Query(False, description=INCLUDE_RAW_DESCRIPTION),
+    db_session: Session = Depends(db.get_session),
+    api_key: str = Depends(security.get_api_key),
+):
+    """지표별·프로바이더별 최신 분석 결과를 지표 이름순으로 조회합니다."""
+    include = _response_fields(fields, include_raw)
+    try:
+        items, next_cursor = get_latest_cti(
+            db_session, tag=tag, limit=limit, cursor=cursor, include_raw=include_raw
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({"items": dump_models(items, include), "next_cursor": next_cursor})
 
+
+@router.get("/{indicator}/history")
+def cti_history(
+    indicator: str,
+    tag: Optional[str] = Query(None, description="프로바이더 (virustotal|hybrid|urlscan), 없으면 전체"),
+    limit: int = Query(50, ge=1, le=HISTORY_MAX_LIMIT, description="한 페이지의 결과 수"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_raw: bool = Query(False, description=INCLUDE_RAW_DESCRIPTION),
+    db_session: Session = Depends(db.get_session),
+    api_key: str = Depends(security.get_api_key),
+):
+    """지표의 과거 분석 결과를 최신순으로 조회합니다."""
+    include = _response_fields(fields, include_raw)
+    try:
+        items, next_cursor = get_cti_history(
+            db_session, indicator, tag=tag, limit=limit, cursor=cursor, include_raw=include_raw
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({"items": dump_models(items, include), "next_cursor": next_cursor})
+
+
+@router.get("/{indicator}/risk", response_model=CTIRisk)
+def indicator_risk(
+    indicator: str,
+    db_session: Session = Depends(db.get_session),
+    api_key: str = Depends(security.get_api_key),
+):
+    """저장된 프로바이더별 최신 결과로 계산한 종합 위험도 (외부 API 호출 없음)"""
+    return get_indicator_risk(db_session, indicator)
+
+
+@router.post("/analyze/batch")
+async def analyze_batch(
+    request: BatchDomainRequest,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_raw: bool = Query(True, description=INCLUDE_RAW_DESCRIPTION),
+    api_key: str = Depends(security.get_api_key),
+):
+    """도메인 목록을 분석하고 끝나는 순서대로 NDJSON 한 줄씩 스트리밍합니다."""
+    include = _response_fields(fields, include_raw)
+    domains = _dedupe_domains(request.domains)
+    return _batch_response(domains, request.force_refresh, include)
+
+
+@router.post("/analyze/batch/file")
+async def analyze_batch_file(
+    file: UploadFile = File(..., description="한 줄에 도메인 하나씩 적은 텍스트 파일"),
+    force_refresh: bool = Form(False),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_raw: bool = Query(True, description=INCLUDE_RAW_DESCRIPTION),
+    api_key: str = Depends(security.get_api_key),
+):
+    """업로드한 파일의 도메인을 분석하고 끝나는 순서대로 NDJSON 한 줄씩 스트리밍합니다."""
+    include = _response_fields(fields, include_raw)
+    content = (await file.read()).decode("utf-8", errors="ignore")
+    domains = _dedupe_domains(line.split(",")[0] for line in content.splitlines())
+    return _batch_response(domains, force_refresh, include)
+
+
+def _dedupe_domains(items: Iterable[str]) -> list[str]:
+    """공백/주석 줄을 버리고 순서를 유지한 채 중복을 제거합니다."""
+    seen: set[str] = set()
+    domains: list[str] = []
+    for item in items:
+        domain = item.strip().lower()
+        if not domain or domain.startswith("#") or domain in seen:
+            continue
+        seen.add(domain)
+        domains.append(domain)
+    return domains
+
+
+def _batch_response(domains: list[str], force_refresh: bool, include: Optional[Set[str]]) -> StreamingResponse:
+    if not domains:
+        raise HTTPException(status_code=400, detail="분석할 도메인이 없습니다.")
+    if len(domains) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"한 번에 최대 {BATCH_MAX_ITEMS}개 도메인까지 분석할 수 있습니다.",
+        )
+    return StreamingResponse(
+        _stream_batch(domains, force_refresh, include),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _stream_batch(domains: list[str], force_refresh: bool, include: Optional[Set[str]]) -> AsyncIterator[bytes]:
+    """BATCH_CONCURRENCY개 워커가 도메인을 나눠 처리하고, 끝난 결과부터 내보냅니다."""
+    queue: asyncio.Queue = asyncio.Queue()
+    pending = iter(domains)
+
+    async def worker():
+        for domain in pending:
+            await queue.put(await _analyze_batch_item(domain, force_refresh, include))
+
+    workers = [
+        asyncio.create_task(worker())
+        for _ in range(min(BATCH_CONCURRENCY, len(domains)))
+    ]
+    try:
+        for _ in range(len(domains)):
+            line = await queue.get()
+            yield dumps(line) + b"\n"
+    finally:
+        # 클라이언트가 연결을 끊으면 남은 작업은 시작하지 않음
+        for task in workers:
+            task.cancel()
+
+
+async def _analyze_batch_item(domain: str, force_refresh: bool, include: Optional[Set[str]]) -> dict:
+    try:
+        results = await run_in_threadpool(_analyze_in_own_session, domain, force_refresh, include)
+        return {"domain": domain, "results": results}
+    except Exception as e:
+        return {"domain": domain, "error": f"CTI 분석 중 오류: {e}"}
+
+
+def _analyze_in_own_session(domain: str, force_refresh: bool, include: Optional[Set[str]]) -> list[dict]:
+    # 워커 스레드마다 별도 세션을 사용 (scoped_session은 스레드 로컬)
+    session = db.Session()
+    # 배치 작업은 Slack/단건 조회보다 나중에 호출 토큰을 받음
+    priority_token = request_priority.set(PRIORITY_BATCH)
+    try:
+        results = upsert_cti_results(session, domain=domain, force_refresh=force_refresh)
+        return dump_models(results, include)
+    finally:
+        request_priority.reset(priority_token)
+        db.Session.remove()
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
 from app.crud import ioc as ioc_crud
+from app.crud import feed as feed_crud
 from app.schemas import ioc as ioc_schema
 from app.core import security
+from app.core.json_codec import FastJSONResponse, select_fields
+from app.core.verdict_index import verdict_index
 from app.database import db
 
 router = APIRouter()
@@ -15,17 +20,52 @@ class IPRequest(BaseModel):
 @router.post("/analyze/ip", response_model=ioc_schema.IoC)
 def analyze_ip(
     request: IPRequest,
+    fields: Optional[str] = Query(None, description="응답에 포함할 필드 (쉼표로 구분, 예: indicator_value,malicious_count)"),
+    include_raw: bool = Query(True, description="false면 raw_data를 제외"),
     db_session: Session = Depends(db.get_session),
     api_key: str = Depends(security.get_api_key)
 ):
     """IP 주소를 분석하여 악성 여부를 확인하고 결과를 DB에 저장합니다."""
-    # 1. DB에 이미 분석 결과가 있는지 확인
-    db_ioc = ioc_crud.get_ioc_by_value(db_session, value=request.ip)
-    if db_ioc:
-        return db_ioc
-    # 2. DB에 없다면 VirusTotal API 호출
-    vt_data = ioc_crud.analyze_ip_with_virustotal(request.ip)
-    if not vt_data:
-        raise HTTPException(status_code=404, detail="Could not get analysis from VirusTotal.")
-    # 3. 분석 결과를 DB에 저장하고 반환
-    return ioc_crud.create_ioc_report(db_session, ip=request.ip, vt_data=vt_data)
+    try:
+        include = select_fields(ioc_schema.IoC, fields, include_raw)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # DB에 분석 결과가 있으면 반환하고, 없으면 VirusTotal 조회 후 저장 (동시 요청은 한 번만 처리)
+    result = ioc_crud.analyze_and_store_ip(db_session, ip=request.ip)
+    return FastJSONResponse(result.model_dump(include=include))
+
+
+@router.get("/check", response_model=ioc_schema.VerdictCheck)
+def check_indicator(
+    indicator: str,
+    api_key: str = Depends(security.get_api_key)
+):
+    """이미 분석/수집한 지표(도메인, IP, CIDR)의 판정을 메모리 인덱스에서 바로 조회합니다."""
+    match = verdict_index.lookup(indicator)
+    if match is None:
+        return ioc_schema.VerdictCheck(indicator=indicator.strip().lower(), known=False, index_loaded=verdict_index.loaded)
+    return ioc_schema.VerdictCheck(**match, known=True, index_loaded=verdict_index.loaded)
+
+
+@router.post("/ingest")
+def ingest_feed(
+    file: UploadFile = File(..., description="위협 피드 파일 (텍스트 목록, CSV, STIX JSON)"),
+    source: str = Form(..., description="피드 이름 (source 컬럼에 feed:<이름>으로 저장)"),
+    format: str = Form("auto", description="auto|txt|csv|stix"),
+    verdict: str = Form("malicious", description="피드 지표의 판정: malicious|harmless"),
+    db_session: Session = Depends(db.get_session),
+    api_key: str = Depends(security.get_api_key)
+):
+    """피드 파일을 스트리밍으로 읽어 외부 API 호출 없이 IoCTable에 일괄 저장합니다."""
+    if format not in feed_crud.FEED_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported feed format: {format}")
+    if verdict not in feed_crud.FEED_VERDICTS:
+        raise HTTPException(status_code=400, detail=f"Unsupported verdict: {verdict}")
+    return feed_crud.ingest_feed(
+        db_session,
+        file.file,
+        feed_name=source,
+        fmt=format,
+        filename=file.filename,
+        verdict=verdict,
+    )
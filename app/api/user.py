@@ -1,35 +1,169 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Any
+from typing import Any, List, Optional
 
 from app.crud import user as user_crud
-from app.crud import ioc as ioc_crud
+from app.crud import access_rollup
 
 from app.schemas import user as user_schema
 from app.core import security
+from app.core.access_log_writer import access_log_writer
+from app.core.ioc_enricher import ioc_enricher
+from app.core.password_hasher import password_hasher, needs_rehash, HasherBusy
 from app.database import db
 
 router = APIRouter()
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password hashing requests. Please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _in_session(func, *args, **kwargs):
+    """
+    스레드 풀 워커 안에서 세션을 열고 닫습니다.
+    scoped_session은 스레드 단위인데 run_in_threadpool 호출마다 워커 스레드가 달라질 수 있으므로
+    async 라우트는 Depends(db.get_session) 대신 호출마다 이 함수로 세션을 사용합니다.
+    """
+    session = db.Session()
+    try:
+        return func(session, *args, **kwargs)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        db.Session.remove()
+
+
+def _registered_conflict(session: Session, email: str, username: str) -> Optional[str]:
+    if user_crud.get_user_by_email(session, email=email):
+        return "Email already registered"
+    if user_crud.get_user_by_username(session, username=username):
+        return "Username already registered"
+    return None
+
+
+def _create_user(session: Session, user: user_schema.UserCreate, credentials) -> user_schema.User:
+    return user_schema.User.model_validate(user_crud.create_user(session, user, credentials))
+
+
+def _login_user(session: Session, email: str):
+    """(사용자, salt, 해시) 또는 None (세션을 닫은 뒤 쓰도록 값만 반환)"""
+    db_user = user_crud.get_user_by_email(session, email=email)
+    if db_user is None:
+        return None
+    return user_schema.User.model_validate(db_user), db_user.salt, db_user.hashed_password
+
+
 @router.post("/", response_model=user_schema.User)
-def create_user(
+async def create_user(
     user: user_schema.UserCreate,
-    db_session: Session = Depends(db.get_session),
     api_key: str = Depends(security.get_api_key)
 ) -> Any:
-    """Create new user"""
-    if user_crud.get_user_by_email(db_session, email=user.email):
+    """Create new user (비밀번호 해시는 프로세스 풀에서 계산하고, 기다리는 동안 스레드를 점유하지 않음)"""
+    conflict = await run_in_threadpool(_in_session, _registered_conflict, user.email, user.username)
+    if conflict:
         raise HTTPException(
             status_code=400,
-            detail="Email already registered"
+            detail=conflict
         )
-    if user_crud.get_user_by_username(db_session, username=user.username):
+    
+    try:
+        credentials = await password_hasher.hash_async(user.password)
+    except HasherBusy:
+        raise _hasher_busy()
+    return await run_in_threadpool(_in_session, _create_user, user, credentials)
+
+
+@router.post("/login", response_model=user_schema.User)
+async def login(
+    credentials: user_schema.UserLogin,
+    api_key: str = Depends(security.get_api_key)
+) -> Any:
+    """이메일/비밀번호를 확인하고 사용자 정보를 반환합니다."""
+    found = await run_in_threadpool(_in_session, _login_user, credentials.email)
+    # 없는 이메일도 같은 시간이 걸리도록 더미 해시로 검증
+    result, salt, hashed_password = found or (None, user_crud.DUMMY_SALT, user_crud.DUMMY_HASH)
+    try:
+        valid = await user_crud.verify_password_async(credentials.password, salt, hashed_password)
+    except HasherBusy:
+        raise _hasher_busy()
+    if result is None or not valid:
         raise HTTPException(
-            status_code=400,
-            detail="Username already registered"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password"
         )
-    
-    return user_crud.create_user(db_session, user=user)
+
+    # 반복 횟수 설정이 바뀌었으면 로그인할 때 새 설정으로 다시 해시 (바쁘면 다음 로그인으로 미룸)
+    if needs_rehash(hashed_password):
+        try:
+            rehashed = await password_hasher.hash_async(credentials.password)
+            await run_in_threadpool(_in_session, user_crud.update_password_hash, result.id, rehashed)
+        except HasherBusy:
+            pass
+    return result
+
+# ----- 접근 로그 집계 (/{user_id}보다 먼저 선언해야 함) -----
+
+VERDICT_DESCRIPTION = "판정 (malicious|suspicious|harmless), 여러 번 지정 가능. 없으면 malicious+suspicious"
+HOURS_DESCRIPTION = "최근 몇 시간 (정시 단위)"
+
+
+@router.get("/access/flagged", response_model=List[user_schema.FlaggedUserAccess])
+def get_users_from_flagged_ips(
+    hours: int = Query(24, ge=1, le=access_rollup.ROLLUP_MAX_HOURS, description=HOURS_DESCRIPTION),
+    verdict: Optional[List[str]] = Query(None, description=VERDICT_DESCRIPTION),
+    limit: int = Query(100, ge=1, le=1000),
+    db_session: Session = Depends(db.get_session),
+    api_key: str = Depends(security.get_api_key)
+) -> Any:
+    """IoC 판정이 악성/의심인 IP에서 접근된 사용자를 접근 수 순으로 반환합니다."""
+    return access_rollup.get_users_from_flagged_ips(
+        db_session, hours=hours, verdicts=verdict or access_rollup.FLAGGED_VERDICTS, limit=limit,
+    )
+
+
+@router.get("/access/ips", response_model=List[user_schema.IPAccessSummary])
+def get_flagged_ips(
+    verdict: Optional[List[str]] = Query(None, description=VERDICT_DESCRIPTION),
+    limit: int = Query(100, ge=1, le=1000),
+    db_session: Session = Depends(db.get_session),
+    api_key: str = Depends(security.get_api_key)
+) -> Any:
+    """판정별 접근 IP 목록 (최근 접근 순)"""
+    return access_rollup.get_ip_summaries(
+        db_session, verdicts=verdict or access_rollup.FLAGGED_VERDICTS, limit=limit,
+    )
+
+
+@router.get("/access/ips/{ip}", response_model=user_schema.IPAccessSummary)
+def get_ip_access_summary(
+    ip: str,
+    db_session: Session = Depends(db.get_session),
+    api_key: str = Depends(security.get_api_key)
+) -> Any:
+    """IP의 누적 접근 수와 판정"""
+    summary = access_rollup.get_ip_summary(db_session, ip)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No access from this IP")
+    return summary
+
+
+@router.get("/{user_id}/access/top-ips", response_model=List[user_schema.UserIPActivity])
+def get_user_top_ips(
+    user_id: int,
+    hours: int = Query(24, ge=1, le=access_rollup.ROLLUP_MAX_HOURS, description=HOURS_DESCRIPTION),
+    limit: int = Query(10, ge=1, le=1000),
+    db_session: Session = Depends(db.get_session),
+    api_key: str = Depends(security.get_api_key)
+) -> Any:
+    """최근 hours시간 동안 사용자에게 가장 많이 접근한 IP"""
+    return access_rollup.get_top_ips_for_user(db_session, user_id, hours=hours, limit=limit)
+
 
 @router.get("/{user_id}", response_model=user_schema.User)
 def get_user(
@@ -38,26 +172,17 @@ def get_user(
     db_session: Session = Depends(db.get_session),
     api_key: str = Depends(security.get_api_key)
 ) -> Any:
-    """ID로 사용자를 조회하고, 접근 IP에 대한 IoC 분석을 수행합니다."""
-    client_ip = request.client.host
+    """ID로 사용자를 조회하고, 접근 IP에 대한 IoC 분석을 백그라운드 큐에 넣습니다."""
+    client_ip = request.client.host if request.client else None
     
-    db_user = user_crud.get_user_by_id(db_session, user_id=user_id)
+    db_user = user_crud.get_user(db_session, user_id=user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # 1. IP 주소를 포함하여 접근 로그 생성
-    access_log = user_crud.create_access_log(db_session, user_id=user_id, ip_address=client_ip)
+    # 1. IP 주소를 포함하여 접근 로그 생성 (버퍼에 넣고 묶어서 저장, id는 바로 정해짐)
+    access_log_id = access_log_writer.log(user_id, ip_address=client_ip)
     
-    # 2. 해당 IP에 대한 IoC 분석 수행 (이미 분석된 IP는 생략 가능)
-    existing_ioc = ioc_crud.get_ioc_by_value(db_session, value=client_ip)
-    if not existing_ioc:
-        vt_data = ioc_crud.analyze_ip_with_virustotal(client_ip)
-        if vt_data:
-            ioc_crud.create_ioc_report(
-                db=db_session, 
-                access_log_id=access_log.id,
-                ip=client_ip,
-                vt_data=vt_data
-            )
+    # 2. 해당 IP의 IoC 분석은 백그라운드에서 수행하고 access_log_id와 연결 (응답은 기다리지 않음)
+    ioc_enricher.submit(client_ip, access_log_id)
             
     return db_user
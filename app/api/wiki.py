@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from app.schemas.wiki import WikiSearchRequest, WikiSearchResult, WikiSummaryResponse
 from app.crud.wiki import wiki_crawler
 from app.crud.wiki_summarizer import wiki_summarizer
@@ -10,7 +11,8 @@ router = APIRouter()
 async def search_wiki(request: WikiSearchRequest):
     """BOB 위키에서 학생 검색"""
     try:
-        result = wiki_crawler.search_student(request.search_term)
+        # 크롤링(HTTP 요청)이 이벤트 루프를 막지 않도록 스레드 풀에서 실행
+        result = await run_in_threadpool(wiki_crawler.search_student, request.search_term)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"위키 검색 중 오류 발생: {str(e)}")
@@ -21,7 +23,7 @@ async def summarize_wiki(request: WikiSearchRequest):
     """BOB 위키 검색 후 요약"""
     try:
         # 1. 위키에서 검색
-        search_result = wiki_crawler.search_student(request.search_term)
+        search_result = await run_in_threadpool(wiki_crawler.search_student, request.search_term)
         
         if not search_result.pages:
             raise HTTPException(
@@ -30,7 +32,8 @@ async def summarize_wiki(request: WikiSearchRequest):
             )
         
         # 2. OpenAI로 요약 (사용자가 구현할 부분)
-        summary_result = wiki_summarizer.summarize_wiki_content(
+        summary_result = await run_in_threadpool(
+            wiki_summarizer.summarize_wiki_content,
             search_result.pages, 
             request.search_term
         )
@@ -0,0 +1,233 @@
+"""
+AccessLogTable 쓰기 버퍼
+
+GET /users/{user_id}마다 INSERT + commit + refresh를 하는 대신 접근 로그를 메모리에 모았다가
+access_log_batch_size개가 쌓이거나 access_log_flush_interval초가 지나면 여러 행을 한 번에 INSERT합니다.
+
+- 로그 id(시각/사용자/IP의 sha256)는 버퍼에 넣을 때 정해집니다.
+  로그를 참조하는 행(외래 키)은 after_persisted()로 로그가 기록된 뒤에 연결합니다.
+- 이미 기록된 id는 건너뜁니다 (INSERT IGNORE / INSERT OR IGNORE, 집계 콜백에도 새로 기록한 행만 전달).
+- 제약 조건 위반(IntegrityError)으로 실패하면 한 행씩 다시 기록해 문제 있는 행만 버리고 rejected로 셉니다.
+- 그 밖의 이유(DB 장애 등)로 저장에 실패한 로그는 버퍼에 남겨 다음 flush에서 다시 시도하며,
+  버퍼가 access_log_max_buffer를 넘으면 오래된 것부터 버립니다.
+- 정상 종료 시 stop()이 남은 로그를 모두 기록합니다.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import conf
+from app.database import db
+from app.models.user import AccessLog
+
+BATCH_SIZE = int(conf.get("access_log_batch_size", 500))
+FLUSH_INTERVAL = float(conf.get("access_log_flush_interval", 1.0))
+MAX_BUFFER = int(conf.get("access_log_max_buffer", 50000))
+
+
+def access_log_id(access_time: datetime, user_id: int, ip_address: Optional[str]) -> str:
+    """접근 로그 id (기존 create_access_log와 같은 방식)"""
+    return hashlib.sha256(f"{access_time}{user_id}{ip_address}".encode()).hexdigest()
+
+
+class AccessLogWriter:
+    def __init__(self, engine=None, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, max_buffer: int = MAX_BUFFER):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: Dict[str, Dict[str, Any]] = {}  # id -> 행 (같은 id가 두 번 들어가지 않도록 dict)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # flush는 한 번에 하나씩 (순서 유지)
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._on_flush: List[Callable[[Any, List[Dict[str, Any]]], None]] = []
+        self._flushing: set = set()  # 지금 flush 중인 로그 id
+        self._after_persisted: Dict[str, List[Callable[[Any], None]]] = {}  # 로그 id -> 기록 후 실행할 작업
+
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    def on_flush(self, callback: Callable[[Any, List[Dict[str, Any]]], None]):
+        """flush 트랜잭션 안에서 callback(connection, rows)를 호출합니다 (같은 트랜잭션으로 커밋)."""
+        self._on_flush.append(callback)
+
+    def after_persisted(self, log_id: str, callback: Callable[[Any], None]):
+        """
+        로그 log_id가 DB에 기록된 뒤 별도 트랜잭션에서 callback(connection)을 호출합니다.
+        이미 기록된 로그(버퍼/flush 중이 아님)면 바로 호출하고, 기록되지 못하고 버려진 로그의 작업은 함께 버립니다.
+        """
+        with self._lock:
+            if log_id in self._buffer or log_id in self._flushing:
+                self._after_persisted.setdefault(log_id, []).append(callback)
+                return
+        self._run_after_persisted([callback])
+
+    def _run_after_persisted(self, callbacks: List[Callable[[Any], None]]):
+        if not callbacks:
+            return
+        try:
+            with (self.engine or db.engine).begin() as conn:
+                for callback in callbacks:
+                    callback(conn)
+        except Exception as e:
+            print(f"⚠️ 접근 로그 기록 후 작업 실패 ({len(callbacks)}건): {e}")
+
+    def log(self, user_id: int, ip_address: Optional[str] = None, action: str = "get_user") -> str:
+        """접근 로그를 버퍼에 넣고 id를 반환합니다."""
+        access_time = datetime.now()
+        log_id = access_log_id(access_time, user_id, ip_address)
+        row = {
+            "id": log_id,
+            "user_id": user_id,
+            "ip_address": ip_address,
+            "access_time": access_time,
+            "action": action,
+        }
+        with self._lock:
+            self._buffer[log_id] = row
+            size = len(self._buffer)
+        self._ensure_thread()
+        if size >= self.batch_size:
+            self._wakeup.set()
+        return log_id
+
+    def _ensure_thread(self):
+        if self._thread is not None or self._stopping:
+            return
+        with self._lock:
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name="access-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ 접근 로그 저장 실패 ({len(self._buffer)}건 대기 중): {e}")
+
+    def flush(self) -> int:
+        """
+        버퍼의 로그를 모두 기록하고 새로 기록한 행 수를 반환합니다.
+        제약 조건을 어기는 행만 버리고, 그 밖의 이유로 실패하면 남은 로그를 버퍼에 되돌리고 예외를 다시 발생시킵니다.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = list(self._buffer.values()), {}
+                self._flushing = {row["id"] for row in rows}
+            if not rows:
+                return 0
+            try:
+                written = self._write(rows)
+            except IntegrityError:
+                written = self._write_each(rows)
+            except Exception:
+                self._requeue(rows)
+                raise
+            with self._lock:
+                self._flushing = set()
+                callbacks = [
+                    callback
+                    for row in rows
+                    for callback in self._after_persisted.pop(row["id"], [])
+                ]
+            self.written += written
+            self.flushes += 1
+        self._run_after_persisted(callbacks)
+        return written
+
+    def _write(self, rows: List[Dict[str, Any]]) -> int:
+        """한 트랜잭션으로 기록하고 새로 기록한 행 수를 반환합니다 (이미 있는 id는 건너뜀)."""
+        table = AccessLog.__table__
+        statement = insert(table).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+        fresh: List[Dict[str, Any]] = []
+        with (self.engine or db.engine).begin() as conn:
+            for start in range(0, len(rows), self.batch_size):
+                chunk = rows[start:start + self.batch_size]
+                existing = set(conn.execute(
+                    select(table.c.id).where(table.c.id.in_([row["id"] for row in chunk]))
+                ).scalars())
+                chunk = [row for row in chunk if row["id"] not in existing]
+                if chunk:
+                    conn.execute(statement, chunk)
+                fresh.extend(chunk)
+            if fresh:
+                for callback in self._on_flush:
+                    callback(conn, fresh)
+        self.duplicates += len(rows) - len(fresh)
+        return len(fresh)
+
+    def _write_each(self, rows: List[Dict[str, Any]]) -> int:
+        """한 행씩 기록해 제약 조건을 어기는 행만 버립니다. 다른 오류가 나면 남은 행을 되돌리고 다시 발생시킵니다."""
+        written = 0
+        for i, row in enumerate(rows):
+            try:
+                written += self._write([row])
+            except IntegrityError as e:
+                with self._lock:
+                    self._after_persisted.pop(row["id"], None)
+                self.rejected += 1
+                print(f"⚠️ 접근 로그 {row['id'][:12]} 저장 불가로 버림 (user_id={row['user_id']}): {e.orig}")
+            except Exception:
+                self._requeue(rows[i:])
+                raise
+        return written
+
+    def _requeue(self, rows: List[Dict[str, Any]]):
+        with self._lock:
+            self.failed_flushes += 1
+            self._flushing = set()
+            merged = {row["id"]: row for row in rows}
+            merged.update(self._buffer)
+            overflow = len(merged) - self.max_buffer
+            if overflow > 0:
+                for log_id in list(merged)[:overflow]:
+                    del merged[log_id]
+                    self._after_persisted.pop(log_id, None)
+                self.dropped += overflow
+            self._buffer = merged
+
+    def stop(self, timeout: float = 10.0):
+        """flush 스레드를 멈추고 남은 로그를 기록합니다."""
+        self._stopping = True
+        self._wakeup.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        try:
+            flushed = self.flush()
+            if flushed:
+                print(f"✅ 남은 접근 로그 {flushed}건 저장")
+        except Exception as e:
+            print(f"❌ 남은 접근 로그 {len(self._buffer)}건 저장 실패: {e}")
+        print("🛑 접근 로그 쓰기 버퍼 중지")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+        }
+
+
+# 글로벌 인스턴스
+access_log_writer = AccessLogWriter()
@@ -0,0 +1,324 @@
+"""
+지표/사용자 조회용 2단계 캐시
+
+1단계는 워커 프로세스 안의 LRU(크기 제한 + 짧은 TTL), 2단계는 여러 uvicorn 워커가 함께 쓰는 공유 저장소입니다.
+공유 저장소는 설정에 따라 다음 중 하나를 사용하고, 둘 다 없으면 1단계만 동작합니다.
+
+- cache_redis_url: Redis 호환 서버 (Redis, Valkey, KeyDB 등. redis 패키지 필요)
+- cache_shared_path: 같은 호스트의 워커끼리 공유하는 로컬 SQLite 파일 (추가 의존성 없음)
+
+"없음" 결과도 짧게(cache_negative_ttl) 캐시합니다.
+쓰기 후 invalidate하면 현재 워커의 1단계와 공유 저장소에서 지워지고, 다른 워커의 1단계는 cache_local_ttl 안에 만료됩니다.
+공유 저장소 오류는 요청을 실패시키지 않고 캐시 미스로 처리합니다.
+
+async 경로에서는 공유 저장소(Redis/SQLite) I/O가 이벤트 루프를 막지 않도록
+get_or_load_async와 run_sync(AsyncSession.run_sync 대신 사용)가 공유 저장소 호출을 스레드에서 실행합니다.
+"""
+
+import asyncio
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, List, Optional, Type
+
+from pydantic import BaseModel
+
+from app.core import json_codec
+from app.core.config import conf
+
+try:
+    import redis  # 없으면 Redis 공유 캐시 사용 안 함
+except ImportError:
+    redis = None
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+CACHE_ENABLED = bool(conf.get("cache_enabled", True))
+LOCAL_MAX_SIZE = int(conf.get("cache_local_max_size", 10000))
+LOCAL_TTL = float(conf.get("cache_local_ttl", 30))
+SHARED_TTL = float(conf.get("cache_shared_ttl", 300))
+NEGATIVE_TTL = float(conf.get("cache_negative_ttl", 30))
+
+MISS = object()  # 캐시에 없음 (None은 "없음" 결과가 캐시된 것)
+_NEGATIVE = b""  # 공유 저장소에 저장하는 "없음" 결과
+
+# run_sync 안(이벤트 루프 스레드)에서 실행 중이면 나중에 스레드에서 실행할 공유 저장소 쓰기 목록
+_deferred_shared: contextvars.ContextVar[Optional[List[Callable[[], None]]]] = contextvars.ContextVar(
+    "cache_deferred_shared", default=None,
+)
+
+
+class LRUCache:
+    """크기 제한과 항목별 만료 시각이 있는 스레드 안전 LRU"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (만료 시각, 값)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return MISS
+            if item[0] <= now:
+                del self._items[key]
+                return MISS
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class RedisTier:
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self._client.delete(key)
+
+
+class SQLiteTier:
+    """같은 호스트의 워커 프로세스가 함께 쓰는 파일 캐시 (Redis가 없을 때의 대체 공유 저장소)"""
+
+    PURGE_EVERY = 1000  # 이 횟수만큼 저장할 때마다 만료된 항목 정리
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()  # sqlite3 연결은 스레드마다 따로 사용
+        self._writes = 0
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=0.5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def set(self, key: str, value: bytes, ttl: float):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+def _create_shared_tier():
+    if not CACHE_ENABLED:
+        return None
+    url = conf.get("cache_redis_url")
+    if url:
+        if redis is None:
+            print("⚠️ cache_redis_url이 설정됐지만 redis 패키지가 없어 공유 캐시를 사용하지 않습니다.")
+        else:
+            return RedisTier(url)
+    path = conf.get("cache_shared_path")
+    if path:
+        return SQLiteTier(path)
+    return None
+
+
+class TwoTierCache:
+    """
+    namespace별 캐시. 값은 model(pydantic) 객체 또는 None("없음")이며,
+    1단계에는 객체를 그대로, 공유 저장소에는 JSON으로 저장합니다.
+    """
+
+    def __init__(self, namespace: str, model: Type[BaseModel], shared=None,
+                 local_ttl: float = LOCAL_TTL, shared_ttl: float = SHARED_TTL, negative_ttl: float = NEGATIVE_TTL):
+        self.namespace = namespace
+        self.model = model
+        self.shared = shared
+        self.local = LRUCache(LOCAL_MAX_SIZE)
+        self.local_ttl = local_ttl
+        self.shared_ttl = shared_ttl
+        self.negative_ttl = negative_ttl
+
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.shared_errors = 0
+
+    def _key(self, key: Any) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join([self.namespace, *(str(part) for part in parts)])
+
+    def get(self, key: Any) -> Any:
+        """캐시된 값(없음 결과는 None), 캐시에 없으면 MISS"""
+        if not CACHE_ENABLED:
+            return MISS
+        cache_key = self._key(key)
+        value = self.local.get(cache_key)
+        if value is not MISS:
+            self.local_hits += 1
+            return value
+
+        # run_sync 안에서는 이벤트 루프를 막지 않도록 공유 저장소를 읽지 않음 (get_or_load_async가 먼저 읽음)
+        if self.shared is not None and _deferred_shared.get() is None:
+            value = self._get_shared(cache_key)
+            if value is not MISS:
+                return value
+
+        self.misses += 1
+        return MISS
+
+    def _get_shared(self, cache_key: str) -> Any:
+        try:
+            data = self.shared.get(cache_key)
+        except Exception as e:
+            self._shared_error(e)
+            return MISS
+        if data is None:
+            return MISS
+        value = None if data == _NEGATIVE else self.model.model_validate(json_codec.loads(data))
+        self.local.set(cache_key, value, self.negative_ttl if value is None else self.local_ttl)
+        self.shared_hits += 1
+        return value
+
+    def set(self, key: Any, value: Optional[BaseModel]):
+        if not CACHE_ENABLED:
+            return
+        cache_key = self._key(key)
+        if value is None:
+            self.local.set(cache_key, None, self.negative_ttl)
+        else:
+            self.local.set(cache_key, value, self.local_ttl)
+        if self.shared is not None:
+            if value is None:
+                self._shared_call("set", cache_key, _NEGATIVE, self.negative_ttl)
+            else:
+                self._shared_call("set", cache_key, json_codec.dumps(value.model_dump()), self.shared_ttl)
+
+    def invalidate(self, key: Any):
+        if not CACHE_ENABLED:
+            return
+        cache_key = self._key(key)
+        self.local.delete(cache_key)
+        if self.shared is not None:
+            self._shared_call("delete", cache_key)
+
+    def _shared_call(self, method: str, *args):
+        """공유 저장소 쓰기. run_sync 안이면 끝난 뒤 스레드에서 실행하도록 미룸"""
+        deferred = _deferred_shared.get()
+        if deferred is not None:
+            deferred.append(lambda: self._shared_call_now(method, *args))
+        else:
+            self._shared_call_now(method, *args)
+
+    def _shared_call_now(self, method: str, *args):
+        try:
+            getattr(self.shared, method)(*args)
+        except Exception as e:
+            self._shared_error(e)
+
+    def get_or_load(self, key: Any, loader: Callable[[], Optional[BaseModel]]) -> Optional[BaseModel]:
+        """캐시에 없으면 loader()로 읽어 저장합니다 (None 결과도 negative_ttl 동안 저장)."""
+        value = self.get(key)
+        if value is MISS:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    async def get_or_load_async(self, key: Any, loader: Callable[[], Awaitable[Optional[BaseModel]]]) -> Optional[BaseModel]:
+        """get_or_load의 async 버전 (공유 저장소 I/O는 스레드에서, loader는 await)"""
+        if not CACHE_ENABLED:
+            return await loader()
+        cache_key = self._key(key)
+        value = self.local.get(cache_key)
+        if value is not MISS:
+            self.local_hits += 1
+            return value
+        if self.shared is not None:
+            value = await asyncio.to_thread(self._get_shared, cache_key)
+            if value is not MISS:
+                return value
+
+        self.misses += 1
+        value = await loader()
+        if self.shared is not None:
+            await asyncio.to_thread(self.set, key, value)
+        else:
+            self.set(key, value)
+        return value
+
+    def _shared_error(self, error: Exception):
+        self.shared_errors += 1
+        if self.shared_errors == 1 or self.shared_errors % 1000 == 0:
+            print(f"⚠️ 공유 캐시 오류 ({self.shared_errors}회): {error}")
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            "local_size": len(self.local),
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.local_hits + self.shared_hits) / lookups, 3) if lookups else 0.0,
+            "shared_errors": self.shared_errors,
+        }
+
+
+def _run_all(calls: List[Callable[[], None]]):
+    for call in calls:
+        call()
+
+
+async def run_sync(session: "AsyncSession", fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    session.run_sync(fn, ...)와 같지만 fn 안의 캐시 공유 저장소 I/O가 이벤트 루프를 막지 않습니다.
+    (공유 저장소는 읽지 않고, 쓰기/삭제는 fn이 끝난 뒤 스레드에서 실행. 1단계 캐시는 그대로 사용)
+    """
+    deferred: List[Callable[[], None]] = []
+    token = _deferred_shared.set(deferred)
+    try:
+        return await session.run_sync(fn, *args, **kwargs)
+    finally:
+        _deferred_shared.reset(token)
+        if deferred:
+            await asyncio.to_thread(_run_all, deferred)
+
+
+# 글로벌 인스턴스 (모든 namespace가 함께 쓰는 공유 저장소)
+shared_tier = _create_shared_tier()
@@ -0,0 +1,177 @@
+"""
+프로바이더별 서킷 브레이커
+
+최근 호출들의 실패율(느린 호출 포함)이 기준을 넘으면 회로를 열고, 열려 있는 동안은
+프로바이더를 호출하지 않고 바로 "provider unavailable" 결과를 돌려줍니다.
+open_seconds가 지나면 half-open 상태에서 시험 호출을 보내 성공하면 다시 닫습니다.
+
+걸린 시간은 http_client가 보고한 HTTP 왕복 시간만 합산합니다. 호출 한도 토큰 대기나 재시도 사이
+대기는 프로바이더 상태와 무관하므로 포함하지 않고, 프로바이더까지 요청이 나가지 않은 호출
+(토큰을 얻지 못한 RateLimitExceeded 등)은 기록하지 않습니다.
+"""
+
+import functools
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import conf
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_SETTINGS = {
+    "window": 20,  # 실패율을 계산할 최근 호출 수
+    "min_calls": 5,  # 이 수보다 적게 호출됐으면 회로를 열지 않음
+    "failure_rate": 0.5,  # 회로를 여는 실패 비율
+    "slow_call_seconds": 10,  # 이보다 오래 걸린 호출은 실패로 간주
+    "open_seconds": 30,  # 열린 상태 유지 시간
+    "half_open_calls": 1,  # half-open 상태에서 허용할 시험 호출 수
+}
+
+# guard로 감싼 호출 안에서 보낸 HTTP 요청 [횟수, 왕복 시간 합계(초)]
+_round_trips: ContextVar[Optional[List[float]]] = ContextVar("breaker_round_trips", default=None)
+
+
+def record_round_trip(seconds: float):
+    """HTTP 요청 한 번의 왕복 시간을 현재 브레이커 호출에 더합니다 (guard 밖에서는 무시)."""
+    trips = _round_trips.get()
+    if trips is not None:
+        trips[0] += 1
+        trips[1] += seconds
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, window: int, min_calls: int, failure_rate: float,
+                 slow_call_seconds: float, open_seconds: float, half_open_calls: int):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self._lock = threading.Lock()
+        self._outcomes: deque = deque(maxlen=window)  # (실패 여부, 걸린 시간)
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """호출해도 되는지 확인합니다. False면 프로바이더를 호출하지 말아야 함"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._half_open_in_flight = 0
+            if self.state == HALF_OPEN:
+                if self._half_open_in_flight >= self.half_open_calls:
+                    self.rejected += 1
+                    return False
+                self._half_open_in_flight += 1
+            return True
+
+    def record(self, failed: bool, duration: float):
+        """호출 결과를 기록하고 필요하면 상태를 바꿉니다."""
+        failed = failed or duration >= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._half_open_in_flight -= 1
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                return
+
+            self._outcomes.append((failed, duration))
+            failures = sum(1 for f, _ in self._outcomes if f)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def release(self):
+        """프로바이더를 호출하지 않고 끝난 호출: 결과는 기록하지 않고 half-open 시험 호출 자리만 돌려줍니다."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        print(f"⚠️ {self.name} 서킷 브레이커 열림 ({self.open_seconds:g}초 동안 호출 차단)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = sum(1 for f, _ in self._outcomes if f)
+            stats = {
+                "state": self.state,
+                "recent_calls": calls,
+                "failure_rate": round(failures / calls, 3) if calls else 0.0,
+                "avg_latency_seconds": round(sum(d for _, d in self._outcomes) / calls, 3) if calls else 0.0,
+                "rejected": self.rejected,
+            }
+            if self.state == OPEN:
+                stats["retry_in_seconds"] = round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+            return stats
+
+    def guard(self, unavailable: Callable[..., Any], is_failure: Callable[[Any], bool]):
+        """
+        함수를 브레이커로 감싸는 데코레이터.
+        회로가 열려 있으면 unavailable(*args)를 반환하고, 예외나 is_failure(결과)가 참이면 실패로 기록합니다.
+        HTTP 요청을 한 번도 보내지 않은 호출은 기록하지 않습니다.
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.allow():
+                    return unavailable(*args, **kwargs)
+                trips = [0, 0.0]
+                token = _round_trips.set(trips)
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception:
+                    if trips[0]:
+                        self.record(True, trips[1])
+                    else:
+                        self.release()
+                    raise
+                finally:
+                    _round_trips.reset(token)
+                if trips[0]:
+                    self.record(is_failure(result), trips[1])
+                else:
+                    self.release()
+                return result
+            return wrapper
+        return decorator
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """프로바이더 이름별 브레이커 (conf.json의 circuit_breaker로 설정, 프로바이더별 덮어쓰기 가능)"""
+    with _breakers_lock:
+        if name not in _breakers:
+            settings = conf.get("circuit_breaker", {})
+            _breakers[name] = CircuitBreaker(name, **{
+                **DEFAULT_SETTINGS,
+                **{k: v for k, v in settings.items() if k in DEFAULT_SETTINGS},
+                **settings.get(name, {}),
+            })
+        return _breakers[name]
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
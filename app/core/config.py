@@ -23,3 +23,12 @@ def get_config() -> Dict[str, Any]:
     return config
 
 conf = get_config()
+
+# 외부 API 기본 주소 (벤치마크 시 bench/fake_providers.py 같은 로컬 서버로 바꿀 수 있음)
+PROVIDER_BASE_URLS = {
+    "virustotal": "https://www.virustotal.com",
+    "hybrid": "https://www.hybrid-analysis.com",
+    "urlscan": "https://urlscan.io",
+    "wiki": "https://kitribob.wiki",
+    **conf.get("provider_base_urls", {}),
+}
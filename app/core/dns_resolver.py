@@ -0,0 +1,131 @@
+"""
+비동기 DNS 조회 (TTL 캐시 + 타임아웃)
+
+A/AAAA 레코드를 dnspython의 비동기 리졸버로 동시에 조회하고, 응답 TTL만큼 프로세스 안에 캐시합니다.
+존재하지 않는 이름(NXDOMAIN/응답 없음)은 dns_negative_ttl 동안 캐시합니다.
+동기 코드(프로바이더 스레드)에서는 전용 이벤트 루프 스레드에 조회를 맡기고 submit()/resolve_blocking()으로 결과를 받습니다.
+"""
+
+import asyncio
+import ipaddress
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+from app.core.config import conf
+
+
+class DNSResolver:
+    def __init__(self):
+        self.timeout = float(conf.get("dns_timeout", 3))  # 조회 전체 제한 시간(초)
+        self.negative_ttl = float(conf.get("dns_negative_ttl", 60))
+        self.max_ttl = float(conf.get("dns_max_ttl", 3600))
+        self._cache: Dict[str, Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self._resolver: Optional[dns.asyncresolver.Resolver] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_cached(self, name: str) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is None:
+                return None
+            expires_at, addresses = entry
+            if expires_at < time.monotonic():
+                del self._cache[name]
+                return None
+            return addresses
+
+    def _store(self, name: str, addresses: List[str], ttl: float):
+        with self._lock:
+            self._cache[name] = (time.monotonic() + min(ttl, self.max_ttl), addresses)
+
+    async def _query(self, name: str, rdtype: str) -> Tuple[List[str], Optional[float]]:
+        """(주소 목록, 캐시할 TTL). 일시적인 오류는 TTL None으로 캐시하지 않음"""
+        try:
+            answer = await self._resolver.resolve(name, rdtype, lifetime=self.timeout)
+            return [record.to_text() for record in answer], float(answer.rrset.ttl)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return [], self.negative_ttl
+        except dns.exception.DNSException:
+            return [], None
+
+    async def resolve(self, name: str) -> List[str]:
+        """도메인의 A/AAAA 주소 목록 (IPv4 먼저). 조회 실패 시 빈 목록"""
+        name = name.strip().rstrip(".").lower()
+        cached = self._get_cached(name)
+        if cached is not None:
+            return cached
+
+        if self._resolver is None:
+            self._resolver = dns.asyncresolver.Resolver()
+        try:
+            answers = await asyncio.wait_for(
+                asyncio.gather(self._query(name, "A"), self._query(name, "AAAA")),
+                timeout=self.timeout,
+            )
+        except asyncio.TimeoutError:
+            return []
+
+        addresses = [address for records, _ in answers for address in records]
+        ttls = [ttl for records, ttl in answers if records and ttl is not None]
+        if addresses:
+            self._store(name, addresses, min(ttls))
+        elif all(ttl is not None for _, ttl in answers):
+            self._store(name, [], self.negative_ttl)
+        return addresses
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="dns-resolver", daemon=True).start()
+            return self._loop
+
+    def submit(self, name: str) -> Future:
+        """조회를 전용 루프에 맡기고 Future를 반환 (다른 I/O와 동시에 진행할 때 사용)"""
+        cached = self._get_cached(name.strip().rstrip(".").lower())
+        if cached is not None:
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+        return asyncio.run_coroutine_threadsafe(self.resolve(name), self._get_loop())
+
+    def wait(self, future: Future) -> List[str]:
+        """submit()의 결과. 제한 시간을 넘기면 빈 목록"""
+        try:
+            return future.result(timeout=self.timeout + 1)
+        except Exception:
+            return []
+
+    def resolve_blocking(self, name: str) -> List[str]:
+        """동기 코드용 조회. 이벤트 루프 스레드에서는 호출하지 말 것"""
+        return self.wait(self.submit(name))
+
+
+def is_ip_address(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def format_dns_records(addresses: List[str], limit: int = 255) -> Optional[str]:
+    """CTI.dns 컬럼(최대 255자)에 들어갈 만큼 쉼표로 이어 붙인 주소 목록"""
+    value = ""
+    for address in addresses:
+        candidate = f"{value},{address}" if value else address
+        if len(candidate) > limit:
+            break
+        value = candidate
+    return value or None
+
+
+# 글로벌 인스턴스
+dns_resolver = DNSResolver()
@@ -0,0 +1,159 @@
+"""
+외부 API(VirusTotal, Hybrid Analysis, urlscan, BOB 위키) 호출용 공용 HTTP 클라이언트
+
+호스트별 keep-alive 커넥션 풀을 재사용해 요청마다 TCP/TLS 핸드셰이크를 하지 않도록 하고,
+타임아웃 기본값, 지터가 들어간 지수 백오프 재시도, 프로바이더 호출 한도 적용을 한곳에서 처리합니다.
+requests는 HTTP/2를 지원하지 않으므로 HTTP/1.1 keep-alive를 사용합니다.
+"""
+
+import random
+import time
+from typing import Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.circuit_breaker import record_round_trip
+from app.core.config import conf
+from app.core.rate_limit import provider_scheduler, request_deadline
+
+# 재시도할 응답 코드 (멱등 요청만)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class RateLimitExceeded(Exception):
+    """프로바이더 호출 토큰을 대기 시간 안에 얻지 못함"""
+
+    def __init__(self, provider: str):
+        super().__init__(f"{provider} rate limit: no quota available")
+        self.provider = provider
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """request_deadline이 지나 요청을 보내지 않음 (RequestException으로 처리됨)"""
+
+    def __init__(self, url: str):
+        super().__init__(f"deadline exceeded before request to {url}")
+
+
+class HTTPClient:
+    def __init__(self):
+        timeouts = conf.get("http_timeouts", {})
+        self.timeout: Tuple[float, float] = (
+            float(timeouts.get("connect", 5)),
+            float(timeouts.get("read", 15)),
+        )
+        self.max_retries = int(conf.get("http_max_retries", 2))
+        self.backoff_base = float(conf.get("http_backoff_base", 0.5))
+        self.backoff_max = float(conf.get("http_backoff_max", 8))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=int(conf.get("http_pool_hosts", 10)),  # 커넥션 풀을 유지할 호스트 수
+            pool_maxsize=int(conf.get("http_pool_maxsize", 32)),  # 호스트당 최대 커넥션 수
+            max_retries=0,  # 재시도는 아래 request()에서 직접 처리
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Retry-After가 있으면 따르고, 없으면 full jitter 지수 백오프"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _attempt_timeout(url: str, timeout: Timeout, deadline: Optional[float]) -> Timeout:
+        """마감 시각까지 남은 시간으로 줄인 이번 시도의 타임아웃. 이미 지났으면 DeadlineExceeded"""
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(url)
+        if isinstance(timeout, tuple):
+            return (min(timeout[0], remaining), min(timeout[1], remaining))
+        return min(timeout, remaining)
+
+    @staticmethod
+    def _has_time(delay: float, deadline: Optional[float]) -> bool:
+        """delay초 기다린 뒤에도 마감 시각 전인지 (마감이 없으면 항상 True)"""
+        return deadline is None or time.monotonic() + delay < deadline
+
+    def _send(self, method: str, url: str, timeout: Timeout, **kwargs) -> requests.Response:
+        """요청 한 번 (왕복 시간을 서킷 브레이커에 보고, 실패한 요청 포함)"""
+        started = time.monotonic()
+        try:
+            return self.session.request(method, url, timeout=timeout, **kwargs)
+        finally:
+            record_round_trip(time.monotonic() - started)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        provider: Optional[str] = None,
+        priority: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        retries: Optional[int] = None,
+        idempotent: Optional[bool] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        공용 세션으로 요청을 보냅니다.
+        provider를 지정하면 시도마다 호출 토큰을 받고, 못 받으면 RateLimitExceeded를 발생시킵니다.
+        멱등 요청은 연결 오류/타임아웃/RETRY_STATUSES에서 재시도하고,
+        POST처럼 멱등이 아닌 요청은 연결 자체가 안 된 경우에만 재시도합니다.
+        request_deadline이 설정되어 있으면 시도마다 타임아웃을 남은 시간으로 줄이고,
+        재시도 대기가 마감을 넘기면 재시도하지 않습니다 (호출한 쪽이 포기한 뒤 스레드를 붙잡지 않도록).
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        retries = self.max_retries if retries is None else retries
+        timeout = self.timeout if timeout is None else timeout
+        deadline = request_deadline.get()
+
+        for attempt in range(retries + 1):
+            if provider and not provider_scheduler.acquire(provider, priority=priority):
+                raise RateLimitExceeded(provider)
+
+            last = attempt == retries
+            attempt_timeout = self._attempt_timeout(url, timeout, deadline)
+            try:
+                response = self._send(method, url, attempt_timeout, **kwargs)
+            except requests.exceptions.ConnectTimeout:
+                delay = self._backoff(attempt)
+                if last or not self._has_time(delay, deadline):
+                    raise
+                time.sleep(delay)
+                continue
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                delay = self._backoff(attempt)
+                if last or not idempotent or not self._has_time(delay, deadline):
+                    raise
+                time.sleep(delay)
+                continue
+
+            if idempotent and not last and response.status_code in RETRY_STATUSES:
+                delay = self._backoff(attempt, response)
+                if self._has_time(delay, deadline):
+                    response.close()
+                    time.sleep(delay)
+                    continue
+            return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+# 글로벌 인스턴스
+http_client = HTTPClient()
@@ -0,0 +1,56 @@
+import asyncio
+
+from app.core.config import conf
+from app.database import db
+from app.crud.cti import claim_pending_hybrid_scans, fetch_hybrid_quick_scan, apply_hybrid_quick_scans
+
+
+class HybridScanPoller:
+    """CTITable에 저장된 Hybrid Analysis quick scan 작업의 결과를 백그라운드에서 수집"""
+
+    def __init__(self):
+        self.interval = float(conf.get("hybrid_poll_interval", 60))  # 폴링 주기(초)
+        self.batch_size = int(conf.get("hybrid_poll_batch_size", 10))  # 한 번에 조회할 작업 수
+        self._stop_event = None
+
+    def poll_once(self) -> int:
+        """조회할 시간이 된 작업들을 한 번 폴링하고, 결과가 나온 작업 수를 반환합니다."""
+        session = db.Session()
+        try:
+            # 다른 워커의 폴러와 같은 작업을 조회하지 않도록 선점한 행만 조회
+            # (선점 후 커밋하므로 외부 API를 조회하는 동안 커넥션을 붙잡지 않음)
+            claimed = claim_pending_hybrid_scans(session, limit=self.batch_size)
+            scans = {row_id: fetch_hybrid_quick_scan(job_id) for row_id, job_id in claimed}
+            # 배치 단위로 한 번에 읽고 커밋
+            return apply_hybrid_quick_scans(session, scans)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            db.Session.remove()
+
+    async def start(self):
+        """폴링 루프 시작"""
+        print("🚀 Hybrid Analysis 결과 폴러 시작")
+        self._stop_event = asyncio.Event()
+        while not self._stop_event.is_set():
+            try:
+                completed = await asyncio.to_thread(self.poll_once)
+                if completed:
+                    print(f"✅ Hybrid Analysis quick scan 결과 {completed}건 반영")
+            except Exception as e:
+                print(f"❌ Hybrid Analysis 폴링 실패: {e}")
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self):
+        """폴링 루프 중지"""
+        if self._stop_event:
+            self._stop_event.set()
+        print("🛑 Hybrid Analysis 결과 폴러 중지")
+
+
+# 글로벌 인스턴스
+hybrid_poller = HybridScanPoller()
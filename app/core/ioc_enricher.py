@@ -0,0 +1,161 @@
+"""
+접근 로그 IP의 IoC 분석을 요청 경로 밖에서 처리하는 백그라운드 큐
+
+GET /users/{user_id}는 접근 로그만 남기고 IP를 이 큐에 넣은 뒤 바로 응답합니다.
+워커 스레드가 아직 분석하지 않은 IP만 VirusTotal로 분석해 IoCTable 행을 저장하고,
+접근 로그가 DB에 기록되면 그 행에 access_log_id를 연결합니다.
+
+- 같은 IP가 큐에 있거나 최근(ioc_enrich_seen_ttl초 안에) 처리했으면 다시 넣지 않습니다.
+- 큐가 가득 차면 요청을 막지 않고 버립니다 (다음 접근 때 다시 시도).
+- 사설/루프백 등 공인 IP가 아닌 주소는 분석하지 않습니다 (ioc_enrich_private로 변경).
+- 분석은 API/Slack과 같은 singleflight 키(("ioc", ip))로 하므로 같은 IP의 결과가 중복 저장되지 않습니다.
+- VirusTotal API 키가 없으면 분석하지 않고 건너뜁니다.
+"""
+
+import functools
+import ipaddress
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.core.config import conf
+from app.core.rate_limit import request_priority, PRIORITY_BATCH
+
+ENRICH_WORKERS = int(conf.get("ioc_enrich_workers", 2))
+ENRICH_QUEUE_SIZE = int(conf.get("ioc_enrich_queue_size", 1000))
+ENRICH_SEEN_TTL = float(conf.get("ioc_enrich_seen_ttl", 3600))
+ENRICH_SEEN_MAX = int(conf.get("ioc_enrich_seen_max", 10000))
+ENRICH_PRIVATE = bool(conf.get("ioc_enrich_private", False))
+
+
+def _enrichable(ip: Optional[str]) -> bool:
+    try:
+        address = ipaddress.ip_address(ip or "")
+    except ValueError:
+        return False
+    return ENRICH_PRIVATE or address.is_global
+
+
+class IoCEnricher:
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=ENRICH_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._pending: set = set()  # 큐에 있거나 처리 중인 IP
+        self._seen: "OrderedDict[str, float]" = OrderedDict()  # 최근 처리한 IP -> 처리 시각
+        self._workers: List[threading.Thread] = []
+
+        self.enriched = 0
+        self.skipped = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def submit(self, ip: Optional[str], access_log_id: str) -> bool:
+        """IP를 분석 큐에 넣습니다. 이미 대기 중이거나 최근 처리했거나 큐가 가득 차면 False"""
+        if not _enrichable(ip):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if ip in self._pending:
+                return False
+            seen_at = self._seen.get(ip)
+            if seen_at is not None and now - seen_at < ENRICH_SEEN_TTL:
+                return False
+            try:
+                self._queue.put_nowait((ip, access_log_id))
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self._pending.add(ip)
+        self._ensure_workers()
+        return True
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(ENRICH_WORKERS):
+                worker = threading.Thread(target=self._run, name=f"ioc-enricher-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _run(self):
+        # 외부 API 호출은 사용자 요청/배치 작업보다 나중에 토큰을 받음
+        request_priority.set(PRIORITY_BATCH)
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._enrich(*item)
+            finally:
+                self._queue.task_done()
+
+    def _enrich(self, ip: str, access_log_id: str):
+        # ioc crud가 무거운 의존성을 가져오므로 워커에서 import
+        from fastapi import HTTPException
+
+        from app.crud import ioc as ioc_crud
+        from app.core.access_log_writer import access_log_writer
+        from app.database import db
+
+        session = db.Session()
+        try:
+            if not ioc_crud.VT_API_KEY or ioc_crud.get_ioc_report(session, value=ip) is not None:
+                self.skipped += 1
+            else:
+                report = ioc_crud.analyze_and_store_ip(session, ip)
+                # 접근 로그가 아직 쓰기 버퍼에 있을 수 있으므로 기록된 뒤 연결 (외래 키)
+                access_log_writer.after_persisted(
+                    access_log_id,
+                    functools.partial(
+                        ioc_crud.link_access_log,
+                        ioc_id=report.id, access_log_id=access_log_id,
+                        source=report.source, value=report.indicator_value,
+                    ),
+                )
+                self.enriched += 1
+        except HTTPException as e:
+            self.failed += 1
+            print(f"❌ 접근 IP {ip} IoC 분석 실패: {e.status_code} {e.detail}")
+        except Exception as e:
+            self.failed += 1
+            print(f"❌ 접근 IP {ip} IoC 분석 실패: {e}")
+        finally:
+            db.Session.remove()
+            with self._lock:
+                self._pending.discard(ip)
+                self._seen[ip] = time.monotonic()
+                self._seen.move_to_end(ip)
+                while len(self._seen) > ENRICH_SEEN_MAX:
+                    self._seen.popitem(last=False)
+
+    def stop(self, timeout: float = 10.0):
+        """남은 작업을 timeout초까지 처리하고 워커를 종료합니다."""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                break
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        if workers:
+            print("🛑 IoC 분석 큐 중지")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "pending": len(self._pending),
+            "enriched": self.enriched,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+# 글로벌 인스턴스
+ioc_enricher = IoCEnricher()
@@ -0,0 +1,81 @@
+"""
+응답/DB JSON 컬럼 공용 JSON 인코더
+
+orjson이 설치돼 있으면 사용하고, 없으면 표준 json으로 동작합니다 (결과는 같은 JSON).
+datetime은 ISO 8601 문자열로, set/tuple은 배열로 직렬화합니다.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Optional, Set, Type
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson  # C 구현 인코더 (없으면 표준 json 사용)
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def dumps_str(obj: Any) -> str:
+    """SQLAlchemy json_serializer용 (문자열 반환)"""
+    return dumps(obj).decode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(Response):
+    """dumps()로 직렬화하는 JSON 응답"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def select_fields(model: Type[BaseModel], fields: Optional[str], include_raw: bool = True,
+                  raw_field: str = "raw_data") -> Optional[Set[str]]:
+    """
+    fields("id,search_item,malicious_score")와 include_raw로 응답에 넣을 필드 집합을 만듭니다.
+    둘 다 기본값이면 None(전체 필드). 모델에 없는 필드가 있으면 ValueError
+    """
+    if fields:
+        selected = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = selected - set(model.model_fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    elif include_raw:
+        return None
+    else:
+        selected = set(model.model_fields)
+    if not include_raw:
+        selected.discard(raw_field)
+    return selected
+
+
+def dump_models(items: Iterable[BaseModel], include: Optional[Set[str]]) -> list:
+    """스키마 객체들을 선택한 필드만 담은 dict 목록으로 변환 (datetime은 인코더가 처리)"""
+    return [item.model_dump(include=include) for item in items]
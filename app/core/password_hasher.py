@@ -0,0 +1,136 @@
+"""
+비밀번호 해시(PBKDF2-SHA256)를 요청 스레드 밖의 프로세스 풀에서 계산
+
+- 반복 횟수(password_hash_iterations)는 해시 값에 함께 저장하므로 설정을 바꿔도 기존 해시를 검증할 수 있습니다.
+  (형식: pbkdf2_sha256$<반복 횟수>$<base64 해시>, 이전 형식인 base64 해시만 있는 값은 100,000회)
+- 동시에 처리 중인 해시 작업이 password_hash_max_pending개를 넘으면 기다리지 않고 HasherBusy를 발생시켜
+  해시 부하가 FastAPI 스레드 풀과 I/O 위주 요청을 잡아먹지 않도록 합니다.
+- async 경로(hash_async/verify_async)는 결과를 기다리는 동안 스레드를 점유하지 않습니다.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from app.core.config import conf
+
+ALGORITHM = "pbkdf2_sha256"
+LEGACY_ITERATIONS = 100000  # 반복 횟수 표기가 없는 기존 해시
+
+HASH_ITERATIONS = int(conf.get("password_hash_iterations", 100000))
+HASH_WORKERS = int(conf.get("password_hash_workers", min(4, os.cpu_count() or 1)))
+HASH_MAX_PENDING = int(conf.get("password_hash_max_pending", HASH_WORKERS * 4))
+
+
+class HasherBusy(RuntimeError):
+    """처리 중인 해시 작업이 너무 많아 새 작업을 받지 않음"""
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    # 프로세스 풀에서 실행되므로 모듈 최상위 함수여야 함
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+
+def encode_hash(iterations: int, digest: bytes) -> str:
+    return f"{ALGORITHM}${iterations}${base64.b64encode(digest).decode()}"
+
+
+def parse_hash(encoded: str) -> Tuple[int, bytes]:
+    """저장된 해시에서 (반복 횟수, 해시 바이트)"""
+    if encoded.startswith(ALGORITHM + "$"):
+        _, iterations, digest = encoded.split("$", 2)
+        return int(iterations), base64.b64decode(digest)
+    return LEGACY_ITERATIONS, base64.b64decode(encoded)
+
+
+def needs_rehash(encoded: str) -> bool:
+    """현재 설정과 다른 반복 횟수로 만든 해시면 True (로그인 성공 시 다시 해시)"""
+    return parse_hash(encoded)[0] != HASH_ITERATIONS
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self.completed = 0
+        self.rejected = 0
+
+    def _submit(self, password: str, salt: bytes, iterations: int) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusy("Too many password hashing requests in progress")
+            if self._executor is None:
+                # 처음 사용할 때 워커 프로세스를 띄움 (스레드가 많은 서버 프로세스를 fork하지 않도록 spawn)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                )
+            self._pending += 1
+        try:
+            future = self._executor.submit(_pbkdf2, password, salt, iterations)
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: Optional[Future]):
+        with self._lock:
+            self._pending -= 1
+            if future is not None:
+                self.completed += 1
+
+    # ----- 해시 생성 -----
+
+    def hash(self, password: str) -> Tuple[str, str]:
+        """(base64 salt, 인코딩한 해시)"""
+        salt = os.urandom(16)
+        digest = self._submit(password, salt, HASH_ITERATIONS).result()
+        return base64.b64encode(salt).decode(), encode_hash(HASH_ITERATIONS, digest)
+
+    async def hash_async(self, password: str) -> Tuple[str, str]:
+        salt = os.urandom(16)
+        digest = await asyncio.wrap_future(self._submit(password, salt, HASH_ITERATIONS))
+        return base64.b64encode(salt).decode(), encode_hash(HASH_ITERATIONS, digest)
+
+    # ----- 검증 -----
+
+    def verify(self, password: str, salt_b64: str, encoded: str) -> bool:
+        iterations, expected = parse_hash(encoded)
+        digest = self._submit(password, base64.b64decode(salt_b64), iterations).result()
+        return hmac.compare_digest(digest, expected)
+
+    async def verify_async(self, password: str, salt_b64: str, encoded: str) -> bool:
+        iterations, expected = parse_hash(encoded)
+        digest = await asyncio.wrap_future(self._submit(password, base64.b64decode(salt_b64), iterations))
+        return hmac.compare_digest(digest, expected)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "iterations": HASH_ITERATIONS,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# 글로벌 인스턴스
+password_hasher = PasswordHasher()
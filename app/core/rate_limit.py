@@ -0,0 +1,196 @@
+"""
+외부 프로바이더(VirusTotal, Hybrid Analysis, urlscan) 호출 빈도 제한
+
+프로바이더마다 분당/일일 토큰 버킷을 두고, 토큰이 없으면 요청을 실패시키지 않고 대기열에 넣습니다.
+대기열은 우선순위 순서로 처리되어 Slack 조회가 배치 작업보다 먼저 토큰을 받습니다.
+한도는 워커 프로세스마다 따로 계산됩니다.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from app.core.config import conf
+
+# 숫자가 작을수록 먼저 처리
+PRIORITY_INTERACTIVE = 0  # Slack 명령어
+PRIORITY_DEFAULT = 1  # 일반 API 요청
+PRIORITY_BATCH = 2  # 배치/백그라운드 작업
+PRIORITY_BACKGROUND = 3  # 만료 전 미리 갱신 (남는 한도에서만 실행)
+
+# 현재 요청의 우선순위. 호출 경로에서 설정하면 하위 프로바이더 호출에 그대로 적용됨
+request_priority: ContextVar[int] = ContextVar("request_priority", default=PRIORITY_DEFAULT)
+
+# 현재 호출의 마감 시각(time.monotonic 기준). 설정하면 토큰을 이 시각까지만 기다림
+# (호출한 쪽이 이미 포기한 뒤에 토큰을 받아 호출 한도를 쓰지 않도록)
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# 무료 API 기준 기본 한도 (conf.json의 rate_limits로 덮어쓰기)
+DEFAULT_RATE_LIMITS: Dict[str, Dict[str, int]] = {
+    "virustotal": {"per_minute": 4, "per_day": 500},
+    "hybrid": {"per_minute": 5, "per_day": 200},
+    "urlscan": {"per_minute": 60, "per_day": 1000},
+}
+
+# 토큰을 기다릴 최대 시간(초). 넘기면 429로 처리
+MAX_WAIT = float(conf.get("rate_limit_max_wait", 30))
+
+
+class TokenBucket:
+    """period초 동안 capacity개 토큰이 고르게 채워지는 버킷"""
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """토큰 하나를 쓸 수 있을 때까지 남은 시간(초)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class ProviderLimiter:
+    """한 프로바이더의 토큰 버킷들과 우선순위 대기열"""
+
+    def __init__(self, name: str, per_minute: Optional[int] = None, per_day: Optional[int] = None):
+        self.name = name
+        self._buckets = {}
+        if per_minute:
+            self._buckets["per_minute"] = TokenBucket(per_minute, 60)
+        if per_day:
+            self._buckets["per_day"] = TokenBucket(per_day, 86400)
+
+        self._cond = threading.Condition()
+        self._waiters: list = []  # (priority, seq) 최소 힙
+        self._seq = itertools.count()
+
+        self.granted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _delay(self, now: float) -> float:
+        return max((bucket.delay(now) for bucket in self._buckets.values()), default=0.0)
+
+    def acquire(self, priority: int, timeout: Optional[float] = None) -> bool:
+        """토큰을 얻을 때까지 대기합니다. timeout 안에 못 얻으면 False"""
+        entry = (priority, next(self._seq))
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        granted = False
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    # 대기열 맨 앞만 토큰을 가져갈 수 있음
+                    if self._waiters[0] == entry:
+                        delay = self._delay(now)
+                        if delay <= 0:
+                            for bucket in self._buckets.values():
+                                bucket.take()
+                            granted = True
+                            return True
+                    else:
+                        delay = None
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            return False
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self._cond.wait(delay)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                waited = time.monotonic() - started
+                if granted:
+                    self.granted += 1
+                    self.total_wait += waited
+                    self.max_wait = max(self.max_wait, waited)
+                else:
+                    self.rejected += 1
+                self._cond.notify_all()
+
+    def spare_tokens(self, reserve: float = 0.0) -> Optional[int]:
+        """
+        대기 중인 요청이 없을 때, 버킷마다 용량의 reserve 비율을 남기고 지금 바로 쓸 수 있는 토큰 수.
+        한도가 없는 프로바이더는 None
+        """
+        with self._cond:
+            if not self._buckets:
+                return None
+            if self._waiters:
+                return 0
+            now = time.monotonic()
+            for bucket in self._buckets.values():
+                bucket._refill(now)
+            spare = min(bucket.tokens - bucket.capacity * reserve for bucket in self._buckets.values())
+            return max(0, int(spare))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            for bucket in self._buckets.values():
+                bucket._refill(now)
+            return {
+                "queue_depth": len(self._waiters),
+                "granted": self.granted,
+                "rejected": self.rejected,
+                "avg_wait_seconds": round(self.total_wait / self.granted, 3) if self.granted else 0.0,
+                "max_wait_seconds": round(self.max_wait, 3),
+                "tokens": {name: int(bucket.tokens) for name, bucket in self._buckets.items()},
+            }
+
+
+class ProviderScheduler:
+    """프로바이더 이름으로 ProviderLimiter를 찾아 토큰을 나눠주는 공용 스케줄러"""
+
+    def __init__(self, limits: Dict[str, Dict[str, int]]):
+        self._limiters = {
+            name: ProviderLimiter(name, **cfg)
+            for name, cfg in limits.items()
+        }
+
+    def acquire(self, provider: str, priority: Optional[int] = None, timeout: Optional[float] = MAX_WAIT) -> bool:
+        """토큰을 timeout초, request_deadline이 있으면 그 시각까지만 기다립니다."""
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            return True
+        if priority is None:
+            priority = request_priority.get()
+        deadline = request_deadline.get()
+        if deadline is not None:
+            remaining = max(0.0, deadline - time.monotonic())
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return limiter.acquire(priority, timeout)
+
+    def spare_tokens(self, provider: str, reserve: float = 0.0) -> Optional[int]:
+        """남는 호출 한도 (ProviderLimiter.spare_tokens). 한도가 없는 프로바이더는 None"""
+        limiter = self._limiters.get(provider)
+        return None if limiter is None else limiter.spare_tokens(reserve)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
+
+
+# 글로벌 인스턴스
+provider_scheduler = ProviderScheduler({
+    **DEFAULT_RATE_LIMITS,
+    **conf.get("rate_limits", {}),
+})
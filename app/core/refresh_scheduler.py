@@ -0,0 +1,237 @@
+"""
+자주 조회하는 지표를 캐시가 만료되기 전에 미리 다시 분석하는 백그라운드 스케줄러
+
+CTI 도메인 조회와 IP 분석 결과를 지표별로 기록해 두고(조회 빈도는 반감기로 감쇠), 주기마다
+프로바이더별 결과가 유효 시간의 refresh_ahead_ratio 이상 지난 지표를 우선순위 큐에 넣습니다.
+우선순위는 경과 비율(staleness) x 조회 빈도 x 과거 위험도 순으로 커집니다.
+
+갱신은 대기 중인 요청이 없고 호출 한도가 남아 있는 프로바이더만, 가장 낮은 우선순위(PRIORITY_BACKGROUND)로
+호출하므로 사용자 요청이나 배치 작업의 한도를 빼앗지 않습니다.
+추적 목록은 워커 프로세스마다 따로 관리되며 재시작하면 비어 있는 상태로 다시 쌓입니다.
+"""
+
+import asyncio
+import heapq
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import conf
+from app.core.rate_limit import provider_scheduler, request_priority, PRIORITY_BACKGROUND
+
+CTI = "cti"
+IP = "ip"
+
+REFRESH_ENABLED = bool(conf.get("refresh_scheduler_enabled", True))
+# IP 분석 결과(IoCTable)는 조회 시 캐시 만료가 없으므로 이 시간이 지나면 오래된 결과로 보고 갱신
+IOC_REFRESH_MAX_AGE = float(conf.get("ioc_refresh_max_age", 86400))
+
+
+class _Tracked:
+    __slots__ = ("kind", "indicator", "hits", "hit_at", "analyzed", "risk", "attempted_at")
+
+    def __init__(self, kind: str, indicator: str):
+        self.kind = kind
+        self.indicator = indicator
+        self.hits = 0.0  # 감쇠한 조회 횟수
+        self.hit_at = 0.0
+        self.analyzed: Dict[str, float] = {}  # 프로바이더별 마지막 분석 시각 (epoch 초)
+        self.risk = 0.0  # 과거 결과 중 가장 높은 위험도 (0-100)
+        self.attempted_at = 0.0  # 마지막 갱신 시도 시각
+
+
+class RefreshScheduler:
+    def __init__(self):
+        self.interval = float(conf.get("refresh_interval", 30))  # 큐를 확인하는 주기(초)
+        self.batch_size = int(conf.get("refresh_batch_size", 5))  # 한 번에 갱신할 최대 지표 수
+        self.ahead_ratio = float(conf.get("refresh_ahead_ratio", 0.8))  # 유효 시간의 이 비율이 지나면 갱신 대상
+        self.min_hits = float(conf.get("refresh_min_hits", 1.5))  # 감쇠한 조회 횟수가 이보다 작으면 갱신하지 않음
+        self.hit_half_life = float(conf.get("refresh_hit_half_life", 86400))  # 조회 빈도 반감기(초)
+        self.risk_weight = float(conf.get("refresh_risk_weight", 1.0))  # 위험도 100인 지표의 우선순위 가중
+        self.retry_delay = float(conf.get("refresh_retry_delay", 600))  # 갱신 실패 후 다시 시도할 때까지(초)
+        self.quota_reserve = float(conf.get("refresh_quota_reserve", 0.2))  # 항상 남겨 둘 호출 한도 비율
+        self.max_tracked = int(conf.get("refresh_max_tracked", 10000))
+
+        self._lock = threading.Lock()
+        self._tracked: Dict[Tuple[str, str], _Tracked] = {}
+        self._stop_event = None
+
+        self.refreshed = 0
+        self.failed = 0
+        self.last_run: Optional[float] = None
+
+    # ----- 조회 기록 -----
+
+    def record_cti(self, domain: str, results: Iterable[Any], lookup: bool = True):
+        """upsert_cti_results 결과를 기록합니다. 저장되지 않은 결과(마감 초과 등)는 분석 시각에 반영하지 않음"""
+        analyzed = {
+            result.tag: result.last_analyzed.timestamp()
+            for result in results
+            if result.id is not None and result.last_analyzed is not None
+        }
+        risk = max((result.risk_score or 0 for result in results), default=0)
+        self._record(CTI, domain, analyzed, risk, lookup)
+
+    def record_ip(self, ip: str, last_analyzed: Any, malicious_count: Optional[int], lookup: bool = True):
+        analyzed = {"virustotal": last_analyzed.timestamp()} if last_analyzed is not None else {}
+        self._record(IP, ip, analyzed, 100.0 if (malicious_count or 0) > 0 else 0.0, lookup)
+
+    def _record(self, kind: str, indicator: str, analyzed: Dict[str, float], risk: float, lookup: bool):
+        if not REFRESH_ENABLED:
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._tracked.get((kind, indicator))
+            if entry is None:
+                if not lookup:
+                    return
+                entry = self._tracked[(kind, indicator)] = _Tracked(kind, indicator)
+                if len(self._tracked) > self.max_tracked:
+                    self._evict(now)
+            if lookup:
+                entry.hits = self._decayed_hits(entry, now) + 1
+                entry.hit_at = now
+            for source, timestamp in analyzed.items():
+                entry.analyzed[source] = max(timestamp, entry.analyzed.get(source, 0.0))
+            entry.risk = max(entry.risk, float(risk))
+
+    def _decayed_hits(self, entry: _Tracked, now: float) -> float:
+        return entry.hits * 0.5 ** ((now - entry.hit_at) / self.hit_half_life)
+
+    def _evict(self, now: float):
+        """추적 수가 한도를 넘으면 조회 빈도가 가장 낮은 10%를 제거 (락을 잡은 상태에서 호출)"""
+        count = max(1, len(self._tracked) - self.max_tracked + self.max_tracked // 10)
+        coldest = heapq.nsmallest(count, self._tracked.items(), key=lambda item: self._decayed_hits(item[1], now))
+        for key, _ in coldest:
+            del self._tracked[key]
+
+    # ----- 우선순위 큐 -----
+
+    def _due(self, max_ages: Dict[str, Dict[str, float]], now: float) -> List[Tuple[float, int, _Tracked, List[str]]]:
+        """갱신 대상 (-우선순위, 순번, 지표, 만료가 가까운 프로바이더) 최소 힙"""
+        heap = []
+        with self._lock:
+            entries = list(self._tracked.values())
+        for seq, entry in enumerate(entries):
+            if now - entry.attempted_at < self.retry_delay:
+                continue
+            hits = self._decayed_hits(entry, now)
+            if hits < self.min_hits:
+                continue
+            staleness: Dict[str, float] = {}
+            for source, max_age in max_ages[entry.kind].items():
+                if max_age <= 0:
+                    continue
+                age = now - entry.analyzed.get(source, 0.0)
+                if age >= max_age * self.ahead_ratio:
+                    staleness[source] = min(age / max_age, 2.0)
+            if not staleness:
+                continue
+            priority = (
+                max(staleness.values())
+                * math.log2(1 + hits)
+                * (1 + self.risk_weight * entry.risk / 100)
+            )
+            heap.append((-priority, seq, entry, sorted(staleness)))
+        heapq.heapify(heap)
+        return heap
+
+    def refresh_once(self) -> int:
+        """남는 호출 한도 안에서 우선순위가 높은 지표부터 갱신하고, 갱신한 지표 수를 반환합니다."""
+        # crud 모듈이 조회 기록을 위해 이 모듈을 import하므로 실행 시점에 가져옴
+        from app.crud import cti as cti_crud
+        from app.crud import ioc as ioc_crud
+
+        now = time.time()
+        self.last_run = now
+        max_ages = {
+            CTI: dict(cti_crud.CTI_CACHE_MAX_AGE),
+            IP: {"virustotal": IOC_REFRESH_MAX_AGE},
+        }
+        heap = self._due(max_ages, now)
+        if not heap:
+            return 0
+
+        # 이번 주기에 프로바이더별로 쓸 수 있는 호출 수 (대기 중인 요청이 있으면 0)
+        budget: Dict[str, float] = {}
+        for sources in max_ages.values():
+            for source in sources:
+                spare = provider_scheduler.spare_tokens(source, self.quota_reserve)
+                budget[source] = math.inf if spare is None else spare
+
+        refreshed = 0
+        while heap and refreshed < self.batch_size:
+            _, _, entry, sources = heapq.heappop(heap)
+            sources = [source for source in sources if budget[source] >= 1]
+            if not sources:
+                continue
+            for source in sources:
+                budget[source] -= 1
+            entry.attempted_at = now
+            if self._refresh(entry, sources, cti_crud, ioc_crud):
+                refreshed += 1
+                self.refreshed += 1
+            else:
+                self.failed += 1
+        return refreshed
+
+    def _refresh(self, entry: _Tracked, sources: List[str], cti_crud, ioc_crud) -> bool:
+        from app.database import db
+
+        session = db.Session()
+        priority_token = request_priority.set(PRIORITY_BACKGROUND)
+        try:
+            if entry.kind == CTI:
+                results = cti_crud.upsert_cti_results(session, entry.indicator, refresh_sources=sources, track=False)
+                return any(result.id is not None and result.tag in sources for result in results)
+            row = ioc_crud.refresh_ioc_report(session, entry.indicator)
+            if row is None:
+                return False
+            self.record_ip(entry.indicator, row.last_analyzed, row.malicious_count, lookup=False)
+            return True
+        except Exception as e:
+            print(f"❌ {entry.indicator} 미리 갱신 실패: {e}")
+            return False
+        finally:
+            request_priority.reset(priority_token)
+            db.Session.remove()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tracked = len(self._tracked)
+        return {
+            "enabled": REFRESH_ENABLED,
+            "tracked": tracked,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "last_run": self.last_run,
+        }
+
+    # ----- 실행 루프 -----
+
+    async def start(self):
+        """갱신 루프 시작"""
+        print("🚀 지표 미리 갱신 스케줄러 시작")
+        self._stop_event = asyncio.Event()
+        while not self._stop_event.is_set():
+            try:
+                refreshed = await asyncio.to_thread(self.refresh_once)
+                if refreshed:
+                    print(f"🔄 지표 {refreshed}건 미리 갱신")
+            except Exception as e:
+                print(f"❌ 지표 미리 갱신 실패: {e}")
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self):
+        """갱신 루프 중지"""
+        if self._stop_event:
+            self._stop_event.set()
+        print("🛑 지표 미리 갱신 스케줄러 중지")
+
+
+# 글로벌 인스턴스
+refresh_scheduler = RefreshScheduler()
@@ -0,0 +1,74 @@
+"""
+같은 지표(도메인/IP)에 대한 동시 조회 합치기
+
+동시에 들어온 같은 키의 호출 중 첫 번째만 실제로 실행하고, 나머지는 그 결과를 기다렸다가 함께 받습니다.
+HTTP API와 Slack 소켓 클라이언트가 같은 프로세스에서 indicator_flight를 공유합니다.
+반환값은 여러 호출자가 공유하므로 수정하지 말아야 합니다.
+"""
+
+import functools
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """key로 진행 중인 호출이 있으면 그 결과를, 없으면 fn을 실행한 결과를 반환합니다."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def normalize_indicator(value: str) -> str:
+    """대소문자, 앞뒤 공백, 끝의 점(FQDN 표기)을 무시한 지표 값"""
+    return value.strip().rstrip(".").lower()
+
+
+# 글로벌 인스턴스
+indicator_flight = SingleFlight()
+
+
+def coalesce(namespace: str):
+    """첫 번째 인자(지표 값)가 같은 동시 호출을 하나로 합치는 데코레이터"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(indicator: str, *args, **kwargs):
+            key = (namespace, normalize_indicator(indicator))
+            return indicator_flight.do(key, fn, indicator, *args, **kwargs)
+        return wrapper
+    return decorator
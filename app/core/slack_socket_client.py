@@ -3,7 +3,7 @@ import json
 from slack_bolt.async_app import AsyncApp
 from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
 from app.core.config import get_config
-from app.crud.slack import handle_bobbot_command
+from app.crud.slack import handle_bobbot_command, handle_ioc_command_async
 
 class SlackSocketClient:
     def __init__(self):
@@ -32,13 +32,6 @@ class SlackSocketClient:
             # 즉시 응답 (3초 내에 응답해야 함)
             await ack()
             
-            # 명령어 처리
-            response = handle_bobbot_command(
-                command["user_id"], 
-                command["channel_id"], 
-                command["text"]
-            )
-            
             # bobwiki 명령어인 경우 특별 처리
             if command["text"].strip().startswith("bobwiki"):
                 # 즉시 "처리 중" 메시지 전송
@@ -64,6 +57,12 @@ class SlackSocketClient:
                 asyncio.create_task(self._handle_ioc_async(command, say))
             else:
                 # 일반 명령어는 즉시 응답
+                # (ioc는 위에서 한 번만 분석하도록 여기서만 처리 - 중복 API 호출 방지)
+                response = handle_bobbot_command(
+                    command["user_id"], 
+                    command["channel_id"], 
+                    command["text"]
+                )
                 await respond(
                     text=response["text"],
                     response_type="ephemeral"
@@ -87,8 +86,8 @@ class SlackSocketClient:
             
             search_term = " ".join(text_parts[1:])
             
-            # 실제 bobwiki 처리 (시간이 오래 걸리는 작업)
-            result = handle_bobwiki_command(search_term)
+            # 실제 bobwiki 처리 (시간이 오래 걸리는 크롤링/요약이 이벤트 루프를 막지 않도록 스레드에서 실행)
+            result = await asyncio.to_thread(handle_bobwiki_command, search_term)
             
             # 결과 전송
             await say(
@@ -106,8 +105,6 @@ class SlackSocketClient:
     async def _handle_ioc_async(self, command, say):
         """IoC 명령어 비동기 처리"""
         try:
-            from app.crud.slack import handle_ioc_command
-            
             # IoC 값 추출
             text_parts = command["text"].strip().split()
             if len(text_parts) < 2:
@@ -119,8 +116,8 @@ class SlackSocketClient:
             
             ioc_value = text_parts[1]
             
-            # 실제 IoC 분석 처리
-            result = handle_ioc_command(ioc_value)
+            # 저장된 결과는 async 세션으로 조회하고, 외부 API 분석은 스레드에서 실행
+            result = await handle_ioc_command_async(ioc_value)
             
             # 결과 전송
             await say(
@@ -0,0 +1,309 @@
+"""
+이미 분석/수집한 지표의 판정을 메모리에 올려 두는 인덱스
+
+시작할 때 CTITable/IoCTable에서 판정을 읽어 만들고, 이후 행을 저장할 때마다 바로 갱신합니다.
+도메인은 라벨을 거꾸로(com -> example -> www) 넣은 접미사 트라이로, IP/CIDR은 프리픽스 길이별
+정수 테이블로 저장해 DB나 외부 API 없이 알려진 악성/정상 지표를 바로 판정합니다.
+
+- 악성(malicious)/의심(suspicious) 판정은 하위 도메인과 CIDR 안의 IP에도 적용됩니다.
+- 정상(harmless) 판정은 정확히 같은 값에만 적용됩니다 (정상 도메인의 하위 도메인까지 보증하지 않음).
+- 같은 지표에 판정이 여러 개면 같은 출처의 새 결과나 더 심각한 판정이 기존 판정을 대체합니다.
+
+조회는 락 없이 하고, 추가만 락으로 직렬화합니다.
+"""
+
+import ipaddress
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from app.core.config import conf
+
+MALICIOUS = "malicious"
+SUSPICIOUS = "suspicious"
+HARMLESS = "harmless"
+
+# 판정 심각도 (높을수록 우선)
+SEVERITY = {HARMLESS: 0, SUSPICIOUS: 1, MALICIOUS: 2}
+COVERING_VERDICTS = (MALICIOUS, SUSPICIOUS)  # 하위 도메인/CIDR 안의 IP에도 적용되는 판정
+
+# false면 시작 시 인덱스를 만들지 않음 (조회 API는 빈 인덱스로 응답)
+VERDICT_INDEX_ENABLED = bool(conf.get("verdict_index_enabled", True))
+
+
+class Verdict(NamedTuple):
+    verdict: str
+    source: str
+    updated_at: float  # epoch 초
+
+
+class _DomainNode:
+    """접미사 트라이 노드. 자식이 없는 노드(대부분의 잎)는 children 딕셔너리를 만들지 않음"""
+    __slots__ = ("children", "verdict")
+
+    def __init__(self):
+        self.children: Optional[Dict[str, "_DomainNode"]] = None
+        self.verdict: Optional[Verdict] = None
+
+
+def _replaces(new: Verdict, old: Optional[Verdict]) -> bool:
+    if old is None or new.source == old.source:
+        return old is None or new.updated_at >= old.updated_at
+    return SEVERITY[new.verdict] >= SEVERITY[old.verdict]
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value) if value is not None else time.time()
+
+
+def verdict_from_counts(malicious: Optional[int], suspicious: Optional[int], harmless: Optional[int]) -> Optional[str]:
+    """IoCTable 집계 값으로 판정. 아무 엔진도 판정하지 않았으면 None"""
+    if (malicious or 0) > 0:
+        return MALICIOUS
+    if (suspicious or 0) > 0:
+        return SUSPICIOUS
+    if (harmless or 0) > 0:
+        return HARMLESS
+    return None
+
+
+def verdict_from_cti(tag: Optional[str], detect_count: Optional[int], status: Optional[int],
+                     suspicious_count: Optional[int]) -> Optional[str]:
+    """
+    CTITable 행으로 판정. 오류 결과(status 400 이상)는 판정하지 않고,
+    탐지가 있으면 악성, 탐지가 없으면 VirusTotal 결과만 의심/정상으로 판정합니다.
+    (Hybrid Analysis/urlscan의 탐지 0건은 '분석 기록 없음'일 수 있음)
+    status가 없는 행(압축 저장 이전)은 탐지가 있을 때만 악성으로 판정합니다.
+    """
+    if status is not None and status >= 400:
+        return None
+    if (detect_count or 0) > 0:
+        return MALICIOUS
+    if tag != "virustotal" or status is None:
+        return None
+    return SUSPICIOUS if (suspicious_count or 0) > 0 else HARMLESS
+
+
+class VerdictIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._domains = _DomainNode()
+        self._domain_count = 0
+        # 주소 체계(4/6)별 {프리픽스 길이: {네트워크 주소 정수: 판정}}
+        self._networks: Dict[int, Dict[int, Dict[int, Verdict]]] = {4: {}, 6: {}}
+        self._prefix_lengths: Dict[int, Tuple[int, ...]] = {4: (), 6: ()}  # 긴 프리픽스부터
+        self._network_count = 0
+        self.loaded = False
+        self.load_seconds: Optional[float] = None
+
+    # ---- 추가 ----
+
+    def add(self, value: str, verdict: str, source: str, updated_at: Any = None) -> bool:
+        """지표(도메인, IP, CIDR) 판정을 추가합니다. 인식할 수 없는 값이면 False"""
+        entry = Verdict(verdict, sys.intern(source), _timestamp(updated_at))
+        value = value.strip().rstrip(".").lower()
+        network = _parse_network(value)
+        if network is not None:
+            self._add_network(network, entry)
+        elif value:
+            self._add_domain(value, entry)
+        else:
+            return False
+        return True
+
+    def _add_domain(self, domain: str, entry: Verdict):
+        with self._lock:
+            node = self._domains
+            for label in reversed(domain.split(".")):
+                if node.children is None:
+                    node.children = {}
+                child = node.children.get(label)
+                if child is None:
+                    child = node.children[sys.intern(label)] = _DomainNode()
+                node = child
+            if node.verdict is None:
+                self._domain_count += 1
+            if _replaces(entry, node.verdict):
+                node.verdict = entry
+
+    def _add_network(self, network, entry: Verdict):
+        family = network.version
+        with self._lock:
+            table = self._networks[family].get(network.prefixlen)
+            if table is None:
+                table = self._networks[family][network.prefixlen] = {}
+                self._prefix_lengths[family] = tuple(sorted(self._networks[family], reverse=True))
+            key = int(network.network_address)
+            old = table.get(key)
+            if old is None:
+                self._network_count += 1
+            if _replaces(entry, old):
+                table[key] = entry
+
+    # ---- 조회 ----
+
+    def lookup(self, value: str) -> Optional[Dict[str, Any]]:
+        """
+        지표의 판정을 반환합니다. 알 수 없으면 None.
+        정확히 일치하는 악성 판정 > 가장 가까운 상위 도메인/CIDR의 악성·의심 판정 > 정확히 일치하는 그 외 판정 순입니다.
+        """
+        value = value.strip().rstrip(".").lower()
+        network = _parse_network(value)
+        if network is not None:
+            exact, covering = self._lookup_network(network)
+        else:
+            exact, covering = self._lookup_domain(value)
+
+        if exact is not None and (exact[1].verdict == MALICIOUS or covering is None):
+            (matched, entry), is_exact = exact, True
+        elif covering is not None:
+            (matched, entry), is_exact = covering, False
+        else:
+            return None
+        return {
+            "indicator": value,
+            "verdict": entry.verdict,
+            "source": entry.source,
+            "matched": matched,
+            "exact": is_exact,
+            "last_analyzed": datetime.fromtimestamp(entry.updated_at).isoformat(),
+        }
+
+    def _lookup_domain(self, domain: str):
+        labels = domain.split(".")
+        node = self._domains
+        exact = covering = None
+        for depth, label in enumerate(reversed(labels), 1):
+            children = node.children
+            node = children.get(label) if children else None
+            if node is None:
+                break
+            if node.verdict is None:
+                continue
+            suffix = ".".join(labels[-depth:])
+            if depth == len(labels):
+                exact = (suffix, node.verdict)
+            elif node.verdict.verdict in COVERING_VERDICTS:
+                covering = (suffix, node.verdict)  # 더 깊은(가까운) 상위 도메인이 덮어씀
+        return exact, covering
+
+    def _lookup_network(self, network):
+        family = network.version
+        tables = self._networks[family]
+        address = int(network.network_address)
+        max_bits = network.max_prefixlen
+        exact = covering = None
+        for prefixlen in self._prefix_lengths[family]:
+            if prefixlen > network.prefixlen:
+                continue
+            key = address & ~((1 << (max_bits - prefixlen)) - 1)
+            entry = tables[prefixlen].get(key)
+            if entry is None:
+                continue
+            if prefixlen == network.prefixlen:
+                exact = (_format_network(key, prefixlen, family), entry)
+            elif covering is None and entry.verdict in COVERING_VERDICTS:
+                covering = (_format_network(key, prefixlen, family), entry)  # 가장 긴 프리픽스
+        return exact, covering
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "load_seconds": self.load_seconds,
+            "domains": self._domain_count,
+            "networks": self._network_count,
+        }
+
+    # ---- DB 행 반영 ----
+
+    def record_ioc(self, indicator_value: str, source: str, malicious: Optional[int], suspicious: Optional[int],
+                   harmless: Optional[int], last_analyzed: Any = None):
+        verdict = verdict_from_counts(malicious, suspicious, harmless)
+        if verdict:
+            self.add(indicator_value, verdict, source, last_analyzed)
+
+    def record_cti(self, search_item: str, tag: Optional[str], detect_count: Optional[int],
+                   status: Optional[int], suspicious_count: Optional[int], last_analyzed: Any = None):
+        verdict = verdict_from_cti(tag, detect_count, status, suspicious_count)
+        if verdict and search_item:
+            self.add(search_item, verdict, tag or "cti", last_analyzed)
+
+    def load(self, session, chunk_size: int = 5000) -> int:
+        """CTITable/IoCTable 전체를 오래된 행부터 읽어 인덱스를 만듭니다. 읽은 판정 수를 반환"""
+        from app.models.cti import CTI
+        from app.models.ioc import IoC
+
+        started = time.monotonic()
+        count = 0
+        ioc_rows = (
+            session.query(IoC.indicator_value, IoC.source, IoC.malicious_count, IoC.suspicious_count,
+                          IoC.harmless_count, IoC.last_analyzed)
+            .order_by(IoC.last_analyzed)
+            .yield_per(chunk_size)
+        )
+        for value, source, malicious, suspicious, harmless, last_analyzed in ioc_rows:
+            self.record_ioc(value, source, malicious, suspicious, harmless, last_analyzed)
+            count += 1
+
+        # 판정에 필요한 컬럼만 읽음 (원시 데이터는 읽지 않음)
+        cti_rows = (
+            session.query(CTI.search_item, CTI.tag, CTI.detect_count, CTI.status,
+                          CTI.suspicious_count, CTI.last_analyzed)
+            .order_by(CTI.last_analyzed)
+            .yield_per(chunk_size)
+        )
+        for search_item, tag, detect_count, status, suspicious_count, last_analyzed in cti_rows:
+            self.record_cti(search_item, tag, detect_count, status, suspicious_count, last_analyzed)
+            count += 1
+
+        self.loaded = True
+        self.load_seconds = round(time.monotonic() - started, 3)
+        return count
+
+    def load_in_background(self, session_factory, remove_session=None) -> threading.Thread:
+        """시작을 막지 않도록 별도 스레드에서 load()를 실행합니다."""
+        def run():
+            session = session_factory()
+            try:
+                rows = self.load(session)
+                print(f"✅ 판정 인덱스 구축 완료: 행 {rows}개, {self.stats()}")
+            except Exception as e:
+                print(f"❌ 판정 인덱스 구축 실패: {e}")
+            finally:
+                if remove_session:
+                    remove_session()
+                else:
+                    session.close()
+
+        thread = threading.Thread(target=run, name="verdict-index-load", daemon=True)
+        thread.start()
+        return thread
+
+
+def _parse_network(value: str):
+    """IP 또는 CIDR이면 ip_network, 아니면 None"""
+    if not value or not (value[0].isdigit() or ":" in value):
+        return None
+    try:
+        return ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        return None
+
+
+def _format_network(key: int, prefixlen: int, family: int) -> str:
+    address = ipaddress.IPv4Address(key) if family == 4 else ipaddress.IPv6Address(key)
+    max_bits = 32 if family == 4 else 128
+    return str(address) if prefixlen == max_bits else f"{address}/{prefixlen}"
+
+
+def is_network(value: str) -> bool:
+    """CIDR 표기(1.2.3.0/24 등)인지 확인"""
+    return "/" in value and _parse_network(value) is not None
+
+
+# 글로벌 인스턴스
+verdict_index = VerdictIndex()
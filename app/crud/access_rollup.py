@@ -0,0 +1,386 @@
+"""
+접근 로그 롤업
+
+AccessLogTable을 매번 훑지 않도록 접근 로그 쓰기 버퍼가 flush할 때 같은 트랜잭션에서 두 집계 테이블을 누적합니다.
+
+- AccessLogHourlyTable: 사용자/IP/시간(정시 기준)별 접근 수
+- AccessIPSummaryTable: IP별 누적 접근 수와 판정(verdict_index 기준, 새 IoC/CTI 결과나 피드가 저장되면 갱신)
+
+조회는 집계 테이블의 인덱스 범위만 읽으므로 원시 로그 크기와 관계없이 일정한 비용이 듭니다.
+시간 범위는 정시 단위로 계산합니다 (hours=24면 24시간 전이 속한 시각의 정시부터).
+IP가 없는 접근 로그는 집계하지 않습니다.
+
+기존 접근 로그로 다시 만들거나 오래된 시간별 집계를 지우는 CLI:
+    python -m app.crud.access_rollup --rebuild
+    python -m app.crud.access_rollup --prune-days 90
+"""
+
+import argparse
+import ipaddress
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, distinct, func, or_, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.access_log_writer import access_log_writer
+from app.core.config import conf
+from app.core.verdict_index import verdict_index, MALICIOUS, SUSPICIOUS
+from app.models.user import AccessLog, AccessLogHourly, AccessIPSummary
+from app.schemas import user as user_schema
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+ROLLUP_MAX_HOURS = int(conf.get("access_rollup_max_hours", 24 * 30))  # 조회할 수 있는 최대 시간 범위
+FLAGGED_VERDICTS = (MALICIOUS, SUSPICIOUS)
+REFRESH_CHUNK = 1000  # 판정 갱신 시 한 번에 읽거나 IN (...)으로 묶는 IP 수
+REFRESH_MAX_PATTERNS = 100  # CIDR이 이보다 많으면 LIKE 조건 대신 집계 IP 전체를 확인
+
+
+def _hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _since(hours: int) -> datetime:
+    return _hour(datetime.now() - timedelta(hours=hours))
+
+
+def _upsert(conn, table, rows: List[Dict[str, Any]], keys: Sequence[str], updates):
+    """rows를 다중 행 INSERT하고 키가 겹치면 updates(기존 컬럼, 새 값)로 갱신 (MySQL/SQLite)"""
+    if conn.dialect.name == "mysql":
+        stmt = mysql_insert(table).values(rows)
+        stmt = stmt.on_duplicate_key_update(updates(table.c, stmt.inserted, func.greatest, func.least))
+    else:
+        stmt = sqlite_insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys), set_=updates(table.c, stmt.excluded, func.max, func.min),
+        )
+    conn.execute(stmt)
+
+
+def _hourly_updates(old, new, greatest, least):
+    return {"hits": old.hits + new.hits, "last_seen": greatest(old.last_seen, new.last_seen)}
+
+
+def _summary_updates(old, new, greatest, least):
+    return {
+        "hits": old.hits + new.hits,
+        "first_seen": least(old.first_seen, new.first_seen),
+        "last_seen": greatest(old.last_seen, new.last_seen),
+        # 인덱스가 판정을 모르면(로딩 전 등) 기존 판정 유지
+        "verdict": func.coalesce(new.verdict, old.verdict),
+        "verdict_source": func.coalesce(new.verdict_source, old.verdict_source),
+        "verdict_updated": func.coalesce(new.verdict_updated, old.verdict_updated),
+    }
+
+
+def apply_access_logs(conn, rows: Iterable[Dict[str, Any]]):
+    """접근 로그 행들을 집계 테이블에 더합니다 (access_log_writer의 flush 트랜잭션에서 호출)."""
+    hourly: Dict[tuple, Dict[str, Any]] = {}
+    per_ip: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        ip, access_time = row["ip_address"], row["access_time"]
+        if not ip:
+            continue
+        key = (row["user_id"], ip, _hour(access_time))
+        bucket = hourly.get(key)
+        if bucket is None:
+            hourly[key] = {"user_id": key[0], "ip_address": ip, "hour": key[2], "hits": 1, "last_seen": access_time}
+        else:
+            bucket["hits"] += 1
+            bucket["last_seen"] = max(bucket["last_seen"], access_time)
+
+        summary = per_ip.get(ip)
+        if summary is None:
+            per_ip[ip] = {"ip_address": ip, "hits": 1, "first_seen": access_time, "last_seen": access_time, **_verdict(ip)}
+        else:
+            summary["hits"] += 1
+            summary["first_seen"] = min(summary["first_seen"], access_time)
+            summary["last_seen"] = max(summary["last_seen"], access_time)
+
+    if hourly:
+        _upsert(conn, AccessLogHourly.__table__, list(hourly.values()), ("user_id", "ip_address", "hour"), _hourly_updates)
+    if per_ip:
+        _upsert(conn, AccessIPSummary.__table__, list(per_ip.values()), ("ip_address",), _summary_updates)
+
+
+def _verdict(ip: str) -> Dict[str, Any]:
+    match = verdict_index.lookup(ip)
+    if match is None:
+        return {"verdict": None, "verdict_source": None, "verdict_updated": None}
+    return {"verdict": match["verdict"], "verdict_source": match["source"], "verdict_updated": datetime.now()}
+
+
+def refresh_ip_verdict(db: Session, ip: str) -> bool:
+    """IP의 새 IoC 결과가 저장된 뒤 호출합니다. 집계된 IP면 판정을 갱신하고 True"""
+    values = _verdict(ip)
+    if values["verdict"] is None:
+        return False
+    result = db.execute(
+        update(AccessIPSummary).where(AccessIPSummary.ip_address == ip).values(**values)
+    )
+    db.commit()
+    return result.rowcount > 0
+
+
+def refresh_verdicts(db: Session, values: Iterable[str]) -> int:
+    """
+    피드 청크나 CTI 결과로 지표 판정이 verdict_index에 추가된 뒤 호출합니다.
+    values 중 IP와, CIDR에 속하는 집계 IP의 판정을 인덱스 기준으로 다시 계산해 바뀐 행만 갱신하고 그 수를 반환합니다.
+    도메인은 집계 대상이 아니므로 건너뜁니다.
+    """
+    ips, networks = set(), []
+    for value in values:
+        try:
+            network = ipaddress.ip_network(value.strip(), strict=False)
+        except ValueError:
+            continue
+        if network.num_addresses == 1:
+            ips.add(str(network.network_address))
+        else:
+            networks.append(network)
+
+    columns = (AccessIPSummary.ip_address, AccessIPSummary.verdict, AccessIPSummary.verdict_source)
+    candidates: List[Tuple[str, Optional[str], Optional[str]]] = []
+    ip_list = sorted(ips)
+    for start in range(0, len(ip_list), REFRESH_CHUNK):
+        candidates.extend(db.execute(
+            select(*columns).where(AccessIPSummary.ip_address.in_(ip_list[start:start + REFRESH_CHUNK]))
+        ).all())
+    if networks:
+        candidates.extend(_summaries_in_networks(db, networks, columns))
+    return _apply_verdicts(db, candidates)
+
+
+def _network_pattern(network) -> Optional[str]:
+    """IPv4 CIDR에 속하는 주소 문자열의 LIKE 접두어 (옥텟 단위로 표현할 수 없으면 None)"""
+    octets = network.prefixlen // 8
+    if network.version != 4 or octets == 0:
+        return None
+    return ".".join(str(network.network_address).split(".")[:octets]) + ".%"
+
+
+def _summaries_in_networks(db: Session, networks, columns) -> Iterable[tuple]:
+    """CIDR에 속할 수 있는 집계 IP를 ip_address 순으로 나눠 읽음 (범위를 좁힐 수 없으면 전체)"""
+    patterns = {_network_pattern(network) for network in networks}
+    condition = None
+    if None not in patterns and len(patterns) <= REFRESH_MAX_PATTERNS:
+        condition = or_(*(AccessIPSummary.ip_address.like(pattern) for pattern in sorted(patterns)))
+    last_ip = ""
+    while True:
+        query = select(*columns).where(AccessIPSummary.ip_address > last_ip)
+        if condition is not None:
+            query = query.where(condition)
+        rows = db.execute(query.order_by(AccessIPSummary.ip_address).limit(REFRESH_CHUNK)).all()
+        if not rows:
+            return
+        last_ip = rows[-1][0]
+        yield from rows
+
+
+def _apply_verdicts(db: Session, rows: Iterable[Tuple[str, Optional[str], Optional[str]]]) -> int:
+    """(IP, 저장된 판정, 출처) 중 인덱스 판정과 다른 IP를 (판정, 출처)별로 묶어 UPDATE ... WHERE ip_address IN (...)"""
+    groups: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+    for ip, verdict, source in rows:
+        match = verdict_index.lookup(ip)
+        if match is not None and (match["verdict"], match["source"]) != (verdict, source):
+            groups[(match["verdict"], match["source"])].append(ip)
+    if not groups:
+        return 0
+
+    now = datetime.now()
+    updated = 0
+    try:
+        for (verdict, source), group in groups.items():
+            for start in range(0, len(group), REFRESH_CHUNK):
+                result = db.execute(
+                    update(AccessIPSummary)
+                    .where(AccessIPSummary.ip_address.in_(group[start:start + REFRESH_CHUNK]))
+                    .values(verdict=verdict, verdict_source=source, verdict_updated=now)
+                )
+                updated += result.rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return updated
+
+
+# ----- 조회 -----
+
+def get_ip_summary(db: Session, ip: str) -> Optional[user_schema.IPAccessSummary]:
+    row = db.get(AccessIPSummary, ip)
+    return user_schema.IPAccessSummary.model_validate(row) if row else None
+
+
+def get_ip_summaries(db: Session, verdicts: Sequence[str] = FLAGGED_VERDICTS,
+                     limit: int = 100) -> List[user_schema.IPAccessSummary]:
+    """판정이 verdicts인 IP를 최근 접근 순으로"""
+    rows = (
+        db.query(AccessIPSummary)
+        .filter(AccessIPSummary.verdict.in_(verdicts))
+        .order_by(AccessIPSummary.last_seen.desc())
+        .limit(limit)
+        .all()
+    )
+    return [user_schema.IPAccessSummary.model_validate(row) for row in rows]
+
+
+def get_top_ips_for_user(db: Session, user_id: int, hours: int = 24,
+                         limit: int = 10) -> List[user_schema.UserIPActivity]:
+    """최근 hours시간 동안 사용자에게 가장 많이 접근한 IP"""
+    hits = func.sum(AccessLogHourly.hits)
+    rows = (
+        db.query(AccessLogHourly.ip_address, hits, func.max(AccessLogHourly.last_seen), AccessIPSummary.verdict)
+        .outerjoin(AccessIPSummary, AccessIPSummary.ip_address == AccessLogHourly.ip_address)
+        .filter(AccessLogHourly.user_id == user_id, AccessLogHourly.hour >= _since(hours))
+        .group_by(AccessLogHourly.ip_address, AccessIPSummary.verdict)
+        .order_by(hits.desc(), AccessLogHourly.ip_address)
+        .limit(limit)
+        .all()
+    )
+    return [
+        user_schema.UserIPActivity(ip_address=ip, hits=int(count), last_seen=last_seen, verdict=verdict)
+        for ip, count, last_seen, verdict in rows
+    ]
+
+
+def get_users_from_flagged_ips(db: Session, hours: int = 24, verdicts: Sequence[str] = FLAGGED_VERDICTS,
+                               limit: int = 100) -> List[user_schema.FlaggedUserAccess]:
+    """최근 hours시간 동안 판정이 verdicts인 IP에서 접근된 사용자 (접근 수 순)"""
+    since = _since(hours)
+    flagged = (
+        db.query(AccessLogHourly)
+        .join(AccessIPSummary, AccessIPSummary.ip_address == AccessLogHourly.ip_address)
+        .filter(AccessIPSummary.verdict.in_(verdicts), AccessLogHourly.hour >= since)
+    )
+    hits = func.sum(AccessLogHourly.hits)
+    rows = (
+        flagged.with_entities(
+            AccessLogHourly.user_id, hits,
+            func.count(distinct(AccessLogHourly.ip_address)), func.max(AccessLogHourly.last_seen),
+        )
+        .group_by(AccessLogHourly.user_id)
+        .order_by(hits.desc(), AccessLogHourly.user_id)
+        .limit(limit)
+        .all()
+    )
+    if not rows:
+        return []
+
+    ips: Dict[int, List[str]] = defaultdict(list)
+    for user_id, ip in (
+        flagged.with_entities(AccessLogHourly.user_id, AccessLogHourly.ip_address)
+        .filter(AccessLogHourly.user_id.in_([row[0] for row in rows]))
+        .distinct()
+        .order_by(AccessLogHourly.ip_address)
+    ):
+        ips[user_id].append(ip)
+    return [
+        user_schema.FlaggedUserAccess(
+            user_id=user_id, hits=int(count), ip_count=ip_count, last_seen=last_seen, ip_addresses=ips[user_id],
+        )
+        for user_id, count, ip_count, last_seen in rows
+    ]
+
+
+async def get_ip_summary_async(db: "AsyncSession", ip: str) -> Optional[user_schema.IPAccessSummary]:
+    return await db.run_sync(get_ip_summary, ip)
+
+
+async def get_ip_summaries_async(db: "AsyncSession", verdicts: Sequence[str] = FLAGGED_VERDICTS,
+                                 limit: int = 100) -> List[user_schema.IPAccessSummary]:
+    return await db.run_sync(get_ip_summaries, verdicts, limit)
+
+
+async def get_top_ips_for_user_async(db: "AsyncSession", user_id: int, hours: int = 24,
+                                     limit: int = 10) -> List[user_schema.UserIPActivity]:
+    return await db.run_sync(get_top_ips_for_user, user_id, hours, limit)
+
+
+async def get_users_from_flagged_ips_async(db: "AsyncSession", hours: int = 24, verdicts: Sequence[str] = FLAGGED_VERDICTS,
+                                           limit: int = 100) -> List[user_schema.FlaggedUserAccess]:
+    return await db.run_sync(get_users_from_flagged_ips, hours, verdicts, limit)
+
+
+# ----- 유지 보수 -----
+
+def rebuild_rollups(db: Session, chunk_size: int = 10000) -> Dict[str, int]:
+    """
+    집계 테이블을 비우고 AccessLogTable 전체로 다시 만듭니다 (판정은 verdict_index 기준).
+    앱이 실행 중이어도 됩니다. 하나의 REPEATABLE READ 트랜잭션에서 집계 테이블을 먼저 지워
+    (행/갭 잠금) 동시에 flush하는 트랜잭션의 집계 갱신을 커밋 전에 막은 뒤, 그 시점 스냅샷으로 로그를 읽습니다.
+    - 삭제 전에 커밋된 flush: 로그가 스냅샷에 포함되어 한 번만 집계됨
+    - 삭제 후의 flush: 재구성이 커밋될 때까지 기다렸다가 (잠금 대기 시간을 넘기면 버퍼에 남았다가 재시도)
+      스냅샷에 없는 자기 로그만 더함
+    """
+    engine = db.get_bind()
+    isolation = "SERIALIZABLE" if engine.dialect.name == "sqlite" else "REPEATABLE READ"
+    columns = (AccessLog.id, AccessLog.user_id, AccessLog.ip_address, AccessLog.access_time)
+    scanned = 0
+    with engine.connect().execution_options(isolation_level=isolation) as conn, conn.begin():
+        # 스냅샷은 첫 번째 일반 SELECT에서 정해지므로 삭제가 먼저 실행되어야 함
+        conn.execute(delete(AccessLogHourly.__table__))
+        conn.execute(delete(AccessIPSummary.__table__))
+        last_id = ""
+        while True:
+            rows = conn.execute(
+                select(*columns).where(AccessLog.id > last_id).order_by(AccessLog.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            scanned += len(rows)
+            apply_access_logs(conn, (row._asdict() for row in rows))
+            print(f"📊 AccessLogTable: {scanned}행 집계")
+    db.commit()
+    return {
+        "scanned": scanned,
+        "hourly_rows": db.query(func.count()).select_from(AccessLogHourly).scalar(),
+        "ips": db.query(func.count()).select_from(AccessIPSummary).scalar(),
+    }
+
+
+def prune_hourly(db: Session, older_than_days: int) -> int:
+    """older_than_days일보다 오래된 시간별 집계를 지웁니다 (IP별 누적 집계는 유지)."""
+    cutoff = _hour(datetime.now() - timedelta(days=older_than_days))
+    result = db.execute(delete(AccessLogHourly).where(AccessLogHourly.hour < cutoff))
+    db.commit()
+    return result.rowcount
+
+
+# 접근 로그 flush와 같은 트랜잭션에서 집계 갱신
+access_log_writer.on_flush(apply_access_logs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="접근 로그 집계 테이블을 다시 만들거나 정리합니다.")
+    parser.add_argument("--rebuild", action="store_true", help="AccessLogTable 전체로 집계를 다시 만듦")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--prune-days", type=int, help="이 일수보다 오래된 시간별 집계 삭제")
+    args = parser.parse_args()
+    if not args.rebuild and args.prune_days is None:
+        parser.error("--rebuild 또는 --prune-days가 필요합니다.")
+
+    from app.database import db
+
+    session = db.Session()
+    try:
+        result: Dict[str, Any] = {}
+        if args.rebuild:
+            verdict_index.load(session)
+            result["rebuild"] = rebuild_rollups(session, args.chunk_size)
+        if args.prune_days is not None:
+            result["pruned_hourly_rows"] = prune_hourly(session, args.prune_days)
+        print(json.dumps(result, indent=2))
+    finally:
+        db.Session.remove()
+
+
+if __name__ == "__main__":
+    main()
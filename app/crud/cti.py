@@ -1,30 +1,449 @@
+import base64
+import contextvars
+import random
 import requests
-import socket
-from sqlalchemy.orm import Session
-from datetime import datetime
-from typing import Dict, Any, List
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from sqlalchemy import and_, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session, undefer_group
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Any, Iterable, List, Optional, Tuple
 
-from app.core.config import conf
+from app.core import json_codec
+from app.core.cache import TwoTierCache, run_sync, shared_tier
+from app.core.config import conf, PROVIDER_BASE_URLS
+from app.core.circuit_breaker import get_breaker
+from app.core.dns_resolver import dns_resolver, format_dns_records, is_ip_address
+from app.core.http_client import http_client, RateLimitExceeded
+from app.core.rate_limit import PRIORITY_BATCH, request_deadline
+from app.core.refresh_scheduler import refresh_scheduler
+from app.core.singleflight import coalesce, indicator_flight, normalize_indicator
+from app.core.verdict_index import verdict_index
+from app.crud.access_rollup import refresh_verdicts
+from app.crud.scoring import score_cti, score_items
+from app.database import release_connection
 from app.models.cti import CTI
-from app.schemas.cti import CTICreate
+from app.schemas.cti import CTICreate, CTI as CTISchema
+
+if TYPE_CHECKING:
+	from sqlalchemy.ext.asyncio import AsyncSession
+
+# 전체 조회 마감 시간(초). 이 시간이 지나면 끝난 프로바이더 결과만 반환
+CTI_DEADLINE = float(conf.get("cti_deadline_seconds", 30))
+
+# 프로바이더별 마감 시간(초). 전체 마감 시간을 넘을 수 없음
+CTI_PROVIDER_DEADLINES: Dict[str, float] = {
+	"virustotal": 15,
+	"hybrid": 25,
+	"urlscan": 20,
+	**conf.get("cti_provider_deadlines", {}),
+}
+
+# 프로바이더별 캐시 유효 시간(초). 이 시간 안에 저장된 결과는 API를 다시 호출하지 않음
+CTI_CACHE_MAX_AGE: Dict[str, float] = {
+	"virustotal": 3600,
+	"hybrid": 3600,
+	"urlscan": 3600,
+	**conf.get("cti_cache_max_age", {}),
+}
+
+# history: 조회마다 새 행 추가 / latest: (search_item, tag)당 최신 결과 한 행만 유지
+CTI_STORAGE_MODE = conf.get("cti_storage_mode", "history")
+
+PROVIDER_VENDORS = {
+	"virustotal": "VirusTotal",
+	"hybrid": "Hybrid-Analysis",
+	"urlscan": "Urlscan",
+}
+
+# (tag, search_item) -> 가장 최근의 캐시 가능한 결과 (없으면 None)
+cti_cache = TwoTierCache("cti", CTISchema, shared_tier)
+
+# 프로바이더 동시 호출용 스레드 풀 (마감 후에도 남은 호출은 백그라운드에서 정리됨)
+_provider_executor = ThreadPoolExecutor(
+	max_workers=int(conf.get("cti_max_workers", 32)),
+	thread_name_prefix="cti-provider",
+)
 
 
 def create_cti(db: Session, data: CTICreate) -> CTI:
 	obj = CTI(**data.dict())
+	obj.risk_score = score_cti(obj)
 	db.add(obj)
 	db.commit()
 	db.refresh(obj)
+	invalidate_cti(obj.search_item, obj.tag)
+	verdict_index.record_cti(obj.search_item, obj.tag, obj.detect_count, obj.status, obj.suspicious_count, obj.last_analyzed)
+	_refresh_access_verdicts(db, [obj.search_item])
 	return obj
 
 
+def _refresh_access_verdicts(db: Session, search_items: List[str]):
+	"""CTI 결과가 IP/CIDR이면 접근 IP 집계의 판정 갱신 (실패해도 저장한 결과에는 영향 없음)"""
+	try:
+		refresh_verdicts(db, search_items)
+	except Exception as e:
+		db.rollback()
+		print(f"⚠️ CTI 결과 접근 IP 판정 갱신 실패: {e}")
+
+
+def bulk_store_cti(db: Session, items: List[CTICreate]) -> List[CTISchema]:
+	"""
+	한 번의 조회에서 나온 프로바이더 결과들을 하나의 트랜잭션으로 저장합니다.
+	history 모드는 다중 행 INSERT, latest 모드는 (search_item, tag) 기준
+	다중 행 INSERT ... ON DUPLICATE KEY UPDATE로 기존 행을 갱신합니다.
+	"""
+	if not items:
+		return []
+
+	for item, risk_score in zip(items, score_items(items)):
+		item.risk_score = risk_score
+	rows = [_cti_row(item) for item in items]
+	try:
+		if CTI_STORAGE_MODE == "latest":
+			ids = _upsert_latest_rows(db, rows)
+		else:
+			ids = _insert_history_rows(db, rows)
+		db.commit()
+	except Exception:
+		db.rollback()
+		raise
+
+	for item in items:
+		invalidate_cti(item.search_item, item.tag)
+		verdict_index.record_cti(item.search_item, item.tag, item.detect_count, item.status, item.suspicious_count, item.last_analyzed)
+	_refresh_access_verdicts(db, [item.search_item for item in items])
+	return [CTISchema(**item.dict(), id=row_id) for item, row_id in zip(items, ids)]
+
+
+def _insert_history_rows(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+	"""
+	다중 행 INSERT 한 번으로 저장하고 rows 순서대로 id를 반환합니다.
+	RETURNING을 지원하면(MariaDB 10.5+, SQLite) INSERT가 돌려준 행을, 아니면(MySQL)
+	이번 INSERT의 첫 id(LAST_INSERT_ID) 이후 행을 읽어 (search_item, tag)별로 id 순서대로 배정합니다.
+	"""
+	table = CTI.__table__
+	keys = [(row["search_item"], row["tag"]) for row in rows]
+	stmt = insert(table).values(rows)
+	if db.get_bind().dialect.insert_returning:
+		inserted = db.execute(stmt.returning(table.c.id, table.c.search_item, table.c.tag)).all()
+	else:
+		db.execute(stmt)
+		first_id = db.execute(select(func.last_insert_id())).scalar()
+		inserted = db.execute(
+			select(table.c.id, table.c.search_item, table.c.tag)
+			.where(table.c.id >= first_id, tuple_(table.c.search_item, table.c.tag).in_(set(keys)))
+		).all()
+
+	found: Dict[tuple, List[int]] = {}
+	for row_id, search_item, tag in sorted(inserted):
+		found.setdefault((search_item, tag), []).append(row_id)
+	# 같은 키가 여러 번이면 VALUES 순서(id 순)대로 배정
+	return [found[key].pop(0) for key in keys]
+
+
+def _upsert_latest_rows(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+	"""다중 행 INSERT ... ON DUPLICATE KEY UPDATE 한 번으로 저장하고 유니크 키로 id를 읽습니다."""
+	table = CTI.__table__
+	stmt = mysql_insert(table).values(rows)
+	stmt = stmt.on_duplicate_key_update({
+		column: stmt.inserted[column]
+		for column in rows[0]
+		if column not in ("search_item", "tag")
+	})
+	db.execute(stmt)
+	keys = [(row["search_item"], row["tag"]) for row in rows]
+	ids = dict(
+		((search_item, tag), row_id)
+		for row_id, search_item, tag in db.execute(
+			select(table.c.id, table.c.search_item, table.c.tag)
+			.where(tuple_(table.c.search_item, table.c.tag).in_(set(keys)))
+		)
+	)
+	return [ids[key] for key in keys]
+
+
+def _cti_row(item: CTICreate) -> Dict[str, Any]:
+	"""INSERT용 컬럼 값 (원시 데이터는 압축 컬럼에 저장하고 예전 raw_data 컬럼은 비움)"""
+	row = item.dict()
+	row["raw_blob"] = row.pop("raw_data")
+	row["raw_data"] = None
+	return row
+
+
+def get_fresh_cti(db: Session, search_item: str, tag: str, max_age: float) -> Optional[CTI]:
+	"""max_age(초) 이내에 저장된 가장 최근 결과를 조회합니다. 오류 결과는 캐시로 쓰지 않습니다."""
+	if max_age <= 0:
+		return None
+	cutoff = datetime.now() - timedelta(seconds=max_age)
+	row = (
+		db.query(CTI)
+		.options(undefer_group("raw"))  # 캐시 결과는 원시 데이터까지 그대로 반환하므로 한 번에 읽음
+		.filter(
+			CTI.search_item == search_item,
+			CTI.tag == tag,
+			CTI.last_analyzed >= cutoff,
+			or_(CTI.status.is_(None), CTI.status < 400),
+		)
+		.order_by(CTI.last_analyzed.desc())
+		.first()
+	)
+	# status가 없는 행(압축 저장 이전)은 원시 데이터로 오류 여부를 판단
+	if row is None or (row.status is None and not _is_cacheable(row.raw_data)):
+		return None
+	return row
+
+
+def get_cached_cti(db: Session, search_item: str, tag: str, max_age: float) -> Optional[CTISchema]:
+	"""
+	get_fresh_cti의 캐시 버전 (스키마 객체 반환).
+	새 결과를 저장하면 캐시가 지워지므로, 캐시된 결과는 유효 시간만 다시 확인합니다.
+	"""
+	if max_age <= 0:
+		return None
+	result = cti_cache.get_or_load((tag, search_item), lambda: _load_fresh_cti(db, search_item, tag, max_age))
+	return _within_max_age(result, max_age)
+
+
+def _load_fresh_cti(db: Session, search_item: str, tag: str, max_age: float) -> Optional[CTISchema]:
+	row = get_fresh_cti(db, search_item, tag, max_age)
+	return None if row is None else CTISchema.model_validate(row)
+
+
+def _within_max_age(result: Optional[CTISchema], max_age: float) -> Optional[CTISchema]:
+	if result is None or result.last_analyzed < datetime.now() - timedelta(seconds=max_age):
+		return None
+	return result
+
+
+def invalidate_cti(search_item: str, tag: str):
+	"""(search_item, tag)의 결과를 저장/변경한 뒤 호출 (커밋 후)"""
+	cti_cache.invalidate((tag, search_item))
+
+
+def _is_cacheable(raw_data: Any) -> bool:
+	if not isinstance(raw_data, dict) or "error" in raw_data:
+		return False
+	status = raw_data.get("status", 200)
+	return not (isinstance(status, int) and status >= 400)
+
+
+def encode_cursor(*values: Any) -> str:
+	"""다음 페이지 조회용 커서 (마지막으로 반환한 행의 정렬 키)"""
+	return base64.urlsafe_b64encode(json_codec.dumps(list(values))).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+	"""잘못된 커서면 ValueError"""
+	try:
+		values = json_codec.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+	except Exception:
+		raise ValueError("Invalid cursor")
+	if not isinstance(values, list):
+		raise ValueError("Invalid cursor")
+	return values
+
+
+def _to_schema(row: CTI, include_raw: bool) -> CTISchema:
+	"""include_raw가 아니면 원시 데이터(deferred)를 읽지 않고 변환"""
+	if include_raw:
+		return CTISchema.model_validate(row)
+	return CTISchema(**{name: getattr(row, name) for name in CTISchema.model_fields if name != "raw_data"})
+
+
+def get_cti_history(
+	db: Session,
+	search_item: str,
+	tag: Optional[str] = None,
+	limit: int = 50,
+	cursor: Optional[str] = None,
+	include_raw: bool = False,
+) -> Tuple[List[CTISchema], Optional[str]]:
+	"""
+	지표의 분석 이력을 최신순으로 조회합니다 (keyset 페이지네이션).
+	프로바이더마다 (search_item, tag, last_analyzed) 인덱스 범위를 limit+1행만 읽고 합치므로
+	이력이 길어져도 앞 페이지를 건너뛰는 비용이 없습니다.
+	반환값: (결과 목록, 다음 페이지 커서 또는 None)
+	"""
+	search_item = normalize_indicator(search_item)
+	after = None
+	if cursor:
+		values = decode_cursor(cursor)
+		try:
+			after = (datetime.fromisoformat(values[0]), int(values[1]))
+		except (IndexError, TypeError, ValueError):
+			raise ValueError("Invalid cursor")
+
+	rows: List[CTI] = []
+	for source in ([tag] if tag else list(PROVIDER_VENDORS)):
+		query = db.query(CTI).filter(CTI.search_item == search_item, CTI.tag == source)
+		if include_raw:
+			query = query.options(undefer_group("raw"))
+		if after is not None:
+			query = query.filter(or_(
+				CTI.last_analyzed < after[0],
+				and_(CTI.last_analyzed == after[0], CTI.id < after[1]),
+			))
+		rows.extend(query.order_by(CTI.last_analyzed.desc(), CTI.id.desc()).limit(limit + 1).all())
+
+	rows.sort(key=lambda row: (row.last_analyzed, row.id), reverse=True)
+	page = rows[:limit]
+	next_cursor = None
+	if len(rows) > limit:
+		last = page[-1]
+		next_cursor = encode_cursor(last.last_analyzed.isoformat(), last.id)
+	return [_to_schema(row, include_raw) for row in page], next_cursor
+
+
+def get_latest_cti(
+	db: Session,
+	tag: Optional[str] = None,
+	limit: int = 50,
+	cursor: Optional[str] = None,
+	include_raw: bool = False,
+) -> Tuple[List[CTISchema], Optional[str]]:
+	"""
+	지표별로 프로바이더마다 가장 최근 결과를 지표 이름순으로 조회합니다 (keyset 페이지네이션).
+	한 페이지는 limit개 지표이며, 지표 목록과 지표별 최신 시각은 인덱스만으로 구합니다.
+	"""
+	after = None
+	if cursor:
+		values = decode_cursor(cursor)
+		if not values or not isinstance(values[0], str):
+			raise ValueError("Invalid cursor")
+		after = values[0]
+
+	items_query = db.query(CTI.search_item).filter(CTI.search_item.isnot(None))
+	if tag:
+		items_query = items_query.filter(CTI.tag == tag)
+	if after is not None:
+		items_query = items_query.filter(CTI.search_item > after)
+	items = [
+		row[0]
+		for row in items_query.group_by(CTI.search_item).order_by(CTI.search_item).limit(limit + 1).all()
+	]
+	has_more = len(items) > limit
+	items = items[:limit]
+	if not items:
+		return [], None
+
+	latest = db.query(
+		CTI.search_item,
+		CTI.tag,
+		func.max(CTI.last_analyzed).label("last_analyzed"),
+	).filter(CTI.search_item.in_(items))
+	if tag:
+		latest = latest.filter(CTI.tag == tag)
+	latest = latest.group_by(CTI.search_item, CTI.tag).subquery()
+
+	query = db.query(CTI).join(latest, and_(
+		CTI.search_item == latest.c.search_item,
+		CTI.tag == latest.c.tag,
+		CTI.last_analyzed == latest.c.last_analyzed,
+	))
+	if include_raw:
+		query = query.options(undefer_group("raw"))
+
+	# 같은 초에 저장된 행이 여러 개면 id가 가장 큰 행만 사용
+	results: Dict[tuple, CTI] = {}
+	for row in query.order_by(CTI.search_item, CTI.tag, CTI.id.desc()).all():
+		results.setdefault((row.search_item, row.tag), row)
+
+	next_cursor = encode_cursor(items[-1]) if has_more else None
+	return [_to_schema(row, include_raw) for row in results.values()], next_cursor
+
+
+# ----- AsyncSession용 (async 라우트/Slack 핸들러) -----
+# DB만 읽고 쓰는 함수를 AsyncSession.run_sync로 실행 (외부 API를 호출하는 upsert_cti_results 등은 스레드에서 실행할 것)
+# 캐시를 쓰는 함수는 cache.run_sync/get_or_load_async로 공유 저장소 I/O를 스레드에서 처리
+
+async def create_cti_async(db: "AsyncSession", data: CTICreate) -> CTI:
+	return await run_sync(db, create_cti, data)
+
+
+async def bulk_store_cti_async(db: "AsyncSession", items: List[CTICreate]) -> List[CTISchema]:
+	return await run_sync(db, bulk_store_cti, items)
+
+
+async def get_cached_cti_async(db: "AsyncSession", search_item: str, tag: str, max_age: float) -> Optional[CTISchema]:
+	if max_age <= 0:
+		return None
+	result = await cti_cache.get_or_load_async(
+		(tag, search_item), lambda: run_sync(db, _load_fresh_cti, search_item, tag, max_age),
+	)
+	return _within_max_age(result, max_age)
+
+
+async def get_cti_history_async(
+	db: "AsyncSession",
+	search_item: str,
+	tag: Optional[str] = None,
+	limit: int = 50,
+	cursor: Optional[str] = None,
+	include_raw: bool = False,
+) -> Tuple[List[CTISchema], Optional[str]]:
+	return await db.run_sync(get_cti_history, search_item, tag, limit, cursor, include_raw)
+
+
+async def get_latest_cti_async(
+	db: "AsyncSession",
+	tag: Optional[str] = None,
+	limit: int = 50,
+	cursor: Optional[str] = None,
+	include_raw: bool = False,
+) -> Tuple[List[CTISchema], Optional[str]]:
+	return await db.run_sync(get_latest_cti, tag, limit, cursor, include_raw)
+
+
 def _strip_key(value: Any) -> str:
 	return str(value).strip() if value is not None else ""
 
 
+def _unavailable_result(source: str) -> Dict[str, Any]:
+	"""서킷 브레이커가 열려 있을 때 프로바이더를 호출하지 않고 바로 돌려주는 결과"""
+	return {
+		"status": 503,
+		"malicious_score": 0,
+		"detect_count": 0,
+		"detect_vendor": PROVIDER_VENDORS.get(source),
+		"country": None,
+		"dns": None,
+		"raw_data": {
+			"status": 503,
+			"provider_unavailable": True,
+			"error": f"{source} provider unavailable (circuit open)",
+		},
+	}
+
+
+def _is_provider_failure(result: Dict[str, Any]) -> bool:
+	"""네트워크 오류/5xx만 프로바이더 장애로 봄 (401, 404, 429는 제외)"""
+	status = result.get("status")
+	return isinstance(status, int) and status >= 500
+
+
+def _provider_breaker(source: str):
+	return get_breaker(source).guard(lambda *args, **kwargs: _unavailable_result(source), _is_provider_failure)
+
+
+def _rate_limited_result(source: str) -> Dict[str, Any]:
+	"""대기 시간 안에 호출 토큰을 얻지 못했을 때의 결과"""
+	return {
+		"status": 429,
+		"malicious_score": 0,
+		"detect_count": 0,
+		"detect_vendor": PROVIDER_VENDORS.get(source),
+		"country": None,
+		"dns": None,
+		"raw_data": {"status": 429, "error": f"{source} rate limit: no quota available"},
+	}
+
+
 def analyze_ip_with_virustotal_for_slack(ip: str) -> dict:
     """슬랙용 IP 분석 함수 (CTI 형식과 맞춤)"""
     try:
-        from app.crud.ioc import VT_API_KEY
+        from app.crud.ioc import VT_API_KEY, fetch_virustotal_ip
         
         if not VT_API_KEY:
             return {
@@ -32,46 +451,46 @@ def analyze_ip_with_virustotal_for_slack(ip: str) -> dict:
                 "error": "VirusTotal API key is not configured"
             }
         
-        # 직접 VirusTotal API 호출
-        headers = {"x-apikey": VT_API_KEY.strip()}
-        url = f"https://www.virustotal.com/api/v3/ip_addresses/{ip}"
+        # /ioc/analyze/ip와 같은 조회 함수를 사용 (동시 조회는 한 번의 요청으로 합쳐짐)
+        response = fetch_virustotal_ip(ip)
+        status_code = response["status"]
         
-        try:
-            response = requests.get(url, headers=headers, timeout=15)
-            status_code = response.status_code
+        if status_code == 200:
+            vt_data = response["data"]
+            attributes = vt_data.get("data", {}).get("attributes", {})
+            stats = attributes.get("last_analysis_stats", {})
             
-            if status_code == 200:
-                vt_data = response.json()
-                attributes = vt_data.get("data", {}).get("attributes", {})
-                stats = attributes.get("last_analysis_stats", {})
-                
-                return {
-                    "status": 200,
-                    "reputation": attributes.get("reputation", 0),
-                    "stats": {
-                        "malicious": stats.get("malicious", 0),
-                        "suspicious": stats.get("suspicious", 0),
-                        "harmless": stats.get("harmless", 0),
-                        "undetected": stats.get("undetected", 0),
-                    },
-                    "country": attributes.get("country"),
-                    "as_owner": attributes.get("as_owner"),
-                }
-            elif status_code == 404:
-                return {
-                    "status": 404,
-                    "error": "IP address not found in VirusTotal database"
-                }
-            else:
-                return {
-                    "status": status_code,
-                    "error": f"VirusTotal API error: {response.text[:200]}"
-                }
-                
-        except requests.exceptions.RequestException as e:
+            return {
+                "status": 200,
+                "reputation": attributes.get("reputation", 0),
+                "stats": {
+                    "malicious": stats.get("malicious", 0),
+                    "suspicious": stats.get("suspicious", 0),
+                    "harmless": stats.get("harmless", 0),
+                    "undetected": stats.get("undetected", 0),
+                },
+                "country": attributes.get("country"),
+                "as_owner": attributes.get("as_owner"),
+            }
+        elif status_code == 404:
+            return {
+                "status": 404,
+                "error": "IP address not found in VirusTotal database"
+            }
+        elif status_code == 429:
+            return {
+                "status": 429,
+                "error": response["error"]
+            }
+        elif status_code == 502:
             return {
                 "status": 502,
-                "error": f"Network error: {str(e)}"
+                "error": f"Network error: {response['error']}"
+            }
+        else:
+            return {
+                "status": status_code,
+                "error": f"VirusTotal API error: {response['error']}"
             }
             
     except Exception as e:
@@ -81,6 +500,8 @@ def analyze_ip_with_virustotal_for_slack(ip: str) -> dict:
         }
 
 
+@coalesce("virustotal")
+@_provider_breaker("virustotal")
 def analyze_with_virustotal(domain: str) -> Dict[str, Any]:
 	api_key = _strip_key(conf.get("virustotal_api_key"))
 	if not api_key:
@@ -95,39 +516,41 @@ def analyze_with_virustotal(domain: str) -> Dict[str, Any]:
 		}
 	
 	headers = {"x-apikey": api_key, "accept": "application/json"}
-	url = f"https://www.virustotal.com/api/v3/domains/{domain}"
+	url = f"{PROVIDER_BASE_URLS['virustotal']}/api/v3/domains/{domain}"
+	
+	# DNS 조회는 VirusTotal 요청과 동시에 진행 (IP 폴백과 CTI.dns 저장에 사용)
+	dns_future = None if is_ip_address(domain) else dns_resolver.submit(domain)
 	
 	try:
-		r = requests.get(url, headers=headers, timeout=15)
+		r = http_client.get(url, headers=headers, provider="virustotal")
 		status = r.status_code
 		try:
 			data = r.json()
 		except Exception:
 			data = {"text": r.text}
+	except RateLimitExceeded:
+		return _rate_limited_result("virustotal")
 	except requests.RequestException as e:
 		status = 502
 		data = {"error": str(e)}
 
+	# DNS 조회 실패/시간 초과 시 빈 목록
+	ips = dns_resolver.wait(dns_future) if dns_future else []
+
 	# 404 에러일 때만 IP 폴백 시도 (권한 문제가 아닌 경우)
-	if status == 404:
+	if status == 404 and ips:
+		ip = ips[0]
+		ip_url = f"{PROVIDER_BASE_URLS['virustotal']}/api/v3/ip_addresses/{ip}"
 		try:
-			_, _, ips = socket.gethostbyname_ex(domain)
-			if ips:
-				ip = ips[0]
-				ip_url = f"https://www.virustotal.com/api/v3/ip_addresses/{ip}"
+			r2 = http_client.get(ip_url, headers=headers, provider="virustotal")
+			if r2.status_code == 200:
+				status = r2.status_code
 				try:
-					r2 = requests.get(ip_url, headers=headers, timeout=15)
-					if r2.status_code == 200:
-						status = r2.status_code
-						try:
-							data = r2.json()
-						except Exception:
-							data = {"text": r2.text}
-				except requests.RequestException:
-					# IP 폴백 실패 시 원래 상태 유지
-					pass
-		except Exception:
-			# DNS 조회 실패 시 원래 상태 유지
+					data = r2.json()
+				except Exception:
+					data = {"text": r2.text}
+		except (requests.RequestException, RateLimitExceeded):
+			# IP 폴백 실패(호출 한도 포함) 시 원래 상태 유지
 			pass
 
 	attrs = (data or {}).get("data", {}).get("attributes", {}) if isinstance(data, dict) else {}
@@ -161,13 +584,16 @@ def analyze_with_virustotal(domain: str) -> Dict[str, Any]:
 		"status": status,
 		"malicious_score": rep if isinstance(rep, int) else 0,
 		"detect_count": malicious if isinstance(malicious, int) else 0,
+		"suspicious_count": vt_trim["stats"]["suspicious"] if isinstance(vt_trim["stats"]["suspicious"], int) else 0,
 		"detect_vendor": "VirusTotal",
 		"country": country,
-		"dns": None,
+		"dns": format_dns_records(ips),
 		"raw_data": vt_trim,
 	}
 
 
+@coalesce("hybrid")
+@_provider_breaker("hybrid")
 def analyze_with_hybrid(domain: str) -> Dict[str, Any]:
 	"""
 	Hybrid Analysis API를 사용해 도메인을 분석합니다.
@@ -194,7 +620,7 @@ def analyze_with_hybrid(domain: str) -> Dict[str, Any]:
 	}
 
 	# 1단계: search/terms로 기존 분석 결과 검색
-	search_url = "https://www.hybrid-analysis.com/api/v2/search/terms"
+	search_url = f"{PROVIDER_BASE_URLS['hybrid']}/api/v2/search/terms"
 	
 	try:
 		# domain으로 검색
@@ -202,7 +628,11 @@ def analyze_with_hybrid(domain: str) -> Dict[str, Any]:
 			"domain": domain
 		}
 		
-		r = requests.post(search_url, headers=headers, json=search_payload, timeout=20)
+		# search/terms는 조회만 하므로 재시도해도 안전
+		r = http_client.post(
+			search_url, headers=headers, json=search_payload,
+			provider="hybrid", idempotent=True, timeout=(5, 20),
+		)
 		status = r.status_code
 		
 		if status == 200:
@@ -249,13 +679,13 @@ def analyze_with_hybrid(domain: str) -> Dict[str, Any]:
 		if not submit_url.startswith(("http://", "https://")):
 			submit_url = f"https://{submit_url}"
 			
-		scan_url = "https://www.hybrid-analysis.com/api/v2/quick-scan/url"
+		scan_url = f"{PROVIDER_BASE_URLS['hybrid']}/api/v2/quick-scan/url"
 		scan_payload = {
 			"url": submit_url,
 			"scan_type": "all"
 		}
 		
-		r = requests.post(scan_url, headers=headers, json=scan_payload, timeout=25)
+		r = http_client.post(scan_url, headers=headers, json=scan_payload, provider="hybrid", timeout=(5, 25))
 		status = r.status_code
 		
 		try:
@@ -263,6 +693,8 @@ def analyze_with_hybrid(domain: str) -> Dict[str, Any]:
 		except Exception:
 			data = {"text": r.text}
 			
+	except RateLimitExceeded:
+		return _rate_limited_result("hybrid")
 	except requests.RequestException as e:
 		status = 502
 		data = {"error": str(e)}
@@ -322,21 +754,168 @@ def analyze_with_hybrid(domain: str) -> Dict[str, Any]:
 	}
 
 
+# Quick scan 결과 폴링 간격(초)과 최대 시도 횟수
+HYBRID_POLL_BASE_DELAY = float(conf.get("hybrid_poll_base_delay", 60))
+HYBRID_POLL_MAX_DELAY = float(conf.get("hybrid_poll_max_delay", 1800))
+HYBRID_POLL_MAX_ATTEMPTS = int(conf.get("hybrid_poll_max_attempts", 12))
+# 폴링할 작업을 선점해 두는 시간(초). 선점한 워커가 이 안에 결과를 반영하지 못하면 다른 워커가 다시 가져감
+HYBRID_POLL_LEASE = float(conf.get("hybrid_poll_lease", 300))
+
+
+def claim_pending_hybrid_scans(db: Session, limit: int) -> List[Tuple[int, str]]:
+	"""
+	조회할 시간이 된 quick scan 행을 선점해 (id, scan_job_id) 목록으로 반환합니다 (선점 후 커밋).
+	행마다 next_poll_at이 아직 지난 시각인 경우에만 HYBRID_POLL_LEASE 뒤로 미루므로,
+	여러 uvicorn 워커의 폴러가 같은 작업을 동시에 조회하지 않습니다.
+	"""
+	now = datetime.now()
+	lease_until = now + timedelta(seconds=HYBRID_POLL_LEASE)
+	claimed = []
+	for row_id, job_id in (
+		db.query(CTI.id, CTI.scan_job_id)
+		.filter(
+			CTI.tag == "hybrid",
+			CTI.scan_job_id.isnot(None),
+			or_(CTI.next_poll_at.is_(None), CTI.next_poll_at <= now),
+		)
+		.order_by(CTI.last_analyzed)
+		.limit(limit)
+		.all()
+	):
+		result = db.execute(
+			update(CTI)
+			.where(CTI.id == row_id, or_(CTI.next_poll_at.is_(None), CTI.next_poll_at <= now))
+			.values(next_poll_at=lease_until)
+		)
+		if result.rowcount == 1:
+			claimed.append((row_id, job_id))
+	db.commit()
+	return claimed
+
+
+def fetch_hybrid_quick_scan(job_id: str) -> Dict[str, Any]:
+	"""quick-scan 작업 상태를 조회합니다. 백그라운드 작업이므로 가장 낮은 우선순위로 토큰을 받습니다."""
+	api_key = _strip_key(conf.get("hybrid_analysis_api_key"))
+	if not api_key:
+		return {"status": 401, "error": "API key for Hybrid Analysis is not configured."}
+
+	headers = {
+		"api-key": api_key,
+		"accept": "application/json",
+		"User-Agent": "Falcon",
+	}
+	url = f"{PROVIDER_BASE_URLS['hybrid']}/api/v2/quick-scan/{job_id}"
+	try:
+		r = http_client.get(url, headers=headers, provider="hybrid", priority=PRIORITY_BATCH, timeout=(5, 20))
+		try:
+			data = r.json()
+		except Exception:
+			data = {"text": r.text}
+		return {"status": r.status_code, "data": data}
+	except RateLimitExceeded as e:
+		return {"status": 429, "error": str(e)}
+	except requests.RequestException as e:
+		return {"status": 502, "error": str(e)}
+
+
+def apply_hybrid_quick_scan(row: CTI, scan: Dict[str, Any]) -> bool:
+	"""
+	quick-scan 조회 결과를 저장된 행에 반영합니다.
+	끝난 작업이면 점수를 갱신하고 True, 아직이면 다음 조회 시각을 미루고 False를 반환합니다.
+	"""
+	raw = dict(row.raw_data or {})
+	data = scan.get("data") if isinstance(scan.get("data"), dict) else {}
+
+	if scan.get("status") == 200 and data.get("finished"):
+		scanners = [s for s in (data.get("scanners") or []) if isinstance(s, dict)]
+		malicious = [s.get("name") for s in scanners if s.get("status") == "malicious"]
+		with_result = [s for s in scanners if s.get("status") in ("malicious", "suspicious", "clean")]
+
+		row.detect_count = len(malicious)
+		row.malicious_score = int(len(malicious) / len(with_result) * 100) if with_result else 0
+		row.last_analyzed = datetime.now()
+		raw.update({
+			"scan_type": "quick_scan_completed",
+			"sha256": data.get("sha256"),
+			"scanners": [
+				{"name": s.get("name"), "status": s.get("status"), "positives": s.get("positives")}
+				for s in scanners[:10]
+			],
+			"vendors_malicious": malicious[:5],
+			"note": "Quick scan results collected",
+		})
+		row.raw_data = raw
+		row.scan_job_id = None
+		row.next_poll_at = None
+		row.risk_score = score_cti(row)
+		return True
+
+	# 호출 한도(429)나 통신/서버 오류(5xx)는 작업 상태와 무관하므로 시도 횟수에 세지 않음
+	status = scan.get("status")
+	transient = status == 429 or (isinstance(status, int) and status >= 500)
+	attempts = int(raw.get("poll_attempts", 0)) + (0 if transient else 1)
+	raw["poll_attempts"] = attempts
+	if not transient and (attempts >= HYBRID_POLL_MAX_ATTEMPTS or status == 404):
+		raw["scan_type"] = "quick_scan_expired"
+		raw["note"] = "Quick scan results were not available"
+		row.scan_job_id = None
+		row.next_poll_at = None
+	else:
+		# 지수 백오프 + 지터 (여러 작업이 같은 시각에 몰리지 않도록)
+		delay = min(HYBRID_POLL_MAX_DELAY, HYBRID_POLL_BASE_DELAY * 2 ** max(attempts, 1))
+		row.next_poll_at = datetime.now() + timedelta(seconds=delay * random.uniform(0.5, 1.0))
+	if scan.get("error"):
+		raw["last_poll_error"] = scan["error"]
+	# 원시 데이터는 새 객체를 할당해야 변경이 감지됨
+	row.raw_data = raw
+	return False
+
+
+def apply_hybrid_quick_scans(db: Session, scans: Dict[int, Dict[str, Any]]) -> int:
+	"""
+	선점한 행들(id -> 조회 결과)에 apply_hybrid_quick_scan을 적용하고 한 트랜잭션으로 커밋합니다.
+	행은 원시 데이터와 함께 한 번에 읽고, 커밋한 뒤 캐시와 판정 인덱스를 갱신합니다. 결과가 나온 작업 수를 반환
+	"""
+	if not scans:
+		return 0
+	rows = db.query(CTI).options(undefer_group("raw")).filter(CTI.id.in_(list(scans))).all()
+	changed = []  # 커밋 후 행을 다시 읽지 않도록 필요한 값을 미리 복사
+	for row in rows:
+		completed = apply_hybrid_quick_scan(row, scans[row.id])
+		changed.append((row.search_item, row.tag, completed, row.detect_count, row.status, row.suspicious_count, row.last_analyzed))
+	try:
+		db.commit()
+	except Exception:
+		db.rollback()
+		raise
+
+	for search_item, tag, completed, detect_count, status, suspicious_count, last_analyzed in changed:
+		invalidate_cti(search_item, tag)
+		if completed:
+			verdict_index.record_cti(search_item, tag, detect_count, status, suspicious_count, last_analyzed)
+	_refresh_access_verdicts(db, [item[0] for item in changed if item[2]])
+	return sum(1 for item in changed if item[2])
+
+
+@coalesce("urlscan")
+@_provider_breaker("urlscan")
 def analyze_with_urlscan(domain: str) -> Dict[str, Any]:
 	api_key = _strip_key(conf.get("urlscan_api_key"))
 	headers = {
 		"API-Key": api_key or "",
 		"Content-Type": "application/json",
 	}
-	url = "https://urlscan.io/api/v1/search/"
+	url = f"{PROVIDER_BASE_URLS['urlscan']}/api/v1/search/"
 	params = {"q": f"domain:{domain}"}
 	try:
-		r = requests.get(url, headers=headers, params=params, timeout=20)
+		r = http_client.get(url, headers=headers, params=params, provider="urlscan", timeout=(5, 20))
 		status = r.status_code
 		try:
 			data = r.json()
 		except Exception:
 			data = {"text": r.text}
+	except RateLimitExceeded:
+		return _rate_limited_result("urlscan")
 	except requests.RequestException as e:
 		status = 502
 		data = {"error": str(e)}
@@ -423,27 +1002,144 @@ def analyze_with_urlscan(domain: str) -> Dict[str, Any]:
 	}
 
 
-def upsert_cti_results(db: Session, domain: str) -> List[CTI]:
-	now = datetime.now()
-	results: List[CTI] = []
+CTI_PROVIDERS = (
+	("virustotal", analyze_with_virustotal),
+	("hybrid", analyze_with_hybrid),
+	("urlscan", analyze_with_urlscan),
+)
 
-	for source, analyzer in (
-		("virustotal", analyze_with_virustotal),
-		("hybrid", analyze_with_hybrid),
-		("urlscan", analyze_with_urlscan),
-	):
-		res = analyzer(domain)
+
+def _unsaved_cti(domain: str, source: str, raw_data: Dict[str, Any], now: datetime) -> CTISchema:
+	"""결과 없이 끝난 프로바이더의 표식 (DB에 저장하지 않음)"""
+	return CTISchema(
+		id=None,
+		search_item=domain,
+		detect_vendor=PROVIDER_VENDORS.get(source),
+		tag=source,
+		status=raw_data.get("status"),
+		raw_data=raw_data,
+		last_analyzed=now,
+	)
+
+
+def _timed_out_cti(domain: str, source: str, deadline: float, now: datetime) -> CTISchema:
+	"""마감 시간 안에 끝나지 않은 프로바이더의 표식"""
+	return _unsaved_cti(domain, source, {
+		"status": 504,
+		"timed_out": True,
+		"error": f"{source} did not respond within {deadline:g}s",
+	}, now)
+
+
+def _pending_scan_job(source: str, raw_data: Any) -> Optional[str]:
+	"""결과를 나중에 폴링해야 하는 Hybrid Analysis quick scan 작업 id"""
+	if source != "hybrid" or not isinstance(raw_data, dict):
+		return None
+	if raw_data.get("scan_type") != "quick_scan_submitted" or not raw_data.get("job_id"):
+		return None
+	return str(raw_data["job_id"])[:64]
+
+
+def upsert_cti_results(
+	db: Session,
+	domain: str,
+	force_refresh: bool = False,
+	refresh_sources: Optional[Iterable[str]] = None,
+	track: bool = True,
+) -> List[CTISchema]:
+	"""
+	세 프로바이더를 동시에 조회하고 마감 시간 안에 끝난 결과를 저장합니다.
+	CTI_CACHE_MAX_AGE 이내의 저장된 결과가 있으면 해당 프로바이더는 호출하지 않습니다
+	(force_refresh면 전부, refresh_sources에 있는 프로바이더는 해당 프로바이더만 캐시를 무시).
+	마감 시간을 넘긴 프로바이더는 timed_out 표식으로 대체됩니다.
+	같은 도메인에 대한 동시 요청은 한 요청만 조회/저장하고 나머지는 그 결과를 함께 받습니다.
+	track이면 조회 기록을 백그라운드 갱신 스케줄러에 남깁니다 (스케줄러 자신의 갱신은 제외).
+	"""
+	domain = normalize_indicator(domain)
+	refresh = frozenset(refresh_sources or ())
+	results = indicator_flight.do(
+		("cti", domain, force_refresh, refresh), _upsert_cti_results, db, domain, force_refresh, refresh,
+	)
+	refresh_scheduler.record_cti(domain, results, lookup=track)
+	return results
+
+
+def _provider_deadline(source: str) -> float:
+	return min(CTI_DEADLINE, CTI_PROVIDER_DEADLINES.get(source, CTI_DEADLINE))
+
+
+def _run_until(deadline_at: float, analyzer, domain: str) -> Dict[str, Any]:
+	# 마감 시각이 지나면 호출 토큰을 더 기다리지 않음 (이미 504로 응답한 뒤 호출 한도를 쓰지 않도록)
+	request_deadline.set(deadline_at)
+	return analyzer(domain)
+
+
+def _upsert_cti_results(db: Session, domain: str, force_refresh: bool, refresh: frozenset = frozenset()) -> List[CTISchema]:
+	# DATETIME 컬럼은 초 단위로 저장되므로 저장 후 다시 읽을 때 값이 일치하도록 맞춤
+	now = datetime.now().replace(microsecond=0)
+	cached: Dict[str, CTISchema] = {}
+	if not force_refresh:
+		for source, _ in CTI_PROVIDERS:
+			if source in refresh:
+				continue
+			row = get_cached_cti(db, domain, source, CTI_CACHE_MAX_AGE.get(source, 0))
+			if row is not None:
+				cached[source] = row
+
+	# 프로바이더 응답을 기다리는 동안 커넥션을 붙잡지 않도록 캐시 조회 트랜잭션을 끝냄
+	release_connection(db)
+
+	started = time.monotonic()
+	futures = {
+		# 요청 우선순위(contextvar)가 프로바이더 스레드에도 전달되도록 컨텍스트를 복사
+		source: _provider_executor.submit(
+			contextvars.copy_context().run, _run_until, started + _provider_deadline(source), analyzer, domain,
+		)
+		for source, analyzer in CTI_PROVIDERS
+		if source not in cached
+	}
+
+	# 다른 요청과 공유되므로 세션에 묶이지 않은 스키마 객체로 반환
+	results: List[Optional[CTISchema]] = []
+	to_store: Dict[int, CTICreate] = {}
+	for source, _ in CTI_PROVIDERS:
+		if source in cached:
+			results.append(cached[source])
+			continue
+
+		deadline = _provider_deadline(source)
+		remaining = max(0.0, deadline - (time.monotonic() - started))
+		try:
+			res = futures[source].result(timeout=remaining)
+		except FutureTimeoutError:
+			results.append(_timed_out_cti(domain, source, deadline, now))
+			continue
+
+		# 서킷 브레이커로 차단된 프로바이더도 저장하지 않고 표식만 반환
+		if (res.get("raw_data") or {}).get("provider_unavailable"):
+			results.append(_unsaved_cti(domain, source, res["raw_data"], now))
+			continue
+
+		raw_data = res.get("raw_data")
 		cti = CTICreate(
 			search_item=domain,
 			malicious_score=res.get("malicious_score", 0),
 			detect_count=res.get("detect_count", 0),
+			suspicious_count=res.get("suspicious_count", 0),
 			detect_vendor=res.get("detect_vendor"),
 			tag=source,
 			country=res.get("country"),
 			dns=res.get("dns"),
-			raw_data=res.get("raw_data"),
+			status=res.get("status"),
+			raw_data=raw_data,
 			last_analyzed=now,
+			scan_job_id=_pending_scan_job(source, raw_data),
 		)
-		results.append(create_cti(db, cti))
+		to_store[len(results)] = cti
+		results.append(None)
+
+	# 새로 받은 결과는 한 트랜잭션으로 저장
+	for index, saved in zip(to_store, bulk_store_cti(db, list(to_store.values()))):
+		results[index] = saved
 
 	return results
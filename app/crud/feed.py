@@ -0,0 +1,238 @@
+"""
+위협 피드(텍스트 목록, CSV, STIX 번들) 일괄 수집
+
+피드를 한 줄/한 객체씩 읽으면서 get_ioc_type으로 분류하고 (CIDR 대역은 "cidr"), chunk_size개씩 모아
+이미 저장된 행과 중복을 제거한 뒤 다중 행 INSERT로 IoCTable에 저장합니다.
+청크를 저장할 때마다 그 IP/CIDR에서 접근한 집계 IP의 판정(AccessIPSummaryTable)도 갱신합니다.
+외부 프로바이더는 호출하지 않으며, 메모리 사용량은 청크 크기로 제한됩니다.
+
+CLI:
+    python -m app.crud.feed feed.txt --source abuse-ch --format txt
+"""
+
+import argparse
+import csv
+import io
+import ipaddress
+import json
+import re
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import ijson  # 큰 STIX 번들을 전체를 메모리에 올리지 않고 스트리밍으로 파싱
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.verdict_index import is_network, verdict_index
+from app.crud.access_rollup import refresh_verdicts
+from app.crud.ioc import get_ioc_type
+from app.models.ioc import IoC
+
+FEED_FORMATS = ("auto", "txt", "csv", "stix")
+FEED_VERDICTS = ("malicious", "harmless")
+
+# CSV에서 지표 값으로 인식할 컬럼 이름
+CSV_VALUE_COLUMNS = ("indicator", "value", "ioc", "domain", "ip", "ip_address", "host")
+
+# STIX 패턴에서 값 추출: [domain-name:value = 'evil.com'] OR [ipv4-addr:value = '1.2.3.4']
+STIX_PATTERN_VALUE = re.compile(r"(?:domain-name|ipv4-addr|ipv6-addr|url):value\s*=\s*'([^']+)'")
+STIX_OBSERVABLE_TYPES = ("domain-name", "ipv4-addr", "ipv6-addr", "url")
+
+
+def detect_format(filename: Optional[str]) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".json", ".stix")):
+        return "stix"
+    return "txt"
+
+
+def normalize_feed_value(value: str) -> str:
+    """디팡(defang) 표기를 되돌리고 URL이면 호스트만 남깁니다. IPv6 주소는 축약 표기로 맞춥니다."""
+    value = value.strip().strip('"').replace("[.]", ".").replace("(.)", ".")
+    value = re.sub(r"^hxxp", "http", value, flags=re.IGNORECASE)
+    if "://" in value:
+        value = value.split("://", 1)[1]
+        value = value.split("/", 1)[0].split("@")[-1]
+        if value.startswith("[") and "]" in value:  # [IPv6]:포트
+            value = value[1:value.index("]")]
+        elif value.count(":") == 1:  # 포트 제거 (IPv6 제외)
+            value = value.split(":", 1)[0]
+    value = value.rstrip(".").lower()
+    if ":" in value and "/" not in value:
+        try:
+            value = str(ipaddress.IPv6Address(value))
+        except ValueError:
+            pass
+    return value
+
+
+def _iter_text(stream: BinaryIO) -> Iterator[str]:
+    for line in io.TextIOWrapper(stream, encoding="utf-8", errors="ignore"):
+        line = line.split("#", 1)[0].strip()
+        if line:
+            yield line.split()[0]
+
+
+def _iter_csv(stream: BinaryIO) -> Iterator[str]:
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8", errors="ignore", newline=""))
+    column = 0
+    for index, row in enumerate(reader):
+        if not row or row[0].startswith("#"):
+            continue
+        if index == 0:
+            header = [cell.strip().lower() for cell in row]
+            matches = [i for i, name in enumerate(header) if name in CSV_VALUE_COLUMNS]
+            if matches:
+                column = matches[0]
+                continue
+        if column < len(row):
+            yield row[column]
+
+
+def _values_from_stix_object(obj: Dict[str, Any]) -> Iterator[str]:
+    if not isinstance(obj, dict):
+        return
+    if obj.get("type") == "indicator" and isinstance(obj.get("pattern"), str):
+        yield from STIX_PATTERN_VALUE.findall(obj["pattern"])
+    elif obj.get("type") in STIX_OBSERVABLE_TYPES and isinstance(obj.get("value"), str):
+        yield obj["value"]
+
+
+def _iter_stix(stream: BinaryIO) -> Iterator[str]:
+    for obj in ijson.items(stream, "objects.item"):
+        yield from _values_from_stix_object(obj)
+
+
+def iter_feed_values(stream: BinaryIO, fmt: str) -> Iterator[str]:
+    """피드 형식에 맞게 지표 값을 하나씩 읽습니다."""
+    parsers = {"txt": _iter_text, "csv": _iter_csv, "stix": _iter_stix}
+    for value in parsers[fmt](stream):
+        value = normalize_feed_value(value)
+        if value:
+            yield value
+
+
+def _existing_values(db: Session, source: str, values: List[str]) -> set:
+    rows = (
+        db.query(IoC.indicator_value)
+        .filter(IoC.source == source, IoC.indicator_value.in_(values))
+        .all()
+    )
+    return {row[0] for row in rows}
+
+
+def _write_chunk(db: Session, chunk: Dict[str, str], source: str, feed_name: str, verdict: str, stats: Dict[str, Any]):
+    existing = _existing_values(db, source, list(chunk))
+    now = datetime.now()
+    rows = [
+        {
+            "access_log_id": None,
+            "indicator_type": indicator_type,
+            "indicator_value": value,
+            "source": source,
+            "malicious_count": 1 if verdict == "malicious" else 0,
+            "suspicious_count": 0,
+            "harmless_count": 1 if verdict == "harmless" else 0,
+            "reputation": 0,
+            "raw_blob": {"feed": feed_name, "verdict": verdict},
+            "raw_data": None,  # 예전 비압축 컬럼
+            "last_analyzed": now,
+        }
+        for value, indicator_type in chunk.items()
+        if value not in existing
+    ]
+    if rows:
+        try:
+            db.execute(insert(IoC.__table__), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        for row in rows:
+            verdict_index.add(row["indicator_value"], verdict, source, now)
+        try:
+            stats["access_ips_updated"] += refresh_verdicts(db, [row["indicator_value"] for row in rows])
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ 피드 {feed_name} 접근 IP 판정 갱신 실패: {e}")
+    stats["inserted"] += len(rows)
+    stats["duplicates"] += len(chunk) - len(rows)
+
+
+def ingest_feed(
+    db: Session,
+    stream: BinaryIO,
+    feed_name: str,
+    fmt: str = "auto",
+    filename: Optional[str] = None,
+    verdict: str = "malicious",
+    chunk_size: int = 1000,
+) -> Dict[str, Any]:
+    """
+    피드를 읽어 IoCTable에 저장하고 처리 통계를 반환합니다.
+    source는 "feed:<feed_name>"으로 저장되어 같은 피드를 다시 넣어도 중복 행이 생기지 않습니다.
+    """
+    if fmt == "auto":
+        fmt = detect_format(filename)
+    source = f"feed:{feed_name}"[:100]
+    stats: Dict[str, Any] = {
+        "feed": feed_name,
+        "format": fmt,
+        "parsed": 0,
+        "inserted": 0,
+        "duplicates": 0,
+        "invalid": 0,
+        "access_ips_updated": 0,
+        "by_type": {"ip": 0, "domain": 0, "cidr": 0},
+    }
+
+    chunk: Dict[str, str] = {}  # 값 -> 타입 (청크 안 중복 제거)
+    for value in iter_feed_values(stream, fmt):
+        stats["parsed"] += 1
+        indicator_type = None
+        if len(value) <= 255:
+            indicator_type = get_ioc_type(value) or ("cidr" if is_network(value) else None)
+        if not indicator_type:
+            stats["invalid"] += 1
+            continue
+        if value in chunk:
+            stats["duplicates"] += 1
+            continue
+        chunk[value] = indicator_type
+        stats["by_type"][indicator_type] += 1
+        if len(chunk) >= chunk_size:
+            _write_chunk(db, chunk, source, feed_name, verdict, stats)
+            chunk = {}
+
+    if chunk:
+        _write_chunk(db, chunk, source, feed_name, verdict, stats)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="위협 피드를 IoCTable에 일괄 수집합니다.")
+    parser.add_argument("path", help="피드 파일 경로 (txt, csv, STIX JSON)")
+    parser.add_argument("--source", required=True, help="피드 이름 (source 컬럼에 feed:<이름>으로 저장)")
+    parser.add_argument("--format", choices=FEED_FORMATS, default="auto")
+    parser.add_argument("--verdict", choices=FEED_VERDICTS, default="malicious")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app.database import db
+
+    session = db.Session()
+    try:
+        with open(args.path, "rb") as stream:
+            stats = ingest_feed(
+                session, stream, feed_name=args.source, fmt=args.format,
+                filename=args.path, verdict=args.verdict, chunk_size=args.chunk_size,
+            )
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+    finally:
+        db.Session.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,177 @@
+import ipaddress
+import re
 import requests
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from datetime import datetime
 from fastapi import HTTPException
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-from app.core.config import conf
+from app.core.cache import TwoTierCache, run_sync, shared_tier
+from app.core.config import conf, PROVIDER_BASE_URLS
+from app.core.circuit_breaker import get_breaker
+from app.core.http_client import http_client, RateLimitExceeded
+from app.core.singleflight import coalesce, indicator_flight, normalize_indicator
+from app.core.refresh_scheduler import refresh_scheduler
+from app.core.verdict_index import verdict_index
+from app.database import release_connection
+from app.crud.access_rollup import refresh_ip_verdict
 from app.models.ioc import IoC
-from app.schemas.ioc import IoCCreate
+from app.schemas.ioc import IoCCreate, IoC as IoCSchema
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 VT_API_KEY = conf.get("virustotal_api_key")
-VT_API_URL = "https://www.virustotal.com/api/v3/ip_addresses/"
+VT_API_URL = f"{PROVIDER_BASE_URLS['virustotal']}/api/v3/ip_addresses/"
 
-def get_ioc_by_value(db: Session, value: str):
-    """DB에서 기존 IoC 정보를 조회합니다."""
-    return db.query(IoC).filter(IoC.indicator_value == value).first()
+# (source, indicator_value) -> 저장된 분석 결과 (없으면 None)
+ioc_cache = TwoTierCache("ioc", IoCSchema, shared_tier)
 
+def get_ioc_by_value(db: Session, value: str, source: str = "VirusTotal"):
+    """DB에서 기존 IoC 정보를 조회합니다. (기본값: VirusTotal 분석 결과만, 피드로 수집한 행 제외)"""
+    return db.query(IoC).filter(IoC.indicator_value == value, IoC.source == source).first()
 
-def analyze_ip_with_virustotal(ip: str):
-    """VirusTotal API를 호출하여 IP 주소를 분석합니다."""
-    if not VT_API_KEY:
-        raise HTTPException(status_code=500, detail="VirusTotal API key is not configured.")
+
+def _load_ioc_report(db: Session, value: str, source: str) -> Optional[IoCSchema]:
+    row = get_ioc_by_value(db, value=value, source=source)
+    return None if row is None else IoCSchema.model_validate(row)
+
+
+def get_ioc_report(db: Session, value: str, source: str = "VirusTotal") -> Optional[IoCSchema]:
+    """get_ioc_by_value의 캐시 버전 (스키마 객체 반환, 없는 결과도 잠시 캐시)"""
+    return ioc_cache.get_or_load((source, value), lambda: _load_ioc_report(db, value, source))
+
+
+async def get_ioc_report_async(db: "AsyncSession", value: str, source: str = "VirusTotal") -> Optional[IoCSchema]:
+    """get_ioc_report의 AsyncSession 버전 (캐시 공유 저장소는 스레드에서 조회)"""
+    return await ioc_cache.get_or_load_async((source, value), lambda: run_sync(db, _load_ioc_report, value, source))
+
+
+def get_ioc_type(ioc_value: str) -> str:
+    """IoC 타입 판별 (ip 또는 domain 또는 None, IPv6 주소도 ip)"""
+    # IP 주소 형식 검증
+    ip_pattern = r'^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$'
+    
+    # 도메인 형식 검증 (간단한 패턴)
+    domain_pattern = r'^[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*$'
     
-    headers = {"x-apikey": VT_API_KEY}
+    if re.match(ip_pattern, ioc_value):
+        return "ip"
+    elif ":" in ioc_value and _is_ipv6(ioc_value):
+        return "ip"
+    elif re.match(domain_pattern, ioc_value):
+        return "domain"
+    else:
+        return None
+
+
+def _is_ipv6(value: str) -> bool:
+    try:
+        ipaddress.IPv6Address(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _virustotal_unavailable(ip: str) -> Dict[str, Any]:
+    return {"status": 503, "data": None, "error": "VirusTotal provider unavailable (circuit open)"}
+
+
+@coalesce("virustotal_ip")
+@get_breaker("virustotal").guard(_virustotal_unavailable, lambda result: result["status"] >= 500)
+def fetch_virustotal_ip(ip: str) -> Dict[str, Any]:
+    """
+    VirusTotal IP 조회 결과를 {"status", "data", "error"} 형태로 반환합니다.
+    같은 IP에 대한 동시 호출(API, Slack)은 한 번의 요청으로 합쳐집니다.
+    """
+    if not VT_API_KEY:
+        return {"status": 401, "data": None, "error": "VirusTotal API key is not configured"}
+    headers = {"x-apikey": VT_API_KEY.strip()}
     url = f"{VT_API_URL}{ip}"
     
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # 2xx 상태 코드가 아닐 경우 예외 발생
-        return response.json()
+        response = http_client.get(url, headers=headers, provider="virustotal")
+        if response.status_code != 200:
+            return {"status": response.status_code, "data": None, "error": response.text[:200]}
+        return {"status": 200, "data": response.json(), "error": None}
+    except RateLimitExceeded as e:
+        return {"status": 429, "data": None, "error": str(e)}
     except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=502, detail=f"Failed to fetch data from VirusTotal: {e}")
+        return {"status": 502, "data": None, "error": str(e)}
 
 
-def create_ioc_report(db: Session, ip: str, vt_data: dict, access_log_id: Optional[str] = None) -> IoC:
-    """분석 결과를 access_log_id와 연결하여 DB에 저장합니다."""
+def analyze_ip_with_virustotal(ip: str):
+    """VirusTotal API를 호출하여 IP 주소를 분석합니다."""
+    if not VT_API_KEY:
+        raise HTTPException(status_code=500, detail="VirusTotal API key is not configured.")
     
+    result = fetch_virustotal_ip(ip)
+    if result["status"] == 429:
+        raise HTTPException(status_code=429, detail="VirusTotal rate limit: no quota available.")
+    if result["status"] == 503:
+        raise HTTPException(status_code=503, detail=result["error"])
+    if result["status"] != 200:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to fetch data from VirusTotal: {result['status']} {result['error']}"
+        )
+    return result["data"]
+
+
+def analyze_and_store_ip(db: Session, ip: str) -> IoCSchema:
+    """
+    저장된 분석 결과가 없으면 VirusTotal로 분석해 저장합니다.
+    같은 IP를 동시에 요청하면 한 요청만 조회/저장하고 나머지는 그 결과를 함께 받습니다.
+    """
+    ip = normalize_indicator(ip)
+    result = indicator_flight.do(("ioc", ip), _analyze_and_store_ip, db, ip)
+    refresh_scheduler.record_ip(ip, result.last_analyzed, result.malicious_count)
+    return result
+
+
+def _analyze_and_store_ip(db: Session, ip: str) -> IoCSchema:
+    # 다른 요청과 공유되므로 세션에 묶이지 않은 스키마 객체로 반환
+    report = get_ioc_report(db, value=ip)
+    if report is None:
+        # VirusTotal 응답을 기다리는 동안 커넥션을 풀에 돌려줌
+        release_connection(db)
+        vt_data = analyze_ip_with_virustotal(ip)
+        if not vt_data:
+            raise HTTPException(status_code=404, detail="Could not get analysis from VirusTotal.")
+        report = IoCSchema.model_validate(create_ioc_report(db, ip=ip, vt_data=vt_data))
+    return report
+
+
+def _virustotal_counts(vt_data: dict) -> Dict[str, int]:
+    """VirusTotal IP 조회 결과에서 저장할 판정 집계"""
     attributes = vt_data.get("data", {}).get("attributes", {})
     stats = attributes.get("last_analysis_stats", {})
+    return {
+        "malicious_count": stats.get("malicious", 0),
+        "suspicious_count": stats.get("suspicious", 0),
+        "harmless_count": stats.get("harmless", 0),
+        "reputation": attributes.get("reputation", 0),
+    }
+
+
+def _refresh_access_verdict(db: Session, ip: str):
+    """접근 IP 집계의 판정 갱신 (실패해도 저장한 분석 결과에는 영향 없음)"""
+    try:
+        refresh_ip_verdict(db, ip)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ 접근 IP {ip} 판정 갱신 실패: {e}")
+
 
+def create_ioc_report(db: Session, ip: str, vt_data: dict, access_log_id: Optional[str] = None) -> IoC:
+    """분석 결과를 access_log_id와 연결하여 DB에 저장합니다."""
     ioc_data = IoCCreate(
         access_log_id=access_log_id,
         indicator_type="ip",
         indicator_value=ip,
         source="VirusTotal",
-        malicious_count=stats.get("malicious", 0),
-        suspicious_count=stats.get("suspicious", 0),
-        harmless_count=stats.get("harmless", 0),
-        reputation=attributes.get("reputation", 0),
+        **_virustotal_counts(vt_data),
         raw_data={},
         last_analyzed=datetime.now()
     )
@@ -55,4 +180,50 @@ def create_ioc_report(db: Session, ip: str, vt_data: dict, access_log_id: Option
     db.add(db_ioc)
     db.commit()
     db.refresh(db_ioc)
-    return db_ioc
\ No newline at end of file
+    ioc_cache.invalidate((db_ioc.source, db_ioc.indicator_value))
+    verdict_index.record_ioc(
+        db_ioc.indicator_value, db_ioc.source, db_ioc.malicious_count,
+        db_ioc.suspicious_count, db_ioc.harmless_count, db_ioc.last_analyzed,
+    )
+    _refresh_access_verdict(db, db_ioc.indicator_value)
+    return db_ioc
+
+
+def link_access_log(conn, ioc_id: int, access_log_id: str, source: str, value: str):
+    """
+    저장된 분석 결과에 접근 로그를 연결합니다 (이미 연결된 행은 그대로 둠).
+    access_log_writer.after_persisted()로 로그가 기록된 뒤 호출합니다 (외래 키).
+    """
+    conn.execute(
+        update(IoC.__table__)
+        .where(IoC.__table__.c.id == ioc_id, IoC.__table__.c.access_log_id.is_(None))
+        .values(access_log_id=access_log_id)
+    )
+    ioc_cache.invalidate((source, value))
+
+
+def refresh_ioc_report(db: Session, ip: str) -> Optional[IoC]:
+    """
+    VirusTotal을 다시 조회해 저장된 결과를 갱신합니다 (없으면 새로 저장).
+    조회에 실패하면 기존 결과를 그대로 두고 None을 반환합니다.
+    """
+    if not VT_API_KEY:
+        return None
+    result = fetch_virustotal_ip(ip)
+    if result["status"] != 200 or not result["data"]:
+        return None
+
+    db_ioc = get_ioc_by_value(db, value=ip)
+    if db_ioc is None:
+        return create_ioc_report(db, ip=ip, vt_data=result["data"])
+    for column, value in _virustotal_counts(result["data"]).items():
+        setattr(db_ioc, column, value)
+    db_ioc.last_analyzed = datetime.now()
+    db.commit()
+    ioc_cache.invalidate((db_ioc.source, db_ioc.indicator_value))
+    verdict_index.record_ioc(
+        db_ioc.indicator_value, db_ioc.source, db_ioc.malicious_count,
+        db_ioc.suspicious_count, db_ioc.harmless_count, db_ioc.last_analyzed,
+    )
+    _refresh_access_verdict(db, db_ioc.indicator_value)
+    return db_ioc
@@ -0,0 +1,95 @@
+"""
+압축 저장 이전 행의 raw_data 이전
+
+예전 JSON 컬럼(raw_data)에 남아 있는 원시 데이터를 압축 컬럼(raw_blob)으로 옮기고,
+원시 데이터에서만 알 수 있던 status/suspicious_count/quick scan 대기 상태를 컬럼에 채웁니다.
+chunk_size 행씩 커밋하므로 중간에 멈춰도 다시 실행하면 이어서 처리합니다.
+
+CLI:
+    python -m app.crud.raw_storage --chunk-size 1000
+"""
+
+import argparse
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session, undefer_group
+
+from app.models.cti import CTI
+from app.models.ioc import IoC
+
+
+def _legacy_status(raw: Dict[str, Any]) -> Optional[int]:
+    status = raw.get("status")
+    if "error" in raw:
+        return status if isinstance(status, int) and status >= 400 else 500
+    return status if isinstance(status, int) else 200
+
+
+def _backfill_cti(row: CTI, raw: Any):
+    if not isinstance(raw, dict):
+        return
+    if row.status is None:
+        row.status = _legacy_status(raw)
+    stats = raw.get("stats") if isinstance(raw.get("stats"), dict) else {}
+    if row.tag == "virustotal" and isinstance(stats.get("suspicious"), int):
+        row.suspicious_count = stats["suspicious"]
+    if row.tag == "hybrid" and raw.get("scan_type") == "quick_scan_submitted" and raw.get("job_id"):
+        row.scan_job_id = str(raw["job_id"])[:64]
+        next_poll_at = raw.pop("next_poll_at", None)
+        if isinstance(next_poll_at, (int, float)):
+            row.next_poll_at = datetime.fromtimestamp(next_poll_at)
+
+
+def _migrate_table(db: Session, model, chunk_size: int, backfill=None) -> int:
+    migrated = 0
+    while True:
+        rows = (
+            db.query(model)
+            .options(undefer_group("raw"))
+            .filter(model.raw_blob.is_(None), model.raw_data_legacy.isnot(None))
+            .order_by(model.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            return migrated
+        try:
+            for row in rows:
+                raw = row.raw_data_legacy
+                if backfill:
+                    backfill(row, raw)
+                row.raw_data = raw  # 압축 컬럼에 저장하고 예전 컬럼은 비움
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        migrated += len(rows)
+        print(f"📦 {model.__tablename__}: {migrated}행 이전")
+
+
+def migrate_raw_data(db: Session, chunk_size: int = 1000) -> Dict[str, int]:
+    """CTITable/IoCTable의 예전 raw_data를 압축 컬럼으로 옮기고 이전한 행 수를 반환합니다."""
+    return {
+        "cti": _migrate_table(db, CTI, chunk_size, _backfill_cti),
+        "ioc": _migrate_table(db, IoC, chunk_size),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="예전 raw_data JSON 컬럼을 압축 컬럼으로 이전합니다.")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app.database import db
+
+    session = db.Session()
+    try:
+        print(json.dumps(migrate_raw_data(session, args.chunk_size), indent=2))
+    finally:
+        db.Session.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+프로바이더 결과를 하나의 위험도로 합치는 점수 엔진
+
+프로바이더마다 malicious_score의 의미가 다릅니다.
+- VirusTotal: 커뮤니티 평판(reputation, 음수일수록 악성)
+- Hybrid Analysis: threat_score(0-100) 또는 quick scan 악성 판정 비율
+- urlscan: 과거 스캔 중 악성 판정 비율(0-100)
+
+이를 0-100 위험도(risk_score)로 정규화해 행마다 저장하고, 지표의 최신 프로바이더 결과들을
+설정한 가중치로 평균해 종합 위험도와 판정을 만듭니다.
+판정할 수 없는 결과(오류, quick scan 대기, Hybrid/urlscan의 탐지 0건)는 NaN으로 두고 평균에서 뺍니다.
+(Hybrid Analysis/urlscan의 탐지 0건은 '분석 기록 없음'일 수 있음)
+
+점수 공식은 numpy 배열 단위로 계산하므로 공식을 바꾼 뒤 CTITable 전체를 청크 단위로 다시 계산할 수 있습니다.
+
+CLI:
+    python -m app.crud.scoring --chunk-size 10000
+    python -m app.crud.scoring --dry-run
+"""
+
+import argparse
+import json
+import math
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.core.config import conf
+from app.core.singleflight import normalize_indicator
+from app.core.verdict_index import HARMLESS, MALICIOUS, SUSPICIOUS
+from app.models.cti import CTI
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# 종합 위험도에서 프로바이더별 가중치 (결과가 없는 프로바이더는 빼고 다시 정규화)
+RISK_WEIGHTS: Dict[str, float] = {
+    "virustotal": 0.5,
+    "hybrid": 0.25,
+    "urlscan": 0.25,
+    **conf.get("risk_weights", {}),
+}
+
+# 종합 위험도 판정 기준 (이 값 이상이면 해당 판정)
+RISK_THRESHOLDS: Dict[str, float] = {
+    MALICIOUS: 60,
+    SUSPICIOUS: 25,
+    **conf.get("risk_thresholds", {}),
+}
+
+# VirusTotal에서 이 수만큼 엔진이 악성으로 판정하면 위험도 100 (의심 판정은 절반으로 계산)
+VT_DETECT_SATURATION = float(conf.get("risk_vt_detect_saturation", 5))
+
+PROVIDERS = ("virustotal", "hybrid", "urlscan")
+_TAG_CODES = {tag: code for code, tag in enumerate(PROVIDERS)}
+_VT, _HYBRID, _URLSCAN = (_TAG_CODES[tag] for tag in PROVIDERS)
+
+# 점수 계산에 필요한 컬럼 (원시 데이터는 읽지 않음)
+SCORE_COLUMNS = (
+    CTI.tag, CTI.malicious_score, CTI.detect_count, CTI.suspicious_count, CTI.status, CTI.scan_job_id,
+)
+
+
+def provider_risk(
+    tags: Sequence[Optional[str]],
+    malicious_score: Sequence[Optional[int]],
+    detect_count: Sequence[Optional[int]],
+    suspicious_count: Sequence[Optional[int]],
+    status: Sequence[Optional[int]],
+    pending: Sequence[Any],
+) -> np.ndarray:
+    """
+    행 단위 컬럼 값들을 0-100 위험도 배열로 변환합니다 (판정할 수 없는 행은 NaN).
+    pending은 scan_job_id처럼 결과를 기다리는 중이면 참인 값입니다.
+    """
+    n = len(tags)
+    code = np.fromiter((_TAG_CODES.get(tag, -1) for tag in tags), dtype=np.int8, count=n)
+    score = _to_array(malicious_score, n)
+    detect = _to_array(detect_count, n)
+    suspicious = _to_array(suspicious_count, n)
+    status_code = np.fromiter((-1 if s is None else s for s in status), dtype=np.int32, count=n)
+    waiting = np.fromiter((bool(p) for p in pending), dtype=bool, count=n)
+
+    vt_detection = np.clip((detect + suspicious * 0.5) / VT_DETECT_SATURATION * 100, 0, 100)
+    vt_reputation = np.clip(-score, 0, 100)
+    risk = np.select(
+        [code == _VT, code == _HYBRID, code == _URLSCAN],
+        [np.maximum(vt_detection, vt_reputation), np.clip(score, 0, 100), np.clip(score, 0, 100)],
+        default=np.nan,
+    )
+
+    positive = (risk > 0) | (detect > 0)
+    unknown = (
+        (status_code >= 400)
+        | waiting
+        # Hybrid/urlscan의 탐지 0건은 분석 기록이 없다는 뜻일 수 있음
+        | ((code != _VT) & ~positive)
+        # status가 없는 행(압축 저장 이전)은 오류 여부를 알 수 없으므로 탐지가 있을 때만 사용
+        | ((status_code < 0) & ~positive)
+    )
+    risk[unknown] = np.nan
+    return np.round(risk)
+
+
+def _to_array(values: Sequence[Optional[int]], n: int) -> np.ndarray:
+    return np.fromiter((0 if v is None else v for v in values), dtype=np.float64, count=n)
+
+
+def score_cti(item: Any) -> Optional[int]:
+    """CTI 모델/스키마 객체 하나의 위험도"""
+    return score_items([item])[0]
+
+
+def score_items(items: Sequence[Any]) -> List[Optional[int]]:
+    """CTI 모델/스키마 객체들의 위험도 (판정할 수 없으면 None)"""
+    if not items:
+        return []
+    risk = provider_risk(
+        [item.tag for item in items],
+        [item.malicious_score for item in items],
+        [item.detect_count for item in items],
+        [item.suspicious_count for item in items],
+        [item.status for item in items],
+        [getattr(item, "scan_job_id", None) for item in items],
+    )
+    return [None if math.isnan(value) else int(value) for value in risk]
+
+
+def risk_verdict(risk_score: Optional[float]) -> Optional[str]:
+    if risk_score is None:
+        return None
+    if risk_score >= RISK_THRESHOLDS[MALICIOUS]:
+        return MALICIOUS
+    if risk_score >= RISK_THRESHOLDS[SUSPICIOUS]:
+        return SUSPICIOUS
+    return HARMLESS
+
+
+def combine_risk(provider_scores: Dict[str, Optional[int]]) -> Dict[str, Any]:
+    """프로바이더별 위험도를 가중 평균한 종합 위험도와 판정"""
+    scored = {tag: score for tag, score in provider_scores.items() if score is not None}
+    weights = {tag: float(RISK_WEIGHTS.get(tag, 0)) for tag in scored}
+    total_weight = sum(weights.values())
+    risk_score = None
+    if total_weight > 0:
+        risk_score = round(sum(scored[tag] * weight for tag, weight in weights.items()) / total_weight)
+    return {
+        "risk_score": risk_score,
+        "verdict": risk_verdict(risk_score),
+        "providers": provider_scores,
+    }
+
+
+def get_indicator_risk(db: Session, search_item: str) -> Dict[str, Any]:
+    """
+    지표의 프로바이더별 최신 결과로 종합 위험도를 계산합니다.
+    (search_item, tag, last_analyzed) 인덱스로 프로바이더마다 한 행만 읽습니다.
+    """
+    search_item = normalize_indicator(search_item)
+    latest = []
+    for tag in PROVIDERS:
+        row = (
+            db.query(*SCORE_COLUMNS, CTI.last_analyzed)
+            .filter(CTI.search_item == search_item, CTI.tag == tag)
+            .order_by(CTI.last_analyzed.desc(), CTI.id.desc())
+            .first()
+        )
+        if row is not None:
+            latest.append(row)
+
+    result = combine_risk(dict(zip((row.tag for row in latest), score_items(latest))))
+    result["indicator"] = search_item
+    result["last_analyzed"] = max((row.last_analyzed for row in latest), default=None)
+    return result
+
+
+async def get_indicator_risk_async(db: "AsyncSession", search_item: str) -> Dict[str, Any]:
+    """get_indicator_risk의 AsyncSession 버전"""
+    return await db.run_sync(get_indicator_risk, search_item)
+
+
+def rescore_cti(db: Session, chunk_size: int = 10000, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    CTITable 전체의 risk_score를 현재 공식으로 다시 계산합니다.
+    id 순서로 chunk_size 행씩 필요한 컬럼만 읽어 배열로 계산하고, 값이 바뀐 행만 한 번의 executemany로 갱신합니다.
+    """
+    table = CTI.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(risk_score=bindparam("new_risk_score"))
+    )
+    last_id = 0
+    scanned = changed = 0
+    histogram = np.zeros(11, dtype=np.int64)  # 0-9, 10-19, ..., 100
+    unknown = 0
+    while True:
+        rows = (
+            db.query(CTI.id, CTI.risk_score, *SCORE_COLUMNS)
+            .filter(CTI.id > last_id)
+            .order_by(CTI.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        ids, old, tags, scores, detects, suspicious, statuses, pending = zip(*rows)
+        last_id = ids[-1]
+        scanned += len(rows)
+
+        risk = provider_risk(tags, scores, detects, suspicious, statuses, pending)
+        known = ~np.isnan(risk)
+        unknown += int((~known).sum())
+        histogram += np.bincount((risk[known] // 10).astype(np.int64), minlength=11)
+
+        previous = np.fromiter((np.nan if v is None else v for v in old), dtype=np.float64, count=len(old))
+        diff = ~((previous == risk) | (np.isnan(previous) & np.isnan(risk)))
+        updates = [
+            {"row_id": ids[i], "new_risk_score": None if np.isnan(risk[i]) else int(risk[i])}
+            for i in np.flatnonzero(diff)
+        ]
+        changed += len(updates)
+        if updates and not dry_run:
+            try:
+                db.execute(stmt, updates)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        print(f"📊 CTITable: {scanned}행 계산, {changed}행 변경")
+
+    return {
+        "scanned": scanned,
+        "changed": changed,
+        "dry_run": dry_run,
+        "unknown": unknown,
+        "histogram": {(f"{i * 10}-{i * 10 + 9}" if i < 10 else "100"): int(c) for i, c in enumerate(histogram)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CTITable의 risk_score를 현재 점수 공식으로 다시 계산합니다.")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--dry-run", action="store_true", help="변경될 행 수와 분포만 출력")
+    args = parser.parse_args()
+
+    from app.database import db
+
+    session = db.Session()
+    try:
+        print(json.dumps(rescore_cti(session, args.chunk_size, args.dry_run), indent=2))
+    finally:
+        db.Session.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
 import asyncio
-import re
+from datetime import datetime, timedelta
+from typing import Optional
+from app.crud.ioc import get_ioc_type, get_ioc_report_async
 from app.crud.wiki import wiki_crawler
 from app.crud.wiki_summarizer import wiki_summarizer
-from app.crud.cti import analyze_with_virustotal, analyze_ip_with_virustotal_for_slack
+from app.crud.cti import (
+    CTI_CACHE_MAX_AGE, analyze_with_virustotal, analyze_ip_with_virustotal_for_slack, get_cached_cti_async,
+)
+from app.core.rate_limit import request_priority, PRIORITY_INTERACTIVE
+from app.core.verdict_index import verdict_index
+from app.database import async_db
+from app.schemas.ioc import IoC as IoCSchema
 
 
 def handle_bobbot_command(user_id: str, channel_id: str, text: str) -> dict:
@@ -20,6 +28,7 @@ def handle_bobbot_command(user_id: str, channel_id: str, text: str) -> dict:
 • `/bobbot help` - 도움말 보기
 • `/bobbot bobwiki [이름]` - BOB 14기 위키에서 교육생 검색
 • `/bobbot ioc [도메인/IP]` - IoC 위험도 분석 (VirusTotal)
+• `/bobbot check [도메인/IP/CIDR]` - 이미 분석/수집한 지표인지 바로 확인
 
 **IoC 분석 예시:**
 • `/bobbot ioc naver.com` - 도메인 분석
@@ -57,6 +66,14 @@ def handle_bobbot_command(user_id: str, channel_id: str, text: str) -> dict:
             
             ioc_value = command_parts[1]
             return handle_ioc_command(ioc_value)
+        
+        elif command == "check":
+            if len(command_parts) < 2:
+                return {
+                    "response_type": "ephemeral",
+                    "text": "❌ 사용법: `/bobbot check [도메인/IP/CIDR]`\n예시: `/bobbot check evil.example.com`"
+                }
+            return handle_check_command(command_parts[1])
     
     # 기본 인사 메시지
     greeting_message = "안녕하세요! 👋\n저는 BOB 14기 보안 분석 챗봇입니다.\n도움이 필요하시면 언제든 말씀해주세요!"
@@ -121,6 +138,8 @@ def handle_bobwiki_command(search_term: str) -> dict:
 
 def handle_ioc_command(ioc_value: str) -> dict:
     """IoC 분석 처리 함수"""
+    # Slack 조회는 배치 작업보다 먼저 프로바이더 호출 토큰을 받음
+    priority_token = request_priority.set(PRIORITY_INTERACTIVE)
     try:
         # 1. 입력값 검증 및 정리
         cleaned_ioc = ioc_value.strip()
@@ -130,22 +149,14 @@ def handle_ioc_command(ioc_value: str) -> dict:
         if not ioc_type:
             return {
                 "response_type": "ephemeral",
-                "text": f"❌ 올바르지 않은 형식입니다: `{cleaned_ioc}`\n\n**지원 형식:**\n• 도메인: example.com, sub.example.com\n• IP 주소: 192.168.1.1, 8.8.8.8\n\n**사용법:** `/bobbot ioc naver.com`"
+                "text": f"❌ 올바르지 않은 형식입니다: `{cleaned_ioc}`\n\n**지원 형식:**\n• 도메인: example.com, sub.example.com\n• IP 주소: 192.168.1.1, 8.8.8.8, 2001:4860:4860::8888\n\n**사용법:** `/bobbot ioc naver.com`"
             }
         
         # 3. IP와 도메인에 따라 다른 API 호출
         if ioc_type == "ip":
             vt_result = analyze_ip_with_virustotal_for_slack(cleaned_ioc)
         else:  # domain
-            # CTI 형식을 슬랙 형식으로 변환
-            cti_result = analyze_with_virustotal(cleaned_ioc)
-            vt_result = {
-                "status": cti_result.get("raw_data", {}).get("status", cti_result.get("status", 500)),
-                "reputation": cti_result.get("malicious_score", 0),
-                "stats": cti_result.get("raw_data", {}).get("stats", {}),
-                "country": cti_result.get("country"),
-                "as_owner": cti_result.get("raw_data", {}).get("as_owner"),
-            }
+            vt_result = _vt_result_from_cti(analyze_with_virustotal(cleaned_ioc))
         
         # 4. 결과 포맷팅
         formatted_result = format_ioc_result(cleaned_ioc, vt_result, ioc_type)
@@ -160,24 +171,91 @@ def handle_ioc_command(ioc_value: str) -> dict:
             "response_type": "ephemeral",
             "text": f"❌ IoC 분석 중 오류가 발생했습니다: {str(e)}"
         }
+    finally:
+        request_priority.reset(priority_token)
 
 
-def get_ioc_type(ioc_value: str) -> str:
-    """IoC 타입 판별 (ip 또는 domain 또는 None)"""
-    # IP 주소 형식 검증
-    ip_pattern = r'^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$'
-    
-    # 도메인 형식 검증 (간단한 패턴)
-    domain_pattern = r'^[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*$'
-    
-    if re.match(ip_pattern, ioc_value):
-        return "ip"
-    elif re.match(domain_pattern, ioc_value):
-        return "domain"
-    else:
+async def handle_ioc_command_async(ioc_value: str) -> dict:
+    """
+    handle_ioc_command의 async 버전 (Slack 소켓 핸들러용).
+    캐시 유효 시간 안에 저장된 VirusTotal 결과가 있으면 async 세션으로 읽어 바로 응답하고,
+    없으면 외부 API 분석을 스레드에서 실행합니다.
+    """
+    cleaned_ioc = ioc_value.strip()
+    ioc_type = get_ioc_type(cleaned_ioc)
+    if ioc_type:
+        vt_result = await _stored_vt_result(cleaned_ioc, ioc_type)
+        if vt_result is not None:
+            return {
+                "response_type": "ephemeral",
+                "text": format_ioc_result(cleaned_ioc, vt_result, ioc_type)
+            }
+    return await asyncio.to_thread(handle_ioc_command, ioc_value)
+
+
+async def _stored_vt_result(ioc_value: str, ioc_type: str) -> Optional[dict]:
+    """저장된 VirusTotal 결과를 슬랙 형식으로 (없거나 오래됐거나 조회에 실패하면 None)"""
+    max_age = CTI_CACHE_MAX_AGE.get("virustotal", 0)
+    if max_age <= 0:
+        return None
+    try:
+        async with async_db.session() as session:
+            if ioc_type == "ip":
+                report = await get_ioc_report_async(session, ioc_value)
+                if report is None or report.last_analyzed < datetime.now() - timedelta(seconds=max_age):
+                    return None
+                return _vt_result_from_report(report)
+            cached = await get_cached_cti_async(session, ioc_value, "virustotal", max_age)
+            return None if cached is None else _vt_result_from_cti(cached.model_dump())
+    except Exception as e:
+        print(f"⚠️ 저장된 IoC 결과 조회 실패 ({ioc_value}): {e}")
         return None
 
 
+def _vt_result_from_cti(cti_result: dict) -> dict:
+    """CTI 형식(analyze_with_virustotal 결과/저장된 CTI 행)을 슬랙 형식으로 변환"""
+    raw_data = cti_result.get("raw_data") or {}
+    return {
+        "status": raw_data.get("status", cti_result.get("status", 500)),
+        "reputation": cti_result.get("malicious_score", 0),
+        "stats": raw_data.get("stats", {}),
+        "country": cti_result.get("country"),
+        "as_owner": raw_data.get("as_owner"),
+        "error": raw_data.get("error"),
+    }
+
+
+def _vt_result_from_report(report: IoCSchema) -> dict:
+    """저장된 IP 분석 결과(IoCTable)를 슬랙 형식으로 변환 (국가/AS 정보는 저장하지 않음)"""
+    return {
+        "status": 200,
+        "reputation": report.reputation,
+        "stats": {
+            "malicious": report.malicious_count,
+            "suspicious": report.suspicious_count,
+            "harmless": report.harmless_count,
+        },
+    }
+
+
+def handle_check_command(ioc_value: str) -> dict:
+    """판정 인덱스에서 이미 알려진 지표인지 확인 (외부 API/DB 조회 없음)"""
+    match = verdict_index.lookup(ioc_value)
+    if match is None:
+        text = f"❔ `{ioc_value}`은(는) 아직 분석/수집된 기록이 없습니다.\n`/bobbot ioc {ioc_value}`로 분석해보세요."
+    else:
+        icon = {"malicious": "🚨", "suspicious": "⚠️", "harmless": "✅"}.get(match["verdict"], "❔")
+        matched = "" if match["exact"] else f" (`{match['matched']}`에 포함)"
+        text = (
+            f"{icon} `{match['indicator']}`: **{match['verdict']}**{matched}\n"
+            f"출처: {match['source']} · 마지막 분석: {match['last_analyzed'][:19]}"
+        )
+    return {
+        "response_type": "ephemeral",
+        "text": text
+    }
+
+
 def is_valid_ioc_format(ioc_value: str) -> bool:
     """IoC 형식 검증 (도메인 또는 IP) - 이전 버전과의 호환성"""
     return get_ioc_type(ioc_value) is not None
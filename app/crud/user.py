@@ -1,12 +1,15 @@
-import hashlib
-import os
 import base64
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, Tuple
 from datetime import datetime
+from app.core.access_log_writer import access_log_id
+from app.core.cache import TwoTierCache, run_sync, shared_tier
+from app.core.password_hasher import password_hasher, encode_hash, HASH_ITERATIONS
 from app.models.user import User, AccessLog
 from app.schemas import user as user_schema
-from typing import Optional
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
@@ -14,46 +17,64 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
 def get_user_by_username(db: Session, username: str) -> Optional[User]:
     return db.query(User).filter(User.username == username).first()
 
+# user_id -> 사용자 (없으면 None)
+user_cache = TwoTierCache("user", user_schema.User, shared_tier)
+
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
-def create_user(db: Session, user: user_schema.UserCreate) -> User:
-    salt = os.urandom(16)
-    hashed_password = hashlib.pbkdf2_hmac(
-        'sha256',
-        user.password.encode(),
-        salt,
-        100000
-    )
-    
+def _load_user(db: Session, user_id: int) -> Optional[user_schema.User]:
+    row = get_user_by_id(db, user_id=user_id)
+    return None if row is None else user_schema.User.model_validate(row)
+
+def get_user(db: Session, user_id: int) -> Optional[user_schema.User]:
+    """get_user_by_id의 캐시 버전 (스키마 객체 반환, 없는 사용자도 잠시 캐시)"""
+    return user_cache.get_or_load(user_id, lambda: _load_user(db, user_id))
+
+def create_user(db: Session, user: user_schema.UserCreate, credentials: Optional[Tuple[str, str]] = None) -> User:
+    """credentials는 미리 계산한 (salt, 해시). 없으면 프로세스 풀에서 계산하고 결과를 기다립니다."""
+    salt, hashed_password = credentials or password_hasher.hash(user.password)
+
     db_user = User(
         email=user.email,
         username=user.username,
-        salt=base64.b64encode(salt).decode(),
-        hashed_password=base64.b64encode(hashed_password).decode()
+        salt=salt,
+        hashed_password=hashed_password
     )
     
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    user_cache.invalidate(db_user.id)
     return db_user
 
-def verify_password(password: str, salt_b64: str, hashed_b64: str) -> bool:
-    salt = base64.b64decode(salt_b64)
-    stored_password = base64.b64decode(hashed_b64)
-    password_to_check = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode(),
-        salt,
-        100000
+def update_password_hash(db: Session, user_id: int, credentials: Tuple[str, str]):
+    """현재 반복 횟수로 다시 계산한 (salt, 해시)로 교체"""
+    salt, hashed_password = credentials
+    db.query(User).filter(User.id == user_id).update(
+        {User.salt: salt, User.hashed_password: hashed_password}, synchronize_session=False
     )
-    return password_to_check == stored_password
+    db.commit()
+
+def verify_password(password: str, salt_b64: str, hashed_b64: str) -> bool:
+    """프로세스 풀에서 검증 (반복 횟수는 저장된 해시 값에서 읽음)"""
+    return password_hasher.verify(password, salt_b64, hashed_b64)
+
+async def verify_password_async(password: str, salt_b64: str, hashed_b64: str) -> bool:
+    """verify_password의 async 버전 (결과를 기다리는 동안 스레드를 점유하지 않음)"""
+    return await password_hasher.verify_async(password, salt_b64, hashed_b64)
+
+# 없는 이메일로 로그인할 때도 같은 시간이 걸리도록 검증에 쓰는 값
+DUMMY_SALT = base64.b64encode(bytes(16)).decode()
+DUMMY_HASH = encode_hash(HASH_ITERATIONS, bytes(32))
 
 def create_access_log(db: Session, user_id: int, ip_address: Optional[str] = None) -> AccessLog:
-    """사용자 접근 로그를 IP 주소와 함께 생성하고 데이터베이스에 저장합니다."""
+    """
+    사용자 접근 로그를 IP 주소와 함께 생성하고 데이터베이스에 바로 저장합니다.
+    요청 경로에서는 버퍼에 모아 한 번에 저장하는 access_log_writer.log를 사용합니다.
+    """
     access_time = datetime.now()
-    data_to_hash = f"{access_time}{user_id}{ip_address}"
-    access_id = hashlib.sha256(data_to_hash.encode()).hexdigest()
+    access_id = access_log_id(access_time, user_id, ip_address)
 
     db_access_log = AccessLog(
         id=access_id,
@@ -66,4 +87,30 @@ def create_access_log(db: Session, user_id: int, ip_address: Optional[str] = Non
     db.add(db_access_log)
     db.commit()
     db.refresh(db_access_log)
-    return db_access_log
\ No newline at end of file
+    return db_access_log
+
+
+# ----- AsyncSession용 (async 라우트/Slack 핸들러) -----
+# 위 함수를 AsyncSession.run_sync로 실행하므로 DB I/O가 이벤트 루프를 막지 않음
+# (cache.run_sync로 실행해 캐시 공유 저장소 I/O도 스레드에서 처리)
+
+async def get_user_by_email_async(db: "AsyncSession", email: str) -> Optional[User]:
+    return await run_sync(db, get_user_by_email, email)
+
+async def get_user_by_username_async(db: "AsyncSession", username: str) -> Optional[User]:
+    return await run_sync(db, get_user_by_username, username)
+
+async def get_user_async(db: "AsyncSession", user_id: int) -> Optional[user_schema.User]:
+    return await user_cache.get_or_load_async(user_id, lambda: run_sync(db, _load_user, user_id))
+
+async def create_user_async(db: "AsyncSession", user: user_schema.UserCreate, credentials: Optional[Tuple[str, str]] = None) -> User:
+    """credentials가 없으면 프로세스 풀에서 해시를 계산하는 동안 이벤트 루프를 점유하지 않음"""
+    if credentials is None:
+        credentials = await password_hasher.hash_async(user.password)
+    return await run_sync(db, create_user, user, credentials)
+
+async def update_password_hash_async(db: "AsyncSession", user_id: int, credentials: Tuple[str, str]):
+    await run_sync(db, update_password_hash, user_id, credentials)
+
+async def create_access_log_async(db: "AsyncSession", user_id: int, ip_address: Optional[str] = None) -> AccessLog:
+    return await run_sync(db, create_access_log, user_id, ip_address)
@@ -1,19 +1,20 @@
-import requests
 from bs4 import BeautifulSoup
 from typing import List, Optional
 from urllib.parse import urljoin, quote
 import re
+from app.core.config import PROVIDER_BASE_URLS
+from app.core.http_client import http_client
 from app.schemas.wiki import WikiPage, WikiSearchResult
 
 
 class BOBWikiCrawler:
     def __init__(self):
-        self.base_url = "https://kitribob.wiki"
-        self.search_url = "https://kitribob.wiki/wiki/14기_교육생"
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.base_url = PROVIDER_BASE_URLS["wiki"]
+        self.search_url = f"{self.base_url}/wiki/14기_교육생"
+        # 커넥션 풀은 공용 HTTP 클라이언트를 사용하고, 위키용 헤더만 요청마다 지정
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+        }
     
     def search_student(self, student_name: str) -> WikiSearchResult:
         """14기 교육생 페이지에서 특정 학생 검색"""
@@ -21,7 +22,7 @@ class BOBWikiCrawler:
             print(f"🔍 '{student_name}' 검색 시작...")
             
             # 14기 교육생 메인 페이지 가져오기
-            response = self.session.get(self.search_url)
+            response = http_client.get(self.search_url, headers=self.headers)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -88,7 +89,7 @@ class BOBWikiCrawler:
         try:
             print(f"📖 페이지 크롤링: {url}")
             
-            response = self.session.get(url)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
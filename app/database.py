@@ -1,6 +1,17 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+from sqlalchemy import create_engine, exc, make_url
+from sqlalchemy.orm import Session, sessionmaker, scoped_session, declarative_base
+from sqlalchemy.pool import QueuePool
 from app.core.config import conf
+from app.core import json_codec
+
+if TYPE_CHECKING:
+    # async 세션은 선택 기능 (sqlalchemy[asyncio]/greenlet, 드라이버는 처음 사용할 때 import)
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 # Get database configuration
 db_config = conf['database']
@@ -11,15 +22,69 @@ DB_CONN = f'mysql+pymysql://{db_config["user"]}:{db_config["password"]}@{db_conf
 # Create declarative base
 Base = declarative_base()
 
+
+class TimedQueuePool(QueuePool):
+    """커넥션을 받기까지 기다린 시간을 집계하는 QueuePool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        waited = time.perf_counter() - started  # 새 커넥션을 여는 시간 포함
+        with self._wait_lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return conn
+
+    def wait_stats(self) -> dict:
+        with self._wait_lock:
+            return {
+                "size": self.size(),
+                "checked_out": self.checkedout(),
+                "overflow": self.overflow(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+def release_connection(session: Session):
+    """
+    외부 API 호출처럼 오래 기다리기 전에 호출합니다.
+    진행 중인 트랜잭션을 커밋해 커넥션을 풀에 돌려주며, 세션은 다음 쿼리에서 커넥션을 다시 받습니다.
+    (커밋 후 세션의 ORM 객체는 만료되므로 필요한 값은 미리 읽어 둘 것)
+    """
+    if session.in_transaction():
+        session.commit()
+
+
 class Database:
     def __init__(self):
         self.engine = create_engine(
             DB_CONN,
+            poolclass=TimedQueuePool,
             pool_pre_ping=True,
             pool_size=20,
             max_overflow=0,
             pool_recycle=3600,
-            connect_args={'connect_timeout': 10}
+            connect_args={'connect_timeout': 10},
+            # JSON 컬럼(raw_data) 인코딩/디코딩도 공용 인코더 사용
+            json_serializer=json_codec.dumps_str,
+            json_deserializer=json_codec.loads,
         )
         self.Session = scoped_session(
             sessionmaker(
@@ -29,6 +94,13 @@ class Database:
             )
         )
 
+    def pool_stats(self) -> dict:
+        """커넥션 풀 사용량과 checkout 대기 시간"""
+        pool = self.engine.pool
+        if isinstance(pool, TimedQueuePool):
+            return pool.wait_stats()
+        return {"status": pool.status()}
+
     def get_session(self):
         session = self.Session()
         try:
@@ -41,3 +113,116 @@ class Database:
 
 db = Database()
 get_session = db.get_session
+
+
+ASYNC_DB_URL = conf.get("async_database_url")  # 예: sqlite+aiosqlite:///./bobbot_local.db
+ASYNC_SQLITE_PATH = conf.get("async_sqlite_path", "bobbot_local.db")
+
+
+def _async_db_url() -> str:
+    """async_database_url, 없으면 같은 MySQL 설정으로 aiomysql, aiomysql도 없으면 로컬 SQLite(aiosqlite)"""
+    if ASYNC_DB_URL:
+        return ASYNC_DB_URL
+    try:
+        import aiomysql  # noqa: F401
+    except ImportError:
+        return f"sqlite+aiosqlite:///{ASYNC_SQLITE_PATH}"
+    return DB_CONN.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+
+
+class AsyncDatabase:
+    """
+    async 라우트/Slack 핸들러용 AsyncEngine과 세션 의존성
+    (scoped_session은 스레드 단위라 이벤트 루프에서 쓰면 루프를 막음)
+
+    설정한 async_database_url, 없으면 같은 MySQL 설정으로 aiomysql, aiomysql이 없으면
+    로컬 실행용 SQLite 파일(aiosqlite, async_sqlite_path)을 사용합니다.
+    엔진은 처음 사용할 때 만들고, 어떤 DB를 쓰는지 로그로 남깁니다.
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url  # 없으면 엔진을 만들 때 _async_db_url()
+        self._engine: Optional["AsyncEngine"] = None
+        self._session_factory = None
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    @property
+    def is_sqlite(self) -> bool:
+        return bool(self.url) and self.url.startswith("sqlite")
+
+    @property
+    def engine(self) -> "AsyncEngine":
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = self._create_engine()
+        return self._engine
+
+    def _create_engine(self) -> "AsyncEngine":
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+        fallback = self.url is None and not ASYNC_DB_URL
+        self.url = self.url or _async_db_url()
+        backend = make_url(self.url).render_as_string(hide_password=True)
+        if fallback and self.is_sqlite:
+            print(f"⚠️ aiomysql이 없어 async 세션은 로컬 SQLite를 사용합니다 ({backend}, MySQL과 별개의 DB)")
+        else:
+            print(f"🔌 async DB 세션: {backend}")
+        options = {
+            "json_serializer": json_codec.dumps_str,
+            "json_deserializer": json_codec.loads,
+        }
+        if not self.is_sqlite:
+            options.update(
+                pool_pre_ping=True,
+                pool_size=20,
+                max_overflow=0,
+                pool_recycle=3600,
+                connect_args={'connect_timeout': 10},
+            )
+        engine = create_async_engine(self.url, **options)
+        self._session_factory = sessionmaker(
+            bind=engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,  # 커밋 후 속성 접근이 암묵적인 동기 쿼리가 되지 않도록
+        )
+        return engine
+
+    async def _ensure_schema(self, engine: "AsyncEngine"):
+        # async_database_url로 지정한 SQLite는 MySQL과 별개의 DB이므로 처음 사용할 때 테이블 생성
+        if self._schema_ready or not self.is_sqlite:
+            return
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self._schema_ready = True
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator["AsyncSession"]:
+        """FastAPI 의존성 밖(Slack 핸들러 등)에서 쓰는 세션: async with async_db.session() as session"""
+        await self._ensure_schema(self.engine)
+        async with self._session_factory() as session:
+            try:
+                yield session
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def get_session(self) -> AsyncIterator["AsyncSession"]:
+        async with self.session() as session:
+            yield session
+
+    async def dispose(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+
+    def pool_stats(self) -> dict:
+        if self._engine is None:
+            return {"status": "not started"}
+        return {"status": self._engine.pool.status()}
+
+
+# 글로벌 인스턴스
+async_db = AsyncDatabase()
+get_async_session = async_db.get_session
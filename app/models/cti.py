@@ -1,5 +1,8 @@
-from sqlalchemy import Column, DateTime, Integer, String, JSON, ForeignKey
+from sqlalchemy import Column, DateTime, Index, Integer, String, JSON, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import deferred
+from app.core.config import conf
 from app.database import Base
+from app.models.types import CompressedJSON, raw_data_property
 
 # Virustotal – 백신 엔진의 결과 멜웨어 탐지 결과
 # Hybrid-analysis – 멜웨어 탐지 결과
@@ -15,5 +18,26 @@ class CTI(Base):
     tag = Column(String(100))  # 태그
     country = Column(String(50))  # 국가
     dns = Column(String(255))  # DNS 정보
-    raw_data = Column(JSON)  # 원시 데이터
-    last_analyzed = Column(DateTime(timezone=True), nullable=False)  # 마지막 분석 시간
\ No newline at end of file
+    status = Column(Integer)  # 프로바이더 응답 코드 (400 이상은 오류 결과)
+    risk_score = Column(Integer, nullable=True)  # 0-100으로 정규화한 위험도 (판정 불가면 NULL, app.crud.scoring)
+    suspicious_count = Column(Integer, default=0)  # 의심 판정 엔진 수 (VirusTotal)
+    last_analyzed = Column(DateTime(timezone=True), nullable=False)  # 마지막 분석 시간
+
+    # Hybrid Analysis quick scan 결과 대기 중인 작업 (결과를 받으면 NULL)
+    scan_job_id = Column(String(64), index=True)
+    next_poll_at = Column(DateTime)
+
+    # 원시 데이터: 압축해서 저장하고, raw_data에 접근할 때만 읽음
+    raw_blob = deferred(Column(CompressedJSON), group="raw")
+    raw_data_legacy = deferred(Column("raw_data", JSON(none_as_null=True)), group="raw")  # 압축 저장 이전 행 (마이그레이션 전)
+    raw_data = raw_data_property()
+
+    # 지표별/프로바이더별 최신 결과와 이력 조회용 (last_analyzed 역순 범위 스캔)
+    __table_args__ = (
+        Index("ix_cti_search_item_tag_analyzed", "search_item", "tag", "last_analyzed"),
+    )
+    # latest 저장 모드에서는 (search_item, tag)당 한 행만 유지 (ON DUPLICATE KEY UPDATE 기준 키)
+    if conf.get("cti_storage_mode", "history") == "latest":
+        __table_args__ += (
+            UniqueConstraint("search_item", "tag", name="uq_cti_search_item_tag"),
+        )
@@ -1,10 +1,12 @@
 from sqlalchemy import Column, DateTime, Integer, String, JSON, ForeignKey
+from sqlalchemy.orm import deferred
 from app.database import Base
+from app.models.types import CompressedJSON, raw_data_property
 
 class IoC(Base):
     __tablename__ = 'IoCTable'
     id = Column(Integer, primary_key=True, index=True)
-    access_log_id = Column(String(64), ForeignKey('AccessLogTable.id'), nullable=False) # 외래 키 추가
+    access_log_id = Column(String(64), ForeignKey('AccessLogTable.id'), nullable=True) # 외래 키 (직접 분석 시 NULL)
     indicator_type = Column(String(50), nullable=False)
     indicator_value = Column(String(255), nullable=False, index=True)
     source = Column(String(100), nullable=False)
@@ -12,5 +14,9 @@ class IoC(Base):
     suspicious_count = Column(Integer, default=0)
     harmless_count = Column(Integer, default=0)
     reputation = Column(Integer, default=0)
-    raw_data = Column(JSON)
-    last_analyzed = Column(DateTime(timezone=True), nullable=False)
\ No newline at end of file
+    last_analyzed = Column(DateTime(timezone=True), nullable=False)
+
+    # 원시 데이터: 압축해서 저장하고, raw_data에 접근할 때만 읽음
+    raw_blob = deferred(Column(CompressedJSON), group="raw")
+    raw_data_legacy = deferred(Column("raw_data", JSON(none_as_null=True)), group="raw")  # 압축 저장 이전 행 (마이그레이션 전)
+    raw_data = raw_data_property()
\ No newline at end of file
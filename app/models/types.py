@@ -0,0 +1,91 @@
+"""
+압축 저장 컬럼 타입
+
+원시 응답(raw_data)은 JSON으로 직렬화한 뒤 zstd(없으면 zlib)로 압축해 BLOB 컬럼에 저장합니다.
+첫 바이트에 압축 방식을 기록하므로 설정을 바꿔도 기존 값을 그대로 읽을 수 있습니다.
+"""
+
+import threading
+import zlib
+from typing import Any, Optional
+
+from sqlalchemy.dialects.mysql import MEDIUMBLOB
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from app.core import json_codec
+from app.core.config import conf
+
+try:
+    import zstandard  # 없으면 zlib으로 압축
+except ImportError:
+    zstandard = None
+
+_PLAIN = b"\x00"
+_ZLIB = b"\x01"
+_ZSTD = b"\x02"
+
+COMPRESSION = conf.get("raw_data_compression", "zstd" if zstandard else "zlib")  # zstd | zlib | none
+COMPRESSION_LEVEL = int(conf.get("raw_data_compression_level", 3))
+COMPRESS_MIN_BYTES = int(conf.get("raw_data_compress_min_bytes", 128))  # 이보다 작으면 압축하지 않음
+
+_local = threading.local()  # zstd 압축기 객체는 스레드 간에 공유할 수 없음
+
+
+def compress(data: bytes) -> bytes:
+    if len(data) < COMPRESS_MIN_BYTES or COMPRESSION == "none":
+        return _PLAIN + data
+    if COMPRESSION == "zstd" and zstandard is not None:
+        if not hasattr(_local, "compressor"):
+            _local.compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+        return _ZSTD + _local.compressor.compress(data)
+    return _ZLIB + zlib.compress(data, COMPRESSION_LEVEL)
+
+
+def decompress(blob: bytes) -> bytes:
+    header, body = blob[:1], blob[1:]
+    if header == _ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd로 압축된 raw_data를 읽으려면 zstandard 패키지가 필요합니다.")
+        if not hasattr(_local, "decompressor"):
+            _local.decompressor = zstandard.ZstdDecompressor()
+        return _local.decompressor.decompress(body)
+    if header == _ZLIB:
+        return zlib.decompress(body)
+    return body
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON 값을 압축해서 BLOB으로 저장하는 컬럼 (MySQL에서는 MEDIUMBLOB)"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(MEDIUMBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return compress(json_codec.dumps(value))
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Any:
+        if value is None:
+            return None
+        return json_codec.loads(decompress(bytes(value)))
+
+
+def raw_data_property():
+    """
+    압축 컬럼(raw_blob)과 마이그레이션 전 JSON 컬럼(raw_data_legacy)을 하나의 raw_data로 보여주는 속성.
+    두 컬럼 모두 deferred이므로 raw_data에 접근할 때만 읽습니다. 새 값은 항상 압축 컬럼에 저장합니다.
+    """
+    def getter(self):
+        value = self.raw_blob
+        return value if value is not None else self.raw_data_legacy
+
+    def setter(self, value):
+        self.raw_blob = value
+        self.raw_data_legacy = None
+
+    return property(getter, setter)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, String, func, ForeignKey
+from sqlalchemy import Column, DateTime, Index, Integer, String, func, ForeignKey
 from app.database import Base
 
 class User(Base):
@@ -17,4 +17,33 @@ class AccessLog(Base):
     user_id = Column(Integer, ForeignKey('UserTable.id'), nullable=False)
     ip_address = Column(String(45), index=True) # IP 주소 컬럼 추가
     access_time = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
-    action = Column(String(50), nullable=False)
\ No newline at end of file
+    action = Column(String(50), nullable=False)
+
+class AccessLogHourly(Base):
+    """사용자/IP/시간(정시 기준)별 접근 수 (접근 로그를 저장할 때 함께 누적)"""
+    __tablename__ = 'AccessLogHourlyTable'
+    user_id = Column(Integer, ForeignKey('UserTable.id'), primary_key=True)
+    ip_address = Column(String(45), primary_key=True)
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    hits = Column(Integer, nullable=False, default=0)
+    last_seen = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index('ix_access_hourly_user_hour', 'user_id', 'hour'),
+        Index('ix_access_hourly_ip_hour', 'ip_address', 'hour'),
+    )
+
+class AccessIPSummary(Base):
+    """IP별 누적 접근 수와 IoC 판정"""
+    __tablename__ = 'AccessIPSummaryTable'
+    ip_address = Column(String(45), primary_key=True)
+    hits = Column(Integer, nullable=False, default=0)
+    first_seen = Column(DateTime(timezone=True), nullable=False)
+    last_seen = Column(DateTime(timezone=True), nullable=False)
+    verdict = Column(String(20), nullable=True)  # malicious/suspicious/harmless, 모르면 NULL
+    verdict_source = Column(String(100), nullable=True)
+    verdict_updated = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_access_ip_verdict_last_seen', 'verdict', 'last_seen'),
+    )
@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -11,18 +11,32 @@ class CTIBase(BaseModel):
     tag: str = Field(..., description="데이터 출처 식별자: virustotal|hybrid|urlscan 등")
     country: Optional[str] = None
     dns: Optional[str] = None
+    status: Optional[int] = None  # 프로바이더 응답 코드
+    suspicious_count: Optional[int] = 0
+    risk_score: Optional[int] = None  # 0-100으로 정규화한 위험도 (판정 불가면 None)
     raw_data: Optional[Any] = None
 
 
 class CTICreate(CTIBase):
     last_analyzed: datetime
+    scan_job_id: Optional[str] = None  # 결과를 기다리는 Hybrid Analysis quick scan 작업
+    next_poll_at: Optional[datetime] = None
 
 
 class CTI(CTIBase):
-    id: int
+    id: Optional[int] = None  # 저장되지 않은 결과(예: 마감 시간 초과)는 None
     last_analyzed: datetime
 
     class Config:
         # pydantic v1/v2 호환 설정
         orm_mode = True
         from_attributes = True
+
+
+class CTIRisk(BaseModel):
+    """프로바이더별 최신 결과를 가중 평균한 종합 위험도"""
+    indicator: str
+    risk_score: Optional[int] = None  # 판정할 수 있는 결과가 없으면 None
+    verdict: Optional[str] = None  # malicious | suspicious | harmless
+    providers: Dict[str, Optional[int]] = {}  # 프로바이더별 위험도
+    last_analyzed: Optional[datetime] = None
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Any, Optional
 
 class IoCBase(BaseModel):
-    access_log_id: str
+    access_log_id: Optional[str] = None  # /ioc/analyze/ip로 직접 분석한 경우 None
     indicator_type: str
     indicator_value: str
     source: str
@@ -21,4 +21,16 @@ class IoC(IoCBase):
     last_analyzed: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class VerdictCheck(BaseModel):
+    """메모리 판정 인덱스 조회 결과 (DB/외부 API 조회 없음)"""
+    indicator: str
+    known: bool
+    verdict: Optional[str] = None  # malicious | suspicious | harmless
+    source: Optional[str] = None  # 판정을 낸 출처 (VirusTotal, feed:<이름>, CTI 태그 등)
+    matched: Optional[str] = None  # 일치한 값 (상위 도메인이나 CIDR일 수 있음)
+    exact: Optional[bool] = None
+    last_analyzed: Optional[datetime] = None
+    index_loaded: bool
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from datetime import datetime
 
@@ -18,3 +18,28 @@ class User(UserBase):
     created_at: datetime | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+class UserIPActivity(BaseModel):
+    ip_address: str
+    hits: int
+    last_seen: datetime
+    verdict: Optional[str] = None
+
+class IPAccessSummary(BaseModel):
+    ip_address: str
+    hits: int
+    first_seen: datetime
+    last_seen: datetime
+    verdict: Optional[str] = None
+    verdict_source: Optional[str] = None
+    verdict_updated: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class FlaggedUserAccess(BaseModel):
+    user_id: int
+    hits: int
+    ip_count: int
+    last_seen: datetime
+    ip_addresses: List[str]
+
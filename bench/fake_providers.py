@@ -0,0 +1,221 @@
+"""
+벤치마크용 가짜 외부 API 서버 (VirusTotal, Hybrid Analysis, urlscan, BOB 위키)
+
+bench/payloads/에 녹화해 둔 응답을 지표 값만 바꿔서 돌려주며,
+프로바이더별 지연 시간/지터/오류율을 지정해 느린 응답이나 장애 상황을 재현할 수 있습니다.
+"evil"이 들어간 도메인은 악성 결과를, 나머지는 정상 결과를 돌려줍니다.
+
+실행:
+    python -m bench.fake_providers --port 9000 --latency virustotal=0.3 --latency hybrid=0.8 \
+        --jitter 0.2 --error-rate urlscan=0.1
+
+conf.json의 provider_base_urls를 이 서버 주소로 지정하면 앱이 실제 벤더 대신 이 서버를 호출합니다.
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import random
+import uuid
+from pathlib import Path
+from typing import Any, Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+
+PAYLOAD_DIR = Path(__file__).parent / "payloads"
+PROVIDERS = ("virustotal", "hybrid", "urlscan", "wiki")
+
+# 프로바이더별 동작 설정 (CLI 인자로 덮어씀)
+settings: Dict[str, Any] = {
+    "latency": {provider: 0.0 for provider in PROVIDERS},  # 평균 응답 지연(초)
+    "error_rate": {provider: 0.0 for provider in PROVIDERS},  # 오류 응답 비율 (0~1)
+    "jitter": 0.0,  # 지연 시간 변동 폭 (0.2면 ±20%)
+    "error_status": 503,
+    "quick_scan_polls": 2,  # quick-scan이 끝났다고 응답하기 전까지의 조회 횟수
+}
+
+# 호출 통계 (GET /_stats)
+stats: Dict[str, Dict[str, int]] = {provider: {"requests": 0, "errors": 0} for provider in PROVIDERS}
+quick_scan_polls: Dict[str, int] = {}
+
+
+def _load(name: str) -> Any:
+    path = PAYLOAD_DIR / name
+    if path.suffix == ".json":
+        return json.loads(path.read_text(encoding="utf-8"))
+    return path.read_text(encoding="utf-8")
+
+
+PAYLOADS = {
+    "vt_domain": _load("virustotal_domain.json"),
+    "vt_domain_malicious": _load("virustotal_domain_malicious.json"),
+    "vt_ip": _load("virustotal_ip.json"),
+    "ha_search": _load("hybrid_search_terms.json"),
+    "ha_submit": _load("hybrid_quick_scan_submit.json"),
+    "ha_result": _load("hybrid_quick_scan_result.json"),
+    "urlscan": _load("urlscan_search.json"),
+    "wiki_index": _load("wiki_index.html"),
+    "wiki_page": _load("wiki_page.html"),
+}
+
+app = FastAPI(title="Fake CTI providers")
+
+
+async def _simulate(provider: str):
+    """설정된 지연을 적용하고, 오류를 주입해야 하면 오류 응답을 반환합니다."""
+    stats[provider]["requests"] += 1
+    latency = settings["latency"][provider]
+    if latency > 0:
+        jitter = settings["jitter"]
+        await asyncio.sleep(max(0.0, latency * random.uniform(1 - jitter, 1 + jitter)))
+    if random.random() < settings["error_rate"][provider]:
+        stats[provider]["errors"] += 1
+        status = settings["error_status"]
+        return JSONResponse(status_code=status, content={"error": {"code": "InjectedError", "message": f"fake {provider} error"}})
+    return None
+
+
+def _is_malicious(value: str) -> bool:
+    return "evil" in value.lower()
+
+
+async def _request_fields(request: Request) -> Dict[str, Any]:
+    """JSON 본문과 폼 본문을 모두 받음 (실제 Hybrid Analysis는 폼, 앱은 JSON으로 보냄)"""
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = await request.json()
+            return body if isinstance(body, dict) else {}
+        except ValueError:
+            return {}
+    return dict(await request.form())
+
+
+@app.get("/api/v3/domains/{domain}")
+async def virustotal_domain(domain: str):
+    if (error := await _simulate("virustotal")) is not None:
+        return error
+    payload = copy.deepcopy(PAYLOADS["vt_domain_malicious" if _is_malicious(domain) else "vt_domain"])
+    payload["data"]["id"] = domain
+    return payload
+
+
+@app.get("/api/v3/ip_addresses/{ip}")
+async def virustotal_ip(ip: str):
+    if (error := await _simulate("virustotal")) is not None:
+        return error
+    payload = copy.deepcopy(PAYLOADS["vt_ip"])
+    payload["data"]["id"] = ip
+    return payload
+
+
+@app.post("/api/v2/search/terms")
+async def hybrid_search_terms(request: Request):
+    if (error := await _simulate("hybrid")) is not None:
+        return error
+    domain = str((await _request_fields(request)).get("domain", ""))
+    if not _is_malicious(domain):
+        return {"search_terms": [{"id": "domain", "value": domain}], "count": 0, "result": []}
+    payload = copy.deepcopy(PAYLOADS["ha_search"])
+    payload["search_terms"][0]["value"] = domain
+    payload["result"][0]["submit_name"] = f"https://{domain}/"
+    return payload
+
+
+@app.post("/api/v2/quick-scan/url")
+async def hybrid_quick_scan_submit():
+    if (error := await _simulate("hybrid")) is not None:
+        return error
+    payload = copy.deepcopy(PAYLOADS["ha_submit"])
+    payload["id"] = uuid.uuid4().hex[:24]
+    quick_scan_polls[payload["id"]] = 0
+    return payload
+
+
+@app.get("/api/v2/quick-scan/{job_id}")
+async def hybrid_quick_scan(job_id: str):
+    if (error := await _simulate("hybrid")) is not None:
+        return error
+    polls = quick_scan_polls.get(job_id, settings["quick_scan_polls"])
+    quick_scan_polls[job_id] = polls + 1
+    payload = copy.deepcopy(PAYLOADS["ha_result" if polls >= settings["quick_scan_polls"] else "ha_submit"])
+    payload["id"] = job_id
+    return payload
+
+
+@app.get("/api/v1/search/")
+async def urlscan_search(q: str = ""):
+    if (error := await _simulate("urlscan")) is not None:
+        return error
+    domain = q.split(":", 1)[-1]
+    payload = copy.deepcopy(PAYLOADS["urlscan"])
+    for result in payload["results"]:
+        result["task"]["domain"] = domain
+        result["task"]["url"] = f"https://{domain}/"
+        result["page"]["domain"] = domain
+        result["page"]["url"] = f"https://{domain}/"
+        result["verdicts"]["overall"]["malicious"] = _is_malicious(domain)
+    return payload
+
+
+@app.get("/wiki/{title:path}", response_class=HTMLResponse)
+async def wiki_page(title: str):
+    if (error := await _simulate("wiki")) is not None:
+        return error
+    if title == "14기_교육생":
+        return PAYLOADS["wiki_index"]
+    return PAYLOADS["wiki_page"].replace("{name}", title)
+
+
+@app.get("/_stats")
+async def provider_stats():
+    """프로바이더별 받은 요청 수와 주입한 오류 수"""
+    return stats
+
+
+def _parse_provider_values(values, target: Dict[str, float], option: str):
+    """"provider=값" 또는 모든 프로바이더에 적용할 "값" 형식의 인자를 읽습니다."""
+    for value in values or []:
+        if "=" in value:
+            provider, number = value.split("=", 1)
+            if provider not in PROVIDERS:
+                raise SystemExit(f"{option}: 알 수 없는 프로바이더 '{provider}' ({', '.join(PROVIDERS)})")
+            target[provider] = float(number)
+        else:
+            for provider in PROVIDERS:
+                target[provider] = float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 가짜 외부 API 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", action="append", metavar="[PROVIDER=]SECONDS",
+                        help="응답 지연(초). 프로바이더를 생략하면 전체에 적용, 여러 번 지정 가능")
+    parser.add_argument("--error-rate", action="append", metavar="[PROVIDER=]RATE",
+                        help="오류 응답 비율 (0~1). 프로바이더를 생략하면 전체에 적용")
+    parser.add_argument("--jitter", type=float, default=0.0, help="지연 시간 변동 비율 (0.2 = ±20%%)")
+    parser.add_argument("--error-status", type=int, default=503, help="주입할 오류 응답 코드")
+    parser.add_argument("--quick-scan-polls", type=int, default=2,
+                        help="quick-scan 결과가 완료되기까지 필요한 조회 횟수")
+    parser.add_argument("--seed", type=int, help="지터/오류 주입 난수 시드")
+    args = parser.parse_args()
+
+    _parse_provider_values(args.latency, settings["latency"], "--latency")
+    _parse_provider_values(args.error_rate, settings["error_rate"], "--error-rate")
+    settings["jitter"] = args.jitter
+    settings["error_status"] = args.error_status
+    settings["quick_scan_polls"] = args.quick_scan_polls
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    print(f"🧪 가짜 프로바이더 서버 시작: http://{args.host}:{args.port}")
+    print(f"   지연: {settings['latency']} (지터 ±{args.jitter:.0%})")
+    print(f"   오류율: {settings['error_rate']} (HTTP {args.error_status})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+엔드포인트별 지연 시간/처리량 벤치마크
+
+실행 중인 앱(provider_base_urls를 bench/fake_providers.py로 지정)에 동시에 요청을 보내
+엔드포인트별 p50/p95/p99 지연 시간, 처리량, 오류 수를 출력합니다.
+--save로 결과를 저장해 두고 --baseline으로 비교하면 p95가 기준보다 나빠졌을 때 종료 코드 1로 끝납니다.
+
+실행:
+    python -m bench.run_bench --api-key <KEY> --requests 200 --concurrency 16
+    python -m bench.run_bench --api-key <KEY> --endpoints cti --unique --save bench/baseline.json
+    python -m bench.run_bench --api-key <KEY> --baseline bench/baseline.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import requests
+
+ENDPOINTS = ("cti", "ioc", "slack", "wiki")
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    """스레드별 keep-alive 세션 (클라이언트 쪽 연결 비용이 측정값에 섞이지 않도록)"""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """nearest-rank 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def make_indicator(endpoint: str, index: int, unique: bool, run_id: str) -> str:
+    """요청에 쓸 지표 값. unique면 캐시/합치기를 피하도록 요청마다 다른 값"""
+    if endpoint == "ioc":
+        if not unique:
+            return "8.8.8.8"
+        return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+    if not unique:
+        return "example.com"
+    prefix = "evil-" if index % 5 == 0 else ""  # 일부는 악성 응답 경로를 타도록
+    return f"{prefix}bench-{run_id}-{index}.example.com"
+
+
+def build_request(args, endpoint: str, indicator: str) -> Callable[[], requests.Response]:
+    base = args.api.rstrip("/")
+    headers = {"X-API-Key": args.api_key}
+    timeout = args.timeout
+    if endpoint == "cti":
+        body = {"domain": indicator, "force_refresh": args.force_refresh}
+        return lambda: _session().post(f"{base}/cti/analyze/domain", json=body, headers=headers, timeout=timeout)
+    if endpoint == "ioc":
+        body = {"ip": indicator}
+        return lambda: _session().post(f"{base}/ioc/analyze/ip", json=body, headers=headers, timeout=timeout)
+    if endpoint == "slack":
+        params = {"text": f"ioc {indicator}"}
+        return lambda: _session().get(f"{base}/slack/test/bobbot", params=params, timeout=timeout)
+    body = {"search_term": args.wiki_name}
+    return lambda: _session().post(f"{base}/wiki/search", json=body, timeout=timeout)
+
+
+def _timed(call: Callable[[], requests.Response]) -> Tuple[float, int]:
+    started = time.perf_counter()
+    try:
+        response = call()
+        status = response.status_code
+        response.close()
+    except requests.RequestException:
+        status = 0  # 연결 실패/타임아웃
+    return time.perf_counter() - started, status
+
+
+def run_endpoint(args, endpoint: str, run_id: str) -> Dict[str, Any]:
+    calls = [
+        build_request(args, endpoint, make_indicator(endpoint, index, args.unique, run_id))
+        for index in range(args.requests)
+    ]
+    # 워밍업 (커넥션 수립, 첫 요청 캐시 적재 등은 측정에서 제외)
+    for call in calls[:args.warmup] if not args.unique else []:
+        _timed(call)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(_timed, calls))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, status in results if 200 <= status < 300]
+    statuses: Dict[str, int] = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "endpoint": endpoint,
+        "requests": len(results),
+        "errors": len(results) - len(latencies),
+        "statuses": statuses,
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+def print_report(results: List[Dict[str, Any]]):
+    print(f"{'endpoint':<8} {'reqs':>6} {'errors':>6} {'rps':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9}")
+    for r in results:
+        print(
+            f"{r['endpoint']:<8} {r['requests']:>6} {r['errors']:>6} {r['throughput_rps']:>8} "
+            f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['max_ms']:>9}"
+        )
+
+
+def compare_baseline(results: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> bool:
+    """p95가 기준값보다 max_regression 비율 이상 느려진 엔드포인트가 있으면 False"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["endpoint"]: r for r in json.load(f)["results"]}
+
+    ok = True
+    for r in results:
+        base = baseline.get(r["endpoint"])
+        if not base or not base["p95_ms"]:
+            continue
+        change = (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+        regressed = change > max_regression
+        ok = ok and not regressed
+        mark = "❌" if regressed else "✅"
+        print(f"{mark} {r['endpoint']}: p95 {base['p95_ms']}ms -> {r['p95_ms']}ms ({change:+.0%})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CTI/IoC/Slack/위키 엔드포인트 지연 시간 벤치마크")
+    parser.add_argument("--api", default="http://127.0.0.1:8000", help="앱 주소")
+    parser.add_argument("--api-key", default="", help="X-API-Key 헤더 값")
+    parser.add_argument("--endpoints", default="cti,ioc,slack", help=f"쉼표로 구분 ({', '.join(ENDPOINTS)})")
+    parser.add_argument("--requests", type=int, default=100, help="엔드포인트별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--warmup", type=int, default=5, help="측정 전에 보낼 요청 수 (--unique에서는 생략)")
+    parser.add_argument("--timeout", type=float, default=120, help="요청별 타임아웃(초)")
+    parser.add_argument("--unique", action="store_true", help="요청마다 다른 도메인/IP 사용 (캐시 미스 경로 측정)")
+    parser.add_argument("--force-refresh", action="store_true", help="CTI 캐시를 무시하고 항상 프로바이더 호출")
+    parser.add_argument("--wiki-name", default="고남현", help="위키 검색어")
+    parser.add_argument("--save", help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="허용할 p95 증가 비율")
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        parser.error(f"알 수 없는 엔드포인트: {', '.join(unknown)}")
+
+    run_id = f"{int(time.time())}{random.randint(0, 999):03d}"
+    print(f"🚀 벤치마크 시작: {args.api} (요청 {args.requests}개 x {len(endpoints)}, 동시 {args.concurrency})")
+    results = []
+    for endpoint in endpoints:
+        print(f"⏱️ {endpoint} 측정 중...")
+        results.append(run_endpoint(args, endpoint, run_id))
+    print()
+    print_report(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.save}")
+
+    if args.baseline and not compare_baseline(results, args.baseline, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,9 @@ from app.api import cti
 from app.api import slack
 from app.api import wiki
 from app.database import db, Base
+from app.core.json_codec import FastJSONResponse
 
-app = FastAPI(title="Bobbot API")
+app = FastAPI(title="Bobbot API", default_response_class=FastJSONResponse)
 
 # Include routers
 app.include_router(user.router, prefix="/users", tags=["users"])
@@ -19,10 +20,12 @@ app.include_router(wiki.router, prefix="/wiki", tags=["wiki"])
 
 # Global variable to store the socket client task
 socket_task = None
+hybrid_poller_task = None
+refresh_task = None
 
 @app.on_event("startup")
 async def on_startup():
-    global socket_task
+    global socket_task, hybrid_poller_task, refresh_task
     
     # Ensure CTI table exists
     try:
@@ -31,6 +34,20 @@ async def on_startup():
         # Silent fail to avoid blocking dev loop; DB issues will surface per-request
         pass
     
+    # 알려진 지표 판정 인덱스 구축 (시작을 막지 않도록 백그라운드 스레드에서)
+    from app.core.verdict_index import verdict_index, VERDICT_INDEX_ENABLED
+    if VERDICT_INDEX_ENABLED:
+        verdict_index.load_in_background(db.Session, db.Session.remove)
+    
+    # Hybrid Analysis quick scan 결과 폴러 시작
+    from app.core.hybrid_poller import hybrid_poller
+    hybrid_poller_task = asyncio.create_task(hybrid_poller.start())
+    
+    # 자주 조회하는 지표를 캐시 만료 전에 미리 갱신 (남는 호출 한도에서만)
+    from app.core.refresh_scheduler import refresh_scheduler, REFRESH_ENABLED
+    if REFRESH_ENABLED:
+        refresh_task = asyncio.create_task(refresh_scheduler.start())
+    
     # Socket Mode 시작 (백그라운드에서 실행)
     try:
         from app.core.slack_socket_client import slack_socket_client
@@ -42,7 +59,35 @@ async def on_startup():
 
 @app.on_event("shutdown")
 async def on_shutdown():
-    global socket_task
+    global socket_task, hybrid_poller_task, refresh_task
+    
+    # 미리 갱신 스케줄러 종료
+    if refresh_task:
+        from app.core.refresh_scheduler import refresh_scheduler
+        await refresh_scheduler.stop()
+        await refresh_task
+    
+    # 접근 IP IoC 분석 큐에 남은 작업 처리 후 종료
+    from app.core.ioc_enricher import ioc_enricher
+    await asyncio.to_thread(ioc_enricher.stop)
+    
+    # 버퍼에 남은 접근 로그 저장 (IoC 분석 큐가 끝난 뒤)
+    from app.core.access_log_writer import access_log_writer
+    await asyncio.to_thread(access_log_writer.stop)
+    
+    # async DB 엔진 커넥션 정리
+    from app.database import async_db
+    await async_db.dispose()
+    
+    # 비밀번호 해시 프로세스 풀 종료
+    from app.core.password_hasher import password_hasher
+    await asyncio.to_thread(password_hasher.shutdown)
+    
+    # Hybrid Analysis 폴러 종료
+    if hybrid_poller_task:
+        from app.core.hybrid_poller import hybrid_poller
+        await hybrid_poller.stop()
+        await hybrid_poller_task
     
     # Socket Mode 종료
     if socket_task:
@@ -0,0 +1,27 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import cti, ioc, user  # noqa: F401 (테이블 등록)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """테스트마다 새 SQLite 파일 DB (여러 세션/스레드에서 같은 DB를 보도록 파일 사용)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bobbot.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
@@ -0,0 +1,192 @@
+import functools
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+
+from app.core.access_log_writer import AccessLogWriter
+from app.crud.ioc import link_access_log
+from app.database import Base
+from app.models.ioc import IoC
+from app.models.user import AccessLog, User
+
+
+def _writer(engine, **kwargs):
+    kwargs.setdefault("flush_interval", 60)
+    return AccessLogWriter(engine=engine, **kwargs)
+
+
+def _logged(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(AccessLog)).scalar()
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def fk_engine(tmp_path):
+    """외래 키를 검사하는 SQLite DB (사용자 1만 있음)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fk.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda conn, record: conn.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{"id": 1, "username": "u", "email": "u@example.com", "salt": "s", "hashed_password": "h"}])
+    yield engine
+    engine.dispose()
+
+
+def _ioc(db, ip):
+    row = IoC(
+        indicator_type="ip", indicator_value=ip, source="VirusTotal", malicious_count=1,
+        suspicious_count=0, harmless_count=0, reputation=0, last_analyzed=datetime.now(),
+    )
+    db.add(row)
+    db.commit()
+    return row
+
+
+def _link(row, log_id):
+    return functools.partial(
+        link_access_log, ioc_id=row.id, access_log_id=log_id,
+        source=row.source, value=row.indicator_value,
+    )
+
+
+def test_link_waits_until_log_is_written(engine, db):
+    writer = _writer(engine)
+    try:
+        log_id = writer.log(1, "8.8.8.8")
+        row = _ioc(db, "8.8.8.8")
+        writer.after_persisted(log_id, _link(row, log_id))
+        db.expire_all()
+        assert db.get(IoC, row.id).access_log_id is None  # 로그가 아직 버퍼에 있음
+
+        assert writer.flush() == 1
+        db.expire_all()
+        assert db.get(IoC, row.id).access_log_id == log_id
+    finally:
+        writer.stop()
+
+
+def test_link_runs_immediately_for_written_log(engine, db):
+    writer = _writer(engine)
+    try:
+        log_id = writer.log(1, "1.1.1.1")
+        writer.flush()
+        row = _ioc(db, "1.1.1.1")
+        writer.after_persisted(log_id, _link(row, log_id))
+        db.expire_all()
+        assert db.get(IoC, row.id).access_log_id == log_id
+    finally:
+        writer.stop()
+
+
+def test_link_is_dropped_with_overflowing_log(engine, db):
+    writer = _writer(engine, max_buffer=1)
+    try:
+        first = writer.log(1, "9.9.9.9")
+        row = _ioc(db, "9.9.9.9")
+        writer.after_persisted(first, _link(row, first))
+        # flush가 실패해 되돌리는 사이 새 로그가 들어와 버퍼가 넘침 (오래된 로그부터 버림)
+        rows, writer._buffer = list(writer._buffer.values()), {}
+        writer.log(2, "9.9.9.10")
+        writer._requeue(rows)
+
+        assert writer.stats()["dropped"] == 1
+        assert first not in writer._after_persisted
+    finally:
+        writer._buffer.clear()
+        writer.stop()
+
+
+def test_flushes_when_batch_size_is_reached(engine):
+    writer = _writer(engine, batch_size=3)
+    try:
+        for i in range(3):
+            writer.log(1, f"10.0.0.{i}")
+        _wait_for(lambda: _logged(engine) == 3)
+        assert writer.stats()["buffered"] == 0
+    finally:
+        writer.stop()
+
+
+def test_flushes_after_flush_interval(engine):
+    writer = _writer(engine, flush_interval=0.1)
+    try:
+        writer.log(1, "10.0.0.1")
+        _wait_for(lambda: _logged(engine) == 1)
+    finally:
+        writer.stop()
+
+
+def test_stop_writes_remaining_logs(engine):
+    writer = _writer(engine)
+    writer.log(1, "10.0.0.1")
+    writer.log(2, "10.0.0.2")
+
+    writer.stop()
+
+    assert _logged(engine) == 2
+    assert writer.stats()["written"] == 2
+
+
+def test_failed_flush_keeps_logs_for_retry(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")  # 아직 테이블이 없음
+    writer = _writer(engine)
+    try:
+        writer.log(1, "10.0.0.1")
+        writer.log(2, "10.0.0.2")
+        with pytest.raises(Exception):
+            writer.flush()
+        assert writer.stats()["buffered"] == 2
+        assert writer.stats()["failed_flushes"] == 1
+
+        Base.metadata.create_all(engine)
+        assert writer.flush() == 2
+        assert _logged(engine) == 2
+    finally:
+        writer.stop()
+        engine.dispose()
+
+
+def test_poison_row_is_rejected_and_others_are_written(fk_engine):
+    writer = _writer(fk_engine)
+    flushed = []
+    writer.on_flush(lambda conn, rows: flushed.extend(row["ip_address"] for row in rows))
+    try:
+        writer.log(1, "10.0.0.1")
+        writer.log(999, "10.0.0.2")  # 없는 사용자 (외래 키 위반)
+        writer.log(1, "10.0.0.3")
+
+        assert writer.flush() == 2
+        stats = writer.stats()
+        assert (stats["buffered"], stats["rejected"], stats["failed_flushes"]) == (0, 1, 0)
+        assert _logged(fk_engine) == 2
+        assert sorted(flushed) == ["10.0.0.1", "10.0.0.3"]
+    finally:
+        writer.stop()
+
+
+def test_duplicate_ids_are_skipped(engine):
+    writer = _writer(engine)
+    flushed = []
+    writer.on_flush(lambda conn, rows: flushed.extend(rows))
+    try:
+        log_id = writer.log(1, "10.0.0.1")
+        row = dict(writer._buffer[log_id])
+        writer.flush()
+
+        writer._buffer[log_id] = row  # 같은 로그가 다시 들어옴
+        writer.log(1, "10.0.0.2")
+        assert writer.flush() == 1
+        assert writer.stats()["duplicates"] == 1
+        assert [r["ip_address"] for r in flushed] == ["10.0.0.1", "10.0.0.2"]
+        assert _logged(engine) == 2
+    finally:
+        writer.stop()
@@ -0,0 +1,133 @@
+import io
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.access_log_writer import AccessLogWriter
+from app.crud.access_rollup import (
+    apply_access_logs, get_ip_summary, get_users_from_flagged_ips, prune_hourly, rebuild_rollups,
+)
+from app.crud.cti import bulk_store_cti
+from app.crud.feed import ingest_feed
+from app.database import Base
+from app.models.user import AccessLog, AccessLogHourly, AccessIPSummary
+from app.schemas.cti import CTICreate
+
+
+def _writer(engine):
+    writer = AccessLogWriter(engine=engine, flush_interval=60)
+    writer.on_flush(apply_access_logs)
+    return writer
+
+
+def _log(engine, accesses):
+    writer = _writer(engine)
+    try:
+        for user_id, ip in accesses:
+            writer.log(user_id, ip)
+        writer.flush()
+    finally:
+        writer.stop()
+
+
+def _total_hits(db, model):
+    return db.query(func.coalesce(func.sum(model.hits), 0)).scalar()
+
+
+def test_feed_ingest_flags_accessed_ips(engine, db):
+    _log(engine, [(1, "203.0.113.5"), (1, "203.0.113.5"), (2, "198.51.100.20"), (3, "100.64.0.1")])
+    assert get_users_from_flagged_ips(db) == []
+
+    stats = ingest_feed(db, io.BytesIO(b"203.0.113.5\n198.51.100.0/24\n"), "rollup-test", fmt="txt")
+
+    assert stats["access_ips_updated"] == 2
+    flagged = {row.user_id: row for row in get_users_from_flagged_ips(db)}
+    assert set(flagged) == {1, 2}
+    assert (flagged[1].hits, flagged[1].ip_addresses) == (2, ["203.0.113.5"])
+    assert flagged[2].ip_addresses == ["198.51.100.20"]
+    assert get_ip_summary(db, "198.51.100.20").verdict_source == "feed:rollup-test"
+    assert get_ip_summary(db, "100.64.0.1").verdict is None
+
+
+def test_cti_result_updates_accessed_ip(engine, db):
+    _log(engine, [(4, "100.65.0.9")])
+
+    bulk_store_cti(db, [CTICreate(
+        search_item="100.65.0.9", tag="urlscan", detect_count=2, status=200, last_analyzed=datetime.now(),
+    )])
+
+    summary = get_ip_summary(db, "100.65.0.9")
+    assert (summary.verdict, summary.verdict_source) == ("malicious", "urlscan")
+    assert [row.user_id for row in get_users_from_flagged_ips(db)] == [4]
+
+
+def test_rebuild_matches_incremental_rollups(engine, db):
+    _log(engine, [(1, "192.0.2.50"), (1, "192.0.2.50"), (2, "192.0.2.51"), (2, None)])
+    before = db.query(AccessLogHourly.user_id, AccessLogHourly.ip_address, AccessLogHourly.hits).order_by(
+        AccessLogHourly.user_id, AccessLogHourly.ip_address).all()
+
+    result = rebuild_rollups(db, chunk_size=2)
+
+    after = db.query(AccessLogHourly.user_id, AccessLogHourly.ip_address, AccessLogHourly.hits).order_by(
+        AccessLogHourly.user_id, AccessLogHourly.ip_address).all()
+    assert result == {"scanned": 4, "hourly_rows": 2, "ips": 2}
+    assert after == before
+
+
+def test_flushes_during_rebuild_are_counted_once(tmp_path):
+    # 잠금 대기가 길지 않도록 busy timeout을 줄인 별도 DB
+    engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}", connect_args={"check_same_thread": False, "timeout": 0.2})
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    _log(engine, [(1, f"192.0.2.{i}") for i in range(100, 200)])
+    writer = _writer(engine)
+    done = threading.Event()
+
+    def write():
+        try:
+            for i in range(100):
+                writer.log(2, f"192.0.2.{i}")
+                if i % 10 == 9:
+                    try:
+                        writer.flush()
+                    except OperationalError:
+                        pass  # 재구성이 잠금을 잡고 있으면 버퍼에 남았다가 다음 flush에서 기록
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    try:
+        while not done.is_set():
+            try:
+                rebuild_rollups(db, chunk_size=7)
+            except OperationalError:
+                db.rollback()  # flush와 잠금이 겹쳐 롤백된 재구성 (집계는 그대로)
+    finally:
+        thread.join()
+        writer.stop()
+
+    try:
+        logged = db.execute(select(func.count()).select_from(AccessLog)).scalar()
+        assert logged == 200
+        assert _total_hits(db, AccessLogHourly) == logged
+        assert _total_hits(db, AccessIPSummary) == logged
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_prune_keeps_ip_summaries(engine, db):
+    _log(engine, [(1, "192.0.2.60")])
+    db.add(AccessLogHourly(
+        user_id=1, ip_address="192.0.2.60", hour=datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=100),
+        hits=5, last_seen=datetime.now() - timedelta(days=100),
+    ))
+    db.commit()
+
+    assert prune_hourly(db, older_than_days=90) == 1
+    assert _total_hits(db, AccessLogHourly) == 1
+    assert get_ip_summary(db, "192.0.2.60").hits == 1
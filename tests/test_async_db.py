@@ -0,0 +1,89 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from app import database
+from app.crud import user as user_crud
+from app.database import AsyncDatabase
+from app.schemas.user import UserCreate
+
+
+class RecordingTier:
+    """공유 저장소 호출과 호출한 스레드를 기록하는 메모리 저장소"""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(("get", threading.get_ident()))
+        return self.data.get(key)
+
+    def set(self, key, value, ttl):
+        self.calls.append(("set", threading.get_ident()))
+        self.data[key] = value
+
+    def delete(self, key):
+        self.calls.append(("delete", threading.get_ident()))
+        self.data.pop(key, None)
+
+
+def test_falls_back_to_local_sqlite_without_aiomysql(monkeypatch):
+    monkeypatch.setattr(database, "ASYNC_DB_URL", None)
+    monkeypatch.setitem(sys.modules, "aiomysql", None)  # import aiomysql -> ImportError
+
+    assert database._async_db_url() == f"sqlite+aiosqlite:///{database.ASYNC_SQLITE_PATH}"
+
+
+def test_async_crud_keeps_shared_cache_io_off_the_event_loop(tmp_path, monkeypatch):
+    tier = RecordingTier()
+    monkeypatch.setattr(user_crud.user_cache, "shared", tier)
+    async_db = AsyncDatabase(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+
+    async def scenario():
+        async with async_db.session() as session:
+            created = await user_crud.create_user_async(
+                session, UserCreate(email="async@example.com", username="async", password="password1"), ("salt", "hash"),
+            )
+            user_crud.user_cache.local.delete(user_crud.user_cache._key(created.id))  # 공유 저장소에서 읽도록
+            first = await user_crud.get_user_async(session, created.id)
+            user_crud.user_cache.local.delete(user_crud.user_cache._key(created.id))
+            second = await user_crud.get_user_async(session, created.id)
+        await async_db.dispose()
+        return threading.get_ident(), list(tier.calls), created, first, second
+
+    loop_thread, calls, created, first, second = asyncio.run(scenario())
+    user_crud.user_cache.invalidate(created.id)
+
+    assert first.email == second.email == "async@example.com"
+    assert {name for name, _ in calls} == {"get", "set", "delete"}
+    assert all(thread != loop_thread for _, thread in calls)
+    assert user_crud.user_cache.stats()["shared_hits"] >= 1
+
+
+def test_slack_ioc_answers_from_stored_report(tmp_path, monkeypatch):
+    slack = pytest.importorskip("app.crud.slack")  # 위키 크롤러/요약 의존성(bs4, langchain)이 필요
+    from app.crud.ioc import create_ioc_report
+
+    async_db = AsyncDatabase(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    monkeypatch.setattr(slack, "async_db", async_db)
+    monkeypatch.setattr(slack, "handle_ioc_command", lambda value: {"text": "live"})
+
+    async def scenario():
+        async with async_db.session() as session:
+            await session.run_sync(
+                create_ioc_report, "198.51.100.99",
+                {"data": {"attributes": {"reputation": -5, "last_analysis_stats": {"malicious": 7}}}},
+            )
+        stored = await slack.handle_ioc_command_async("198.51.100.99")
+        live = await slack.handle_ioc_command_async("198.51.100.100")
+        await async_db.dispose()
+        return stored, live
+
+    stored, live = asyncio.run(scenario())
+
+    assert "악성: 7개" in stored["text"]
+    assert "평판 점수: -5" in stored["text"]
+    assert live["text"] == "live"
@@ -0,0 +1,94 @@
+import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.core.cache import MISS, SQLiteTier, TwoTierCache
+from app.crud.ioc import create_ioc_report, get_ioc_report
+
+
+class Item(BaseModel):
+    name: str
+    count: int
+
+
+class BrokenTier:
+    def get(self, key):
+        raise OSError("shared cache down")
+
+    def set(self, key, value, ttl):
+        raise OSError("shared cache down")
+
+    def delete(self, key):
+        raise OSError("shared cache down")
+
+
+class Loader:
+    def __init__(self, value: Optional[Item]):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self) -> Optional[Item]:
+        self.calls += 1
+        return self.value
+
+
+def test_negative_result_is_cached_until_negative_ttl(tmp_path):
+    cache = TwoTierCache("test", Item, SQLiteTier(str(tmp_path / "cache.db")), negative_ttl=0.2)
+    loader = Loader(None)
+
+    assert cache.get_or_load("missing", loader) is None
+    assert cache.get_or_load("missing", loader) is None
+    assert loader.calls == 1
+
+    time.sleep(0.25)
+    loader.value = Item(name="found", count=1)
+    assert cache.get_or_load("missing", loader) == Item(name="found", count=1)
+    assert loader.calls == 2
+
+
+def test_shared_tier_serves_other_workers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = TwoTierCache("test", Item, SQLiteTier(path))
+    second = TwoTierCache("test", Item, SQLiteTier(path))  # 다른 워커 프로세스의 캐시
+    first.set(("a", 1), Item(name="a", count=1))
+    first.set(("a", 2), None)
+
+    assert second.get(("a", 1)) == Item(name="a", count=1)
+    assert second.get(("a", 2)) is None  # "없음" 결과도 공유
+    assert second.stats()["shared_hits"] == 2
+    assert second.get(("a", 1)) == Item(name="a", count=1)
+    assert second.stats()["local_hits"] == 1
+
+
+def test_invalidate_removes_local_and_shared_entries(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = TwoTierCache("test", Item, SQLiteTier(path))
+    second = TwoTierCache("test", Item, SQLiteTier(path))
+    first.set("key", None)
+
+    first.invalidate("key")
+
+    assert first.get("key") is MISS
+    assert second.get("key") is MISS
+
+
+def test_shared_tier_errors_are_misses():
+    cache = TwoTierCache("test", Item, BrokenTier())
+    loader = Loader(Item(name="db", count=2))
+
+    assert cache.get_or_load("key", loader) == Item(name="db", count=2)
+    assert cache.get_or_load("key", loader) == Item(name="db", count=2)  # 1단계에서 응답
+    assert loader.calls == 1
+    assert cache.stats()["shared_errors"] == 2
+
+
+def test_stored_report_replaces_cached_negative_result(db):
+    ip = "203.0.113.77"
+    assert get_ioc_report(db, value=ip) is None
+
+    create_ioc_report(db, ip=ip, vt_data={"data": {"attributes": {"last_analysis_stats": {"malicious": 4}}}})
+
+    report = get_ioc_report(db, value=ip)
+    assert report is not None
+    assert report.malicious_count == 4
@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, record_round_trip
+
+UNAVAILABLE = {"status": 503}
+
+
+def _breaker(**settings) -> CircuitBreaker:
+    return CircuitBreaker("test", **{
+        "window": 4,
+        "min_calls": 2,
+        "failure_rate": 0.5,
+        "slow_call_seconds": 1.0,
+        "open_seconds": 0.1,
+        "half_open_calls": 1,
+        **settings,
+    })
+
+
+def _guarded(breaker: CircuitBreaker):
+    @breaker.guard(lambda *args, **kwargs: UNAVAILABLE, lambda result: result["status"] >= 500)
+    def call(status=200, round_trip=0.01, wait=0.0, sent=True):
+        time.sleep(wait)  # 호출 한도 토큰 대기 등 요청 전 지연
+        if sent:
+            record_round_trip(round_trip)
+        return {"status": status}
+    return call
+
+
+def test_opens_after_failure_rate_and_rejects():
+    breaker = _breaker()
+    call = _guarded(breaker)
+
+    call(200)
+    assert breaker.state == CLOSED
+    call(500)
+    assert breaker.state == OPEN
+    assert call(200) is UNAVAILABLE
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_needs_min_calls_before_opening():
+    breaker = _breaker(min_calls=3)
+    call = _guarded(breaker)
+
+    call(500)
+    call(500)
+    assert breaker.state == CLOSED
+    call(500)
+    assert breaker.state == OPEN
+
+
+def test_half_open_success_closes():
+    breaker = _breaker()
+    call = _guarded(breaker)
+    call(500)
+    call(500)
+    assert breaker.state == OPEN
+
+    time.sleep(0.15)
+    assert call(200) == {"status": 200}
+    assert breaker.state == CLOSED
+    assert breaker.stats()["recent_calls"] == 0
+
+
+def test_half_open_failure_reopens():
+    breaker = _breaker()
+    call = _guarded(breaker)
+    call(500)
+    call(500)
+
+    time.sleep(0.15)
+    call(502)
+    assert breaker.state == OPEN
+    assert call(200) is UNAVAILABLE
+
+
+def test_half_open_allows_limited_trial_calls():
+    breaker = _breaker()
+    breaker._open()
+    time.sleep(0.15)
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_slow_round_trip_counts_as_failure():
+    breaker = _breaker()
+    call = _guarded(breaker)
+
+    call(200, round_trip=1.5)
+    call(200, round_trip=1.5)
+    assert breaker.state == OPEN
+
+
+def test_local_wait_is_not_timed():
+    breaker = _breaker(slow_call_seconds=0.1)
+    call = _guarded(breaker)
+
+    for _ in range(3):
+        call(200, wait=0.15)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["failure_rate"] == 0.0
+
+
+def test_call_without_request_is_not_recorded():
+    breaker = _breaker()
+    call = _guarded(breaker)
+
+    for _ in range(5):
+        call(429, sent=False)
+    assert breaker.stats()["recent_calls"] == 0
+
+    breaker._open()
+    time.sleep(0.15)
+    call(429, sent=False)  # half-open 시험 호출 자리를 돌려줌
+    assert breaker.state == HALF_OPEN
+    call(200)
+    assert breaker.state == CLOSED
+
+
+def test_exception_after_request_is_failure():
+    breaker = _breaker()
+
+    @breaker.guard(lambda *args, **kwargs: UNAVAILABLE, lambda result: False)
+    def call():
+        record_round_trip(0.01)
+        raise ConnectionError("reset")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            call()
+    assert breaker.state == OPEN
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud.cti import decode_cursor, encode_cursor, get_cti_history, get_latest_cti
+from app.models.cti import CTI
+
+BASE_TIME = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _add(db, search_item, tag, seconds, detect_count=0):
+    row = CTI(
+        search_item=search_item, tag=tag, detect_count=detect_count, status=200,
+        last_analyzed=BASE_TIME + timedelta(seconds=seconds),
+    )
+    db.add(row)
+    db.flush()
+    return row.id
+
+
+def test_cursor_round_trip():
+    values = ["2026-01-01T12:00:00", 42]
+    assert decode_cursor(encode_cursor(*values)) == values
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "e30", "aGVsbG8"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_history_pages_cover_every_row_once(db):
+    expected = []
+    for tag in ("virustotal", "hybrid", "urlscan"):
+        for seconds in (0, 10, 10, 20, 30):  # 같은 시각 행은 id로 구분
+            expected.append((BASE_TIME + timedelta(seconds=seconds), _add(db, "evil.com", tag, seconds)))
+    _add(db, "other.com", "virustotal", 40)
+    db.commit()
+    expected.sort(reverse=True)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = get_cti_history(db, "Evil.com", limit=4, cursor=cursor)
+        seen.extend((row.last_analyzed, row.id) for row in page)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert pages == 4
+
+
+def test_history_filters_by_tag(db):
+    for seconds in range(5):
+        _add(db, "evil.com", "virustotal", seconds)
+        _add(db, "evil.com", "urlscan", seconds)
+    db.commit()
+
+    page, cursor = get_cti_history(db, "evil.com", tag="urlscan", limit=3)
+    rest, end = get_cti_history(db, "evil.com", tag="urlscan", limit=3, cursor=cursor)
+    assert {row.tag for row in page + rest} == {"urlscan"}
+    assert len(page + rest) == 5
+    assert end is None
+
+
+def test_history_rejects_cursor_of_wrong_shape(db):
+    with pytest.raises(ValueError):
+        get_cti_history(db, "evil.com", cursor=encode_cursor("a.com"))
+
+
+def test_latest_pages_return_newest_row_per_provider(db):
+    items = [f"site{i}.com" for i in range(5)]
+    newest = {}
+    for item in items:
+        for tag in ("virustotal", "urlscan"):
+            _add(db, item, tag, 0)
+            _add(db, item, tag, 5)
+            newest[(item, tag)] = _add(db, item, tag, 5)  # 같은 시각이면 id가 큰 행
+    db.commit()
+
+    seen, cursor = {}, None
+    while True:
+        page, cursor = get_latest_cti(db, limit=2, cursor=cursor)
+        for row in page:
+            assert (row.search_item, row.tag) not in seen
+            seen[(row.search_item, row.tag)] = row.id
+        if cursor is None:
+            break
+
+    assert seen == newest
+
+
+def test_latest_rejects_cursor_of_wrong_shape(db):
+    with pytest.raises(ValueError):
+        get_latest_cti(db, cursor=encode_cursor(1))
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.core.verdict_index import verdict_index
+from app.crud.cti import bulk_store_cti
+from app.models.cti import CTI
+from app.schemas.cti import CTICreate
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _item(tag, detect_count, search_item="store.example.com"):
+    return CTICreate(
+        search_item=search_item, tag=tag, malicious_score=detect_count * 10, detect_count=detect_count,
+        status=200, last_analyzed=NOW, raw_data={"status": 200, "engines": detect_count},
+    )
+
+
+def test_bulk_store_uses_one_insert_and_returns_row_ids(db, engine):
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement.split()[0].upper())
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        saved = bulk_store_cti(db, [_item("virustotal", 3), _item("hybrid", 0), _item("urlscan", 1)])
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert statements.count("INSERT") == 1
+    rows = {row.id: row for row in db.query(CTI).all()}
+    assert len(rows) == 3
+    for result in saved:
+        row = rows[result.id]
+        assert (row.tag, row.detect_count) == (result.tag, result.detect_count)
+        assert row.raw_data == result.raw_data
+        assert row.risk_score == result.risk_score
+
+
+def test_history_mode_keeps_every_result(db):
+    first = bulk_store_cti(db, [_item("virustotal", 1)])
+    second = bulk_store_cti(db, [_item("virustotal", 5)])
+
+    assert first[0].id != second[0].id
+    assert db.query(CTI).count() == 2
+    assert verdict_index.lookup("store.example.com")["verdict"] == "malicious"
+
+
+def test_empty_batch_writes_nothing(db):
+    assert bulk_store_cti(db, []) == []
+    assert db.query(CTI).count() == 0
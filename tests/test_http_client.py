@@ -0,0 +1,97 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.core.http_client import DeadlineExceeded, HTTPClient
+from app.core.rate_limit import request_deadline
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        if self.path.startswith("/slow"):
+            time.sleep(2)
+            self._reply(200)
+        elif self.path.startswith("/busy"):
+            self._reply(503, {"Retry-After": "5"})
+        else:
+            self._reply(200)
+
+    def _reply(self, status, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.hits = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def deadline():
+    tokens = []
+
+    def set_deadline(seconds):
+        tokens.append(request_deadline.set(time.monotonic() + seconds))
+
+    yield set_deadline
+    for token in reversed(tokens):
+        request_deadline.reset(token)
+
+
+def test_without_deadline_uses_configured_timeout(server):
+    client = HTTPClient()
+    assert client.get(f"{server}/ok").status_code == 200
+    assert _Handler.hits == 1
+
+
+def test_deadline_shortens_read_timeout_and_stops_retrying(server, deadline):
+    client = HTTPClient()
+    client.max_retries = 3
+    deadline(0.5)
+
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.Timeout):
+        client.get(f"{server}/slow")
+    assert time.monotonic() - started < 1.5
+    assert _Handler.hits == 1
+
+
+def test_expired_deadline_sends_nothing(server, deadline):
+    client = HTTPClient()
+    deadline(-1)
+
+    with pytest.raises(DeadlineExceeded):
+        client.get(f"{server}/ok")
+    assert _Handler.hits == 0
+
+
+def test_retry_after_past_deadline_returns_last_response(server, deadline):
+    client = HTTPClient()
+    client.max_retries = 2
+    client.backoff_max = 10
+    deadline(1)
+
+    started = time.monotonic()
+    response = client.get(f"{server}/busy")
+    assert response.status_code == 503
+    assert time.monotonic() - started < 1
+    assert _Handler.hits == 1
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.core.verdict_index import verdict_index
+from app.crud.cti import apply_hybrid_quick_scan, apply_hybrid_quick_scans, claim_pending_hybrid_scans
+from app.models.cti import CTI
+
+FINISHED = {
+    "status": 200,
+    "data": {
+        "finished": True,
+        "sha256": "abc",
+        "scanners": [
+            {"name": "a", "status": "malicious", "positives": 3},
+            {"name": "b", "status": "clean", "positives": 0},
+        ],
+    },
+}
+
+
+def _pending(db, count):
+    for i in range(count):
+        db.add(CTI(
+            search_item=f"scan{i}.com", tag="hybrid", malicious_score=0, detect_count=0, status=200,
+            scan_job_id=f"job{i}", last_analyzed=datetime.now() - timedelta(minutes=count - i),
+            raw_data={"scan_type": "quick_scan_submitted"},
+        ))
+    db.commit()
+
+
+def test_claims_do_not_overlap(db, session_factory):
+    _pending(db, 3)
+    other = session_factory()
+    try:
+        first = claim_pending_hybrid_scans(db, limit=2)
+        second = claim_pending_hybrid_scans(other, limit=10)
+    finally:
+        other.close()
+
+    assert [job for _, job in first] == ["job0", "job1"]
+    assert [job for _, job in second] == ["job2"]
+    assert claim_pending_hybrid_scans(db, limit=10) == []  # 선점 기간 동안은 다시 조회하지 않음
+
+
+def test_batch_is_loaded_once_and_committed_once(db, engine):
+    _pending(db, 3)
+    claimed = claim_pending_hybrid_scans(db, limit=3)
+    scans = dict(zip([row_id for row_id, _ in claimed], [FINISHED, {"status": 200, "data": {"finished": False}}, {"status": 404}]))
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement.split()[0].upper())
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert apply_hybrid_quick_scans(db, scans) == 1
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert statements.count("SELECT") == 1
+
+    rows = {row.search_item: row for row in db.query(CTI).all()}
+    done = rows["scan0.com"]
+    assert done.scan_job_id is None and done.detect_count == 1 and done.malicious_score == 50
+    assert done.raw_data["scan_type"] == "quick_scan_completed"
+    assert rows["scan1.com"].scan_job_id == "job1" and rows["scan1.com"].raw_data["poll_attempts"] == 1
+    assert rows["scan2.com"].scan_job_id is None and rows["scan2.com"].raw_data["scan_type"] == "quick_scan_expired"
+    assert verdict_index.lookup("scan0.com")["verdict"] == "malicious"
+
+
+def test_rate_limit_and_server_errors_are_not_attempts(db):
+    _pending(db, 1)
+    row = db.query(CTI).one()
+    for status in (429, 502, 503):
+        assert not apply_hybrid_quick_scan(row, {"status": status, "error": "busy"})
+    assert row.raw_data["poll_attempts"] == 0
+    assert row.scan_job_id == "job0"
+    assert row.next_poll_at > datetime.now()
@@ -0,0 +1,63 @@
+import asyncio
+import base64
+import hashlib
+
+import pytest
+
+from app.core.password_hasher import (
+    HASH_ITERATIONS, LEGACY_ITERATIONS, HasherBusy, PasswordHasher, encode_hash, needs_rehash, parse_hash,
+)
+
+SALT = bytes(range(16))
+SALT_B64 = base64.b64encode(SALT).decode()
+
+
+@pytest.fixture(scope="module")
+def hasher():
+    hasher = PasswordHasher(workers=1, max_pending=4)
+    yield hasher
+    hasher.shutdown()
+
+
+def _digest(password: str, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), SALT, iterations)
+
+
+def test_hash_stores_algorithm_and_iterations(hasher):
+    salt, encoded = hasher.hash("s3cret")
+
+    algorithm, iterations, digest = encoded.split("$")
+    assert algorithm == "pbkdf2_sha256"
+    assert int(iterations) == HASH_ITERATIONS
+    assert len(base64.b64decode(salt)) == 16
+    assert base64.b64decode(digest) == hashlib.pbkdf2_hmac("sha256", b"s3cret", base64.b64decode(salt), HASH_ITERATIONS)
+    assert not needs_rehash(encoded)
+    assert hasher.verify("s3cret", salt, encoded)
+    assert not hasher.verify("wrong", salt, encoded)
+
+
+def test_legacy_hash_without_prefix_verifies(hasher):
+    legacy = base64.b64encode(_digest("old-password", LEGACY_ITERATIONS)).decode()
+
+    assert parse_hash(legacy) == (LEGACY_ITERATIONS, _digest("old-password", LEGACY_ITERATIONS))
+    assert hasher.verify("old-password", SALT_B64, legacy)
+    assert not hasher.verify("other", SALT_B64, legacy)
+    assert needs_rehash(legacy) == (HASH_ITERATIONS != LEGACY_ITERATIONS)
+
+
+def test_hash_with_other_iterations_verifies_and_needs_rehash(hasher):
+    iterations = HASH_ITERATIONS + 1
+    encoded = encode_hash(iterations, _digest("pw", iterations))
+
+    assert asyncio.run(hasher.verify_async("pw", SALT_B64, encoded))
+    assert needs_rehash(encoded)
+
+
+def test_rejects_when_too_many_pending():
+    hasher = PasswordHasher(workers=1, max_pending=0)
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.hash("pw")
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from app.core.rate_limit import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    ProviderLimiter,
+    ProviderScheduler,
+    request_deadline,
+)
+
+
+def _drain(limiter: ProviderLimiter):
+    for bucket in limiter._buckets.values():
+        bucket.tokens = 0.0
+        bucket.updated = time.monotonic()
+
+
+def test_acquire_takes_available_token_immediately():
+    limiter = ProviderLimiter("test", per_minute=2)
+    assert limiter.acquire(PRIORITY_BATCH, timeout=0)
+    assert limiter.acquire(PRIORITY_BATCH, timeout=0)
+    assert limiter.stats()["granted"] == 2
+
+
+def test_acquire_times_out_without_token():
+    limiter = ProviderLimiter("test", per_minute=1)
+    assert limiter.acquire(PRIORITY_BATCH, timeout=0)
+
+    started = time.monotonic()
+    assert not limiter.acquire(PRIORITY_BATCH, timeout=0.2)
+    waited = time.monotonic() - started
+
+    assert 0.15 <= waited < 1.0
+    stats = limiter.stats()
+    assert stats["rejected"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_higher_priority_waiter_gets_next_token():
+    limiter = ProviderLimiter("test", per_minute=300)  # 0.2초마다 토큰 하나
+    _drain(limiter)
+    order = []
+
+    def wait(priority):
+        if limiter.acquire(priority, timeout=5):
+            order.append(priority)
+
+    batch = threading.Thread(target=wait, args=(PRIORITY_BATCH,))
+    batch.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=wait, args=(PRIORITY_INTERACTIVE,))
+    interactive.start()
+    batch.join(5)
+    interactive.join(5)
+
+    assert order == [PRIORITY_INTERACTIVE, PRIORITY_BATCH]
+
+
+def test_unknown_provider_is_not_limited():
+    scheduler = ProviderScheduler({"test": {"per_minute": 1}})
+    assert scheduler.acquire("other", timeout=0)
+    assert scheduler.spare_tokens("other") is None
+
+
+def test_request_deadline_caps_wait():
+    scheduler = ProviderScheduler({"test": {"per_minute": 1}})
+    assert scheduler.acquire("test", timeout=0)
+
+    token = request_deadline.set(time.monotonic() + 0.2)
+    try:
+        started = time.monotonic()
+        assert not scheduler.acquire("test", timeout=30)
+        assert time.monotonic() - started < 1.0
+    finally:
+        request_deadline.reset(token)
+
+
+def test_expired_deadline_does_not_wait():
+    scheduler = ProviderScheduler({"test": {"per_minute": 1}})
+    assert scheduler.acquire("test", timeout=0)
+
+    token = request_deadline.set(time.monotonic() - 1)
+    try:
+        started = time.monotonic()
+        assert not scheduler.acquire("test", timeout=30)
+        assert time.monotonic() - started < 0.1
+    finally:
+        request_deadline.reset(token)
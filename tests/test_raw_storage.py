@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.crud.raw_storage import migrate_raw_data
+from app.models import types
+from app.models.cti import CTI
+from app.models.ioc import IoC
+
+RAW = {"status": 200, "engines": [{"name": f"engine{i}", "result": "clean"} for i in range(50)]}
+
+
+@pytest.mark.parametrize("method, header", [("zstd", b"\x02"), ("zlib", b"\x01"), ("none", b"\x00")])
+def test_compress_round_trip(monkeypatch, method, header):
+    if method == "zstd" and types.zstandard is None:
+        pytest.skip("zstandard not installed")
+    monkeypatch.setattr(types, "COMPRESSION", method)
+    data = types.json_codec.dumps(RAW)
+
+    blob = types.compress(data)
+    assert blob[:1] == header
+    assert types.decompress(blob) == data
+
+
+def test_small_values_are_stored_plain():
+    assert types.compress(b"{}") == b"\x00{}"
+
+
+def test_raw_data_is_compressed_and_deferred(db):
+    db.add(CTI(search_item="raw.example.com", tag="virustotal", last_analyzed=datetime.now(), raw_data=RAW))
+    db.commit()
+
+    blob, legacy = db.execute(text("SELECT raw_blob, raw_data FROM CTITable")).one()
+    assert blob[:1] in (b"\x01", b"\x02")
+    assert len(blob) < len(types.json_codec.dumps(RAW))
+    assert legacy is None
+
+    db.expunge_all()
+    row = db.query(CTI).one()
+    assert "raw_blob" not in row.__dict__  # 원시 데이터는 접근할 때만 읽음
+    assert row.raw_data == RAW
+
+
+def test_legacy_rows_are_readable_and_migrated(db):
+    db.execute(
+        text(
+            "INSERT INTO CTITable (search_item, tag, last_analyzed, raw_data) "
+            "VALUES ('legacy.example.com', 'hybrid', :now, :raw)"
+        ),
+        {"now": datetime.now(), "raw": types.json_codec.dumps_str(
+            {"scan_type": "quick_scan_submitted", "job_id": "job-1", "next_poll_at": 1767225600}
+        )},
+    )
+    db.execute(
+        text(
+            "INSERT INTO IoCTable (indicator_type, indicator_value, source, last_analyzed, raw_data) "
+            "VALUES ('ip', '192.0.2.1', 'VirusTotal', :now, :raw)"
+        ),
+        {"now": datetime.now(), "raw": types.json_codec.dumps_str({"data": {"id": "192.0.2.1"}})},
+    )
+    db.commit()
+
+    legacy = db.query(CTI).one()
+    assert legacy.raw_blob is None
+    assert legacy.raw_data["job_id"] == "job-1"
+
+    assert migrate_raw_data(db, chunk_size=1) == {"cti": 1, "ioc": 1}
+    assert migrate_raw_data(db) == {"cti": 0, "ioc": 0}
+
+    db.expunge_all()
+    row = db.query(CTI).one()
+    assert row.raw_data_legacy is None
+    assert row.raw_data["scan_type"] == "quick_scan_submitted"
+    assert "next_poll_at" not in row.raw_data
+    assert row.status == 200
+    assert row.scan_job_id == "job-1"
+    assert row.next_poll_at == datetime.fromtimestamp(1767225600)
+    assert db.query(IoC).one().raw_data == {"data": {"id": "192.0.2.1"}}
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from app.core.singleflight import SingleFlight, coalesce, indicator_flight
+
+
+def _run_concurrently(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target(index)
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"status": 200}
+
+    threading.Timer(0.2, release.set).start()
+    results, errors = _run_concurrently(8, lambda i: flight.do("evil.com", fetch))
+
+    assert len(calls) == 1
+    assert errors == [None] * 8
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_error_is_raised_to_every_waiter():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        raise RuntimeError("provider down")
+
+    _, errors = _run_concurrently(4, lambda i: flight.do("evil.com", fetch))
+
+    assert len(calls) == 1
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert flight.in_flight() == 0
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        return key
+
+    assert flight.do("a.com", fetch, "a.com") == "a.com"
+    assert flight.do("b.com", fetch, "b.com") == "b.com"
+    assert flight.do("a.com", fetch, "a.com") == "a.com"
+    assert calls == ["a.com", "b.com", "a.com"]
+
+
+def test_coalesce_normalizes_indicator():
+    calls = []
+    release = threading.Event()
+
+    @coalesce("test")
+    def lookup(indicator):
+        calls.append(indicator)
+        release.wait(5)
+        return indicator.lower()
+
+    values = ["evil.com", "Evil.com", "evil.com.", " EVIL.COM "]
+    threading.Timer(0.2, release.set).start()
+    results, errors = _run_concurrently(4, lambda i: lookup(values[i]))
+
+    assert errors == [None] * 4
+    assert len(calls) == 1
+    assert results == [calls[0].lower()] * 4
+    assert indicator_flight.in_flight() == 0
+
+
+def test_failed_call_is_not_remembered():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("first")
+
+    with pytest.raises(ValueError):
+        flight.do("x", fail)
+    assert flight.do("x", lambda: "second") == "second"
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+from app.core.verdict_index import VerdictIndex
+
+
+def _index(*entries) -> VerdictIndex:
+    index = VerdictIndex()
+    for value, verdict, source in entries:
+        index.add(value, verdict, source)
+    return index
+
+
+def test_unknown_indicator():
+    index = _index(("evil.com", "malicious", "feed"))
+    assert index.lookup("example.com") is None
+    assert index.lookup("10.0.0.1") is None
+    assert index.lookup("com") is None
+
+
+def test_exact_domain_match_is_normalized():
+    result = _index(("evil.com", "malicious", "feed")).lookup("EVIL.com.")
+    assert result["verdict"] == "malicious"
+    assert result["matched"] == "evil.com"
+    assert result["exact"] is True
+
+
+def test_subdomain_inherits_nearest_parent():
+    index = _index(
+        ("evil.com", "suspicious", "feed:a"),
+        ("cdn.evil.com", "malicious", "feed:b"),
+    )
+    result = index.lookup("a.cdn.evil.com")
+    assert result["matched"] == "cdn.evil.com"
+    assert result["verdict"] == "malicious"
+    assert result["exact"] is False
+
+    result = index.lookup("www.evil.com")
+    assert result["matched"] == "evil.com"
+    assert result["verdict"] == "suspicious"
+
+
+def test_harmless_parent_does_not_cover_subdomains():
+    index = _index(("example.com", "harmless", "VirusTotal"))
+    assert index.lookup("login.example.com") is None
+
+
+def test_exact_harmless_loses_to_malicious_parent():
+    index = _index(
+        ("evil.com", "malicious", "feed"),
+        ("safe.evil.com", "harmless", "VirusTotal"),
+    )
+    result = index.lookup("safe.evil.com")
+    assert result["verdict"] == "malicious"
+    assert result["matched"] == "evil.com"
+
+
+def test_exact_malicious_wins_over_parent():
+    index = _index(
+        ("evil.com", "suspicious", "feed"),
+        ("bad.evil.com", "malicious", "VirusTotal"),
+    )
+    result = index.lookup("bad.evil.com")
+    assert result["matched"] == "bad.evil.com"
+    assert result["exact"] is True
+
+
+def test_ip_in_cidr_uses_longest_prefix():
+    index = _index(
+        ("10.0.0.0/8", "suspicious", "feed:a"),
+        ("10.1.2.0/24", "malicious", "feed:b"),
+    )
+    result = index.lookup("10.1.2.3")
+    assert result["matched"] == "10.1.2.0/24"
+    assert result["verdict"] == "malicious"
+    assert result["exact"] is False
+
+    result = index.lookup("10.9.9.9")
+    assert result["matched"] == "10.0.0.0/8"
+
+
+def test_exact_ip_and_network_lookup():
+    index = _index(
+        ("192.0.2.10", "malicious", "VirusTotal"),
+        ("192.0.2.0/24", "harmless", "feed"),
+    )
+    assert index.lookup("192.0.2.10")["exact"] is True
+    assert index.lookup("192.0.2.0/24")["verdict"] == "harmless"
+    assert index.lookup("192.0.2.11") is None  # harmless 대역은 안의 IP에 적용하지 않음
+
+
+def test_ipv6_network():
+    index = _index(("2001:db8::/32", "malicious", "feed"))
+    result = index.lookup("2001:db8::1")
+    assert result["matched"] == "2001:db8::/32"
+    assert index.lookup("2001:db9::1") is None
+
+
+def test_same_source_keeps_newest_and_other_source_keeps_worst():
+    index = VerdictIndex()
+    now = datetime.now()
+    index.add("evil.com", "malicious", "VirusTotal", now - timedelta(days=1))
+    index.add("evil.com", "harmless", "VirusTotal", now)
+    assert index.lookup("evil.com")["verdict"] == "harmless"
+
+    index.add("evil.com", "suspicious", "feed", now)
+    index.add("evil.com", "harmless", "urlscan", now)
+    assert index.lookup("evil.com")["verdict"] == "suspicious"